@@ -0,0 +1,48 @@
+"""hardware inventory table and hardware_snapshots.inventory_id
+
+Revision ID: 97f3feae9d16
+Revises:
+Create Date: 2026-10-19 18:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.migrations import add_missing_columns, create_missing_table, drop_columns, drop_table_if_exists
+
+# revision identifiers, used by Alembic.
+revision: str = "97f3feae9d16"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_missing_table(
+        "hardware_inventory",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("hash", sa.String(length=40), nullable=False),
+        sa.Column("hostname", sa.String(length=200), nullable=True),
+        sa.Column("cpu_name", sa.String(length=200), nullable=True),
+        sa.Column("gpu_name", sa.String(length=200), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=False),
+        sa.Column("first_seen", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_seen", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint("hash"),
+    )
+    # Colonne nullable : les snapshots existants restent sans inventaire
+    if add_missing_columns("hardware_snapshots", sa.Column("inventory_id", sa.Integer(), nullable=True)):
+        op.create_index("ix_hardware_snapshots_inventory_id", "hardware_snapshots", ["inventory_id"])
+        # batch : ALTER direct sous PostgreSQL, recopie de table sous SQLite
+        with op.batch_alter_table("hardware_snapshots") as batch:
+            batch.create_foreign_key(
+                "hardware_snapshots_inventory_id_fkey", "hardware_inventory", ["inventory_id"], ["id"],
+            )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_hardware_snapshots_inventory_id", table_name="hardware_snapshots", if_exists=True)
+    drop_columns("hardware_snapshots", "inventory_id")
+    drop_table_if_exists("hardware_inventory")
@@ -0,0 +1,29 @@
+"""hardware_snapshots window extremes from the agent
+
+Revision ID: 1f648b07c4c1
+Revises: 97f3feae9d16
+Create Date: 2026-10-19 18:10:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from app.db.migrations import add_missing_columns, drop_columns
+
+# revision identifiers, used by Alembic.
+revision: str = "1f648b07c4c1"
+down_revision: Union[str, Sequence[str], None] = "97f3feae9d16"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ("cpu_usage_min", "cpu_usage_max", "gpu_usage_max", "gpu_temp_max")
+
+
+def upgrade() -> None:
+    # Extremes de la fenetre echantillonnee par l'agent (nullable : anciennes lignes sans)
+    add_missing_columns("hardware_snapshots", *(sa.Column(name, sa.Float(), nullable=True) for name in COLUMNS))
+
+
+def downgrade() -> None:
+    drop_columns("hardware_snapshots", *COLUMNS)
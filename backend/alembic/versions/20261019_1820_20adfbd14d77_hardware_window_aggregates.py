@@ -0,0 +1,29 @@
+"""hardware_snapshots window aggregates (cpu temp, ram)
+
+Revision ID: 20adfbd14d77
+Revises: 1f648b07c4c1
+Create Date: 2026-10-19 18:20:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from app.db.migrations import add_missing_columns, drop_columns
+
+# revision identifiers, used by Alembic.
+revision: str = "20adfbd14d77"
+down_revision: Union[str, Sequence[str], None] = "1f648b07c4c1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ("cpu_temp_max", "ram_used_percent_max")
+
+
+def upgrade() -> None:
+    # Maximums de la fenetre de persistance calcules par le serveur (RunningStats)
+    add_missing_columns("hardware_snapshots", *(sa.Column(name, sa.Float(), nullable=True) for name in COLUMNS))
+
+
+def downgrade() -> None:
+    drop_columns("hardware_snapshots", *COLUMNS)
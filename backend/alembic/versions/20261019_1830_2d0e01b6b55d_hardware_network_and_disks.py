@@ -0,0 +1,64 @@
+"""hardware_snapshots network columns and per-disk history tables
+
+Revision ID: 2d0e01b6b55d
+Revises: 20adfbd14d77
+Create Date: 2026-10-19 18:30:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from app.db.migrations import add_missing_columns, create_missing_table, drop_columns, drop_table_if_exists
+
+# revision identifiers, used by Alembic.
+revision: str = "2d0e01b6b55d"
+down_revision: Union[str, Sequence[str], None] = "20adfbd14d77"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NET_COLUMNS = ("net_download", "net_download_max", "net_upload", "net_upload_max")
+
+
+def _snapshot_fk() -> sa.Column:
+    return sa.Column(
+        "snapshot_id", sa.Integer(), sa.ForeignKey("hardware_snapshots.id", ondelete="CASCADE"), nullable=False,
+    )
+
+
+def upgrade() -> None:
+    add_missing_columns("hardware_snapshots", *(sa.Column(name, sa.Float(), nullable=True) for name in NET_COLUMNS))
+    create_missing_table(
+        "hardware_disk_samples",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        _snapshot_fk(),
+        sa.Column("device", sa.String(length=100), nullable=False),
+        sa.Column("used_gb", sa.Float(), nullable=True),
+        sa.Column("total_gb", sa.Float(), nullable=True),
+        sa.Column("percent", sa.Float(), nullable=True),
+        sa.Column("recorded_at", sa.DateTime(timezone=True), nullable=False),
+        indexes=(
+            ("ix_hardware_disk_samples_snapshot_id", ["snapshot_id"]),
+            ("ix_hardware_disk_samples_recorded_at", ["recorded_at"]),
+            ("ix_hardware_disk_samples_device_date", ["device", "recorded_at"]),
+        ),
+    )
+    create_missing_table(
+        "hardware_disk_temps",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        _snapshot_fk(),
+        sa.Column("name", sa.String(length=200), nullable=False),
+        sa.Column("temp", sa.Float(), nullable=True),
+        sa.Column("recorded_at", sa.DateTime(timezone=True), nullable=False),
+        indexes=(
+            ("ix_hardware_disk_temps_snapshot_id", ["snapshot_id"]),
+            ("ix_hardware_disk_temps_recorded_at", ["recorded_at"]),
+            ("ix_hardware_disk_temps_name_date", ["name", "recorded_at"]),
+        ),
+    )
+
+
+def downgrade() -> None:
+    drop_table_if_exists("hardware_disk_temps")
+    drop_table_if_exists("hardware_disk_samples")
+    drop_columns("hardware_snapshots", *NET_COLUMNS)
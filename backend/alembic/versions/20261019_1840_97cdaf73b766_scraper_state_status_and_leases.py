@@ -0,0 +1,40 @@
+"""scraper_state shared status columns and leader_leases table
+
+Revision ID: 97cdaf73b766
+Revises: 2d0e01b6b55d
+Create Date: 2026-10-19 18:40:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from app.db.migrations import add_missing_columns, create_missing_table, drop_columns, drop_table_if_exists
+
+# revision identifiers, used by Alembic.
+revision: str = "97cdaf73b766"
+down_revision: Union[str, Sequence[str], None] = "2d0e01b6b55d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # NOT NULL sur des lignes existantes : valeur par defaut cote serveur
+    add_missing_columns(
+        "scraper_state",
+        sa.Column("status", sa.String(length=20), server_default="ok", nullable=False),
+        sa.Column("last_attempt_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("parser_suspect", sa.Boolean(), server_default=sa.false(), nullable=False),
+    )
+    create_missing_table(
+        "leader_leases",
+        sa.Column("name", sa.String(length=50), primary_key=True),
+        sa.Column("holder", sa.String(length=100), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    drop_table_if_exists("leader_leases")
+    drop_columns("scraper_state", "status", "last_attempt_at", "last_error", "parser_suspect")
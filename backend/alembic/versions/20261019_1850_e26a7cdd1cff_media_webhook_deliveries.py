@@ -0,0 +1,32 @@
+"""media_webhook_deliveries table (webhook dedupe shared by workers)
+
+Revision ID: e26a7cdd1cff
+Revises: 97cdaf73b766
+Create Date: 2026-10-19 18:50:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from app.db.migrations import create_missing_table, drop_table_if_exists
+
+# revision identifiers, used by Alembic.
+revision: str = "e26a7cdd1cff"
+down_revision: Union[str, Sequence[str], None] = "97cdaf73b766"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_missing_table(
+        "media_webhook_deliveries",
+        sa.Column("fingerprint", sa.String(length=40), primary_key=True),
+        sa.Column("service", sa.String(length=20), nullable=False),
+        sa.Column("received_at", sa.DateTime(timezone=True), nullable=False),
+        indexes=(("ix_media_webhook_deliveries_received_at", ["received_at"]),),
+    )
+
+
+def downgrade() -> None:
+    drop_table_if_exists("media_webhook_deliveries")
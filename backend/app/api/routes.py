@@ -9,9 +9,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc, func
 
 from app.auth.jwt import get_current_user, TokenData
+from app.config import get_settings
+from app.db.counters import row_counters
 from app.db.database import get_db
 from app.db.models import TrackerStats
-from app.scrapers.routes import _scrape_results
+from app.scrapers.routes import read_scraper_states
 from app.scrapers.registry import list_all_sites
 
 router = APIRouter()
@@ -108,14 +110,9 @@ async def get_latest_stats(
     ordered["_timestamp"] = latest_timestamp or int(datetime.now(timezone.utc).timestamp())
 
     # Ajouter les metadonnees de scrape (sante par tracker)
-    scrape_meta = {}
-    for name, sr in _scrape_results.items():
-        scrape_meta[name] = {
-            "status": sr.status,
-            "last_success_at": sr.last_success_at.isoformat() if sr.last_success_at else None,
-            "last_attempt_at": sr.last_attempt_at.isoformat() if sr.last_attempt_at else None,
-            "consecutive_failures": sr.consecutive_failures,
-        }
+    scrape_meta = await read_scraper_states(db)
+    for meta in scrape_meta.values():
+        meta.pop("last_error", None)
     ordered["_scrape_meta"] = scrape_meta
 
     return ordered
@@ -212,20 +209,12 @@ async def get_dashboard_summary(
     """
     Retourne un resume du dashboard.
     """
-    # Compter les trackers avec des donnees
-    count_query = select(func.count(func.distinct(TrackerStats.tracker_name)))
-    result = await db.execute(count_query)
-    tracker_count = result.scalar() or 0
-
-    # Derniere mise a jour
-    last_update_query = select(func.max(TrackerStats.scraped_at))
-    result = await db.execute(last_update_query)
-    last_update = result.scalar()
-
-    # Stats totales
-    total_query = select(func.count(TrackerStats.id))
-    result = await db.execute(total_query)
-    total_records = result.scalar() or 0
+    # Compteurs en memoire (cf db/counters.py) : pas de parcours de tracker_stats
+    tables = await row_counters.ensure(db, get_settings().health_counters_resync)
+    counter = tables.get("tracker_stats")
+    tracker_count = len(counter.last_by_key) if counter else 0
+    total_records = counter.rows if counter else 0
+    last_update = counter.last_at if counter else None
 
     return {
         "trackers_count": tracker_count,
@@ -53,8 +53,60 @@ class Settings(BaseSettings):
         default=None,
         description="URL du webhook Discord pour les alertes"
     )
+    discord_dedupe_window: int = Field(
+        default=600,
+        description="Fenetre pendant laquelle une alerte identique n'est pas renvoyee (secondes)"
+    )
+
+    # Alertes hardware (evaluees a chaque echantillon de l'agent, cf hardware/alerts.py)
+    hw_alert_rules: list[dict] = Field(
+        default_factory=lambda: [
+            {"name": "cpu_temp", "metric": "cpu.temp", "op": ">", "threshold": 90, "for_seconds": 60, "clear": 85},
+            {"name": "disk_full", "metric": "storage.percent", "op": ">", "threshold": 95, "clear": 93},
+            {"name": "gpu_temp_p95", "metric": "gpu.temp", "stat": "p95", "window": 300, "op": ">", "threshold": 83, "clear": 78},
+        ],
+        description="Regles de seuil hardware (liste JSON)"
+    )
+
+    # Compression deadband des snapshots hardware (cf hardware/deadband.py)
+    hw_deadband: bool = Field(
+        default=False,
+        description="N'ecrire un snapshot que si une metrique sort de sa tolerance"
+    )
+    hw_deadband_max_gap: int = Field(
+        default=900,
+        description="Ecart max entre deux snapshots en mode deadband (secondes)"
+    )
+    hw_deadband_tolerances: dict[str, float] = Field(
+        default_factory=dict,
+        description="Tolerances par colonne (JSON), fusionnees avec les valeurs par defaut"
+    )
+    # Bus de trames hardware entre workers uvicorn (cf hardware/bus.py) ; vide = worker unique
+    hw_bus_path: Optional[str] = Field(
+        default=None,
+        description="Socket Unix partage par les workers de la machine (ex: /tmp/trackboard-hw.sock)"
+    )
+
+    # Healthchecks : duree de cache des sondes, resynchro des compteurs de lignes (secondes)
+    health_probe_ttl: int = Field(default=5, description="Cache du ping DB de /health")
+    health_counters_resync: int = Field(default=300, description="Recomptage des tables (health, resume)")
+    # Endpoint /metrics (format Prometheus) ; vide = desactive
+    metrics_token: Optional[str] = Field(default=None, description="Token Bearer de /metrics")
+    # Surveillance de la boucle asyncio (retard sur /metrics, pile des callbacks bloquants)
+    loop_lag_interval: float = Field(default=0.5, description="Periode de mesure du retard de la boucle (s)")
+    loop_block_threshold: float = Field(default=0.25, description="Blocage journalise au-dela de (s)")
 
     # Scraper
+    # Election du worker qui lance le planificateur (plusieurs workers uvicorn)
+    scheduler_lease_ttl: int = Field(
+        default=30, description="Duree du bail de leader ; un worker mort est remplace en moins d'un TTL"
+    )
+    # Ou tourne Chromium : "inline" (boucle de l'API) ou "process" (pool de processus, cf scrapers/pool.py)
+    scrape_mode: str = Field(default="inline", pattern="^(inline|process)$", description="Mode d'execution des scrapes")
+    scrape_workers: int = Field(default=2, description="Processus de scrape en parallele (mode process)")
+    scrape_job_timeout: int = Field(default=300, description="Duree max d'un job de scrape (s)")
+    scrape_job_memory_mb: int = Field(default=1536, description="RSS max worker + Chromium d'un job (Mo)")
+    scrape_job_cpu_seconds: int = Field(default=240, description="Temps CPU max par processus d'un job (s)")
     scrape_interval: int = Field(
         default=3600,
         description="Intervalle entre les scrapes automatiques (secondes)"
@@ -69,6 +121,17 @@ class Settings(BaseSettings):
     media_sonarr_api_key: Optional[str] = Field(default=None, description="Clé API Sonarr")
     media_tautulli_url: Optional[str] = Field(default=None, description="URL Tautulli (ex: http://192.168.1.x:8181)")
     media_tautulli_api_key: Optional[str] = Field(default=None, description="Clé API Tautulli")
+    # Cache media (stale-while-revalidate) : TTL des pieces "activite" et "catalogue"
+    media_cache_activity_ttl: int = Field(default=15, description="TTL sessions/queue/activite (secondes)")
+    media_cache_catalog_ttl: int = Field(default=600, description="TTL bibliotheques/comptes catalogue (secondes)")
+    # Catalogues Radarr/Sonarr : relecture complete periodique (le reste via history/since)
+    media_sync_reconcile_interval: int = Field(default=21600, description="Intervalle de reconciliation complete (secondes)")
+    # Webhooks entrants (/media/webhooks/{service}?token=...) ; vide = desactives
+    media_webhook_token: Optional[str] = Field(default=None, description="Token des webhooks media")
+    media_webhook_ttl: int = Field(default=600, description="TTL des pieces d'un service qui envoie des webhooks (secondes)")
+    media_webhook_dedupe_window: int = Field(
+        default=120, description="Un webhook identique recu dans ce delai n'est pas retraite (secondes, 0 = desactive)"
+    )
 
     # Tracker Credentials - Generation-Free
     gf_user: Optional[str] = None
@@ -1,5 +1,11 @@
 # Database module
 from app.db.database import get_db, init_db
-from app.db.models import TrackerStats, HardwareSnapshot
+from app.db.models import (
+    TrackerStats, HardwareSnapshot, HardwareInventory, HardwareDiskSample, HardwareDiskTemp, ScrapeRun,
+    ScrapeJob, ScraperState, LeaderLease, MediaWebhookDelivery,
+)
+from app.db.counters import row_counters
 
-__all__ = ["get_db", "init_db", "TrackerStats", "HardwareSnapshot"]
+__all__ = ["get_db", "init_db", "TrackerStats", "HardwareSnapshot", "HardwareInventory",
+           "HardwareDiskSample", "HardwareDiskTemp", "ScrapeRun", "ScrapeJob",
+           "ScraperState", "LeaderLease", "MediaWebhookDelivery", "row_counters"]
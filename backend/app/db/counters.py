@@ -0,0 +1,172 @@
+"""
+Compteurs de lignes maintenus en memoire (health, resume du dashboard).
+
+Evite les `count(*)` / `max()` / `group by` a chaque appel de /health/full et
+/api/summary sur des tables qui grossissent sans cesse :
+- chargement initial puis resynchro periodique (HEALTH_COUNTERS_RESYNC) :
+  estimation du planificateur sous PostgreSQL (`pg_class.reltuples`), count(*) sous SQLite ;
+  derniere date par tracker par parcours d'index "en saut" (CTE recursive : une
+  lecture d'index par tracker, jamais un GROUP BY sur toute la table) ;
+- chaque commit ORM qui insere/supprime une ligne suivie met a jour les compteurs
+  (evenements de Session : after_flush -> after_commit, annule au rollback) ;
+- la purge de retention (DELETE en masse, hors ORM) appelle `purged()`.
+
+Un autre processus qui ecrit dans la base n'est vu qu'a la resynchro suivante.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import DateTime, String, column, event, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.models import HardwareSnapshot, TrackerStats
+
+logger = logging.getLogger("dashboard.db.counters")
+
+# Table suivie -> (modele, colonne de date, colonne de regroupement)
+TRACKED = {
+    "tracker_stats": (TrackerStats, "scraped_at", "tracker_name"),
+    "hardware_snapshots": (HardwareSnapshot, "recorded_at", None),
+}
+_MODELS = {model: table for table, (model, _, _) in TRACKED.items()}
+_DELTAS_KEY = "row_counter_deltas"
+
+
+def _latest_by_key_query(table: str, date_col: str, key_col: str):
+    """
+    Derniere date par valeur de `key_col` sans parcourir la table : la CTE saute de
+    cle en cle (min(cle) > precedente), puis max(date) par cle. Chaque etape est une
+    extremite d'index ((key_col) et (key_col, date_col)), PostgreSQL comme SQLite.
+    Noms de tables/colonnes internes (TRACKED), pas d'entree utilisateur.
+    """
+    return text(f"""
+        WITH RECURSIVE keys(k) AS (
+            SELECT min({key_col}) FROM {table}
+            UNION ALL
+            SELECT (SELECT min({key_col}) FROM {table} WHERE {key_col} > keys.k)
+            FROM keys WHERE keys.k IS NOT NULL
+        )
+        SELECT k, (SELECT max({date_col}) FROM {table} WHERE {key_col} = keys.k) AS last_at
+        FROM keys WHERE k IS NOT NULL
+    """).columns(column("k", String), column("last_at", DateTime(timezone=True)))
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)  # SQLite rend des dates naives
+    return value
+
+
+@dataclass
+class TableCounter:
+    rows: int = 0
+    estimated: bool = False  # True = estimation du planificateur (PostgreSQL)
+    last_at: Optional[datetime] = None
+    last_by_key: dict[str, datetime] = field(default_factory=dict)
+
+    def add(self, delta: int, key: Optional[str], at: Optional[datetime]):
+        self.rows = max(self.rows + delta, 0)
+        if delta > 0 and at is not None:
+            if self.last_at is None or at > self.last_at:
+                self.last_at = at
+            if key is not None and (key not in self.last_by_key or at > self.last_by_key[key]):
+                self.last_by_key[key] = at
+
+
+class RowCounters:
+    """Compteurs des tables suivies, partages par tout le processus."""
+
+    def __init__(self):
+        self.tables: dict[str, TableCounter] = {}
+        self.loaded_at: Optional[float] = None  # time.monotonic() du dernier chargement
+        self._lock = asyncio.Lock()
+
+    def reset(self):
+        self.tables = {}
+        self.loaded_at = None
+
+    async def ensure(self, db: AsyncSession, max_age: float) -> dict[str, TableCounter]:
+        """Compteurs a jour (recharges si jamais charges ou plus vieux que max_age)."""
+        if self.loaded_at is None or time.monotonic() - self.loaded_at >= max_age:
+            async with self._lock:
+                if self.loaded_at is None or time.monotonic() - self.loaded_at >= max_age:
+                    await self.load(db)
+        return self.tables
+
+    async def load(self, db: AsyncSession):
+        postgres = db.bind.dialect.name == "postgresql"
+        tables: dict[str, TableCounter] = {}
+        for table, (model, date_col, key_col) in TRACKED.items():
+            counter = TableCounter()
+            if postgres:
+                estimate = (await db.execute(
+                    text("SELECT reltuples::bigint FROM pg_class WHERE relname = :t"), {"t": table},
+                )).scalar()
+                # -1 = table jamais analysee (PG14+) : compte exact
+                if estimate is not None and estimate >= 0:
+                    counter.rows, counter.estimated = int(estimate), True
+            if not counter.estimated:
+                counter.rows = (await db.execute(select(func.count()).select_from(model))).scalar() or 0
+            # max() sur colonne indexee : lecture d'une extremite de l'index
+            date_attr = getattr(model, date_col)
+            counter.last_at = _as_utc((await db.execute(select(func.max(date_attr)))).scalar())
+            if key_col is not None:
+                rows = (await db.execute(_latest_by_key_query(table, date_col, key_col))).all()
+                counter.last_by_key = {k: _as_utc(at) for k, at in rows if at is not None}
+            tables[table] = counter
+        self.tables = tables
+        self.loaded_at = time.monotonic()
+
+    def apply(self, deltas: list[tuple[str, int, Optional[str], Optional[datetime]]]):
+        if self.loaded_at is None:
+            return  # Le chargement initial comptera ces lignes
+        for table, delta, key, at in deltas:
+            self.tables.setdefault(table, TableCounter()).add(delta, key, at)
+
+    def purged(self, table: str, rows: int):
+        """Lignes supprimees hors ORM (DELETE en masse)."""
+        if self.loaded_at is not None and table in self.tables:
+            self.tables[table].add(-rows, None, None)
+
+
+# Instance globale
+row_counters = RowCounters()
+
+
+# === Evenements ORM ===
+
+def _row_delta(obj, delta: int) -> Optional[tuple[str, int, Optional[str], Optional[datetime]]]:
+    table = _MODELS.get(type(obj))
+    if table is None:
+        return None
+    _, date_col, key_col = TRACKED[table]
+    at = _as_utc(getattr(obj, date_col, None)) or datetime.now(timezone.utc)
+    return table, delta, getattr(obj, key_col) if key_col else None, at
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_deltas(session: Session, flush_context):
+    deltas = session.info.setdefault(_DELTAS_KEY, [])
+    for obj in session.new:
+        if (d := _row_delta(obj, 1)) is not None:
+            deltas.append(d)
+    for obj in session.deleted:
+        if (d := _row_delta(obj, -1)) is not None:
+            deltas.append(d)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_deltas(session: Session):
+    deltas = session.info.pop(_DELTAS_KEY, None)
+    if deltas:
+        row_counters.apply(deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_deltas(session: Session):
+    session.info.pop(_DELTAS_KEY, None)
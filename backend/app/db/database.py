@@ -1,9 +1,14 @@
 """
 Configuration et gestion de la base de donnees avec SQLAlchemy async.
 """
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, Session
 from app.config import get_settings
+from app.metrics import metrics
 
 settings = get_settings()
 
@@ -50,3 +55,39 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+
+# === Metriques (cf app/metrics.py) ===
+
+DB_QUERY_SECONDS = metrics.histogram("db_query_seconds", "Duree des requetes SQL", ("operation",))
+DB_COMMIT_SECONDS = metrics.histogram("db_commit_seconds", "Duree des commits de session ORM (flush inclus)")
+_OPERATIONS = frozenset({"select", "insert", "update", "delete"})
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_metrics_start", None)
+    if start is None:
+        return
+    operation = statement.lstrip()[:6].lower()
+    DB_QUERY_SECONDS.observe(
+        time.perf_counter() - start, operation=operation if operation in _OPERATIONS else "other",
+    )
+
+
+@event.listens_for(Session, "before_commit")
+def _commit_started(session):
+    session.info["metrics_commit_start"] = time.perf_counter()
+
+
+@event.listens_for(Session, "after_commit")
+def _commit_finished(session):
+    start = session.info.pop("metrics_commit_start", None)
+    if start is not None:
+        DB_COMMIT_SECONDS.observe(time.perf_counter() - start)
@@ -0,0 +1,67 @@
+"""
+Helpers pour les revisions Alembic (alembic/versions/).
+
+init_db() cree les tables manquantes au demarrage (create_all) mais n'ajoute
+jamais de colonne a une table existante. Une base deployee peut donc avoir
+les nouvelles tables sans les nouvelles colonnes, et une base neuve a deja
+tout : les revisions n'ajoutent que ce qui manque, pour que `alembic upgrade head`
+fonctionne dans les deux cas.
+
+En mode offline (`upgrade --sql`) il n'y a pas de base a inspecter : tout est emis.
+"""
+from typing import Optional
+
+import sqlalchemy as sa
+from alembic import context, op
+
+
+def _inspector() -> Optional[sa.Inspector]:
+    if context.is_offline_mode():
+        return None
+    return sa.inspect(op.get_bind())
+
+
+def has_table(table: str) -> bool:
+    inspector = _inspector()
+    return inspector is not None and inspector.has_table(table)
+
+
+def missing_columns(table: str, columns: list[sa.Column]) -> list[sa.Column]:
+    """Colonnes de `columns` absentes de `table`."""
+    inspector = _inspector()
+    if inspector is None:
+        return list(columns)
+    existing = {c["name"] for c in inspector.get_columns(table)}
+    return [c for c in columns if c.name not in existing]
+
+
+def add_missing_columns(table: str, *columns: sa.Column) -> list[str]:
+    """Ajoute les colonnes absentes ; retourne les noms ajoutes."""
+    added = missing_columns(table, list(columns))
+    for column in added:
+        op.add_column(table, column)
+    return [c.name for c in added]
+
+
+def drop_columns(table: str, *names: str):
+    """Retire les colonnes presentes (downgrade)."""
+    inspector = _inspector()
+    existing = None if inspector is None else {c["name"] for c in inspector.get_columns(table)}
+    with op.batch_alter_table(table) as batch:
+        for name in names:
+            if existing is None or name in existing:
+                batch.drop_column(name)
+
+
+def create_missing_table(table: str, *elements, indexes: tuple[tuple[str, list[str]], ...] = ()):
+    """Cree la table (et ses index) si create_all ne l'a pas deja fait."""
+    if has_table(table):
+        return
+    op.create_table(table, *elements)
+    for name, columns in indexes:
+        op.create_index(name, table, columns)
+
+
+def drop_table_if_exists(table: str):
+    if _inspector() is None or has_table(table):
+        op.drop_table(table)
@@ -2,7 +2,8 @@
 Modeles SQLAlchemy pour la base de donnees.
 """
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Index
+from sqlalchemy import Boolean, Column, Integer, String, Float, DateTime, JSON, Index, ForeignKey, Text, false
+from sqlalchemy.orm import relationship
 from app.db.database import Base
 
 
@@ -68,6 +69,33 @@ class TrackerStats(Base):
         }
 
 
+class HardwareInventory(Base):
+    """
+    Inventaire materiel statique de l'agent (CPU, RAM totale, GPU, disques).
+    Une ligne par configuration distincte (dedup par hash), referencee par les snapshots.
+    """
+
+    __tablename__ = "hardware_inventory"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    hash = Column(String(40), nullable=False, unique=True)
+    hostname = Column(String(200), nullable=True)
+    cpu_name = Column(String(200), nullable=True)
+    gpu_name = Column(String(200), nullable=True)
+    data = Column(JSON, nullable=False)
+    first_seen = Column(DateTime(timezone=True), default=_utc_now, nullable=False)
+    last_seen = Column(DateTime(timezone=True), default=_utc_now, nullable=False)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "hash": self.hash,
+            "data": self.data,
+            "first_seen": self.first_seen.isoformat() if self.first_seen else None,
+            "last_seen": self.last_seen.isoformat() if self.last_seen else None,
+        }
+
+
 class HardwareSnapshot(Base):
     """Snapshot des statistiques hardware."""
 
@@ -75,24 +103,42 @@ class HardwareSnapshot(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
 
+    # Inventaire statique (noms CPU/GPU, disques...) - remplace cpu_name/gpu_name
+    inventory_id = Column(Integer, ForeignKey("hardware_inventory.id"), nullable=True, index=True)
+    inventory = relationship(HardwareInventory, lazy="joined")
+
     # CPU
     cpu_usage = Column(Float, nullable=True)
+    cpu_usage_min = Column(Float, nullable=True)  # Extremes de la fenetre echantillonnee par l'agent
+    cpu_usage_max = Column(Float, nullable=True)
     cpu_temp = Column(Float, nullable=True)
-    cpu_name = Column(String(200), nullable=True)
+    cpu_temp_max = Column(Float, nullable=True)
+    cpu_name = Column(String(200), nullable=True)  # Legacy : plus ecrit, cf inventory
 
     # RAM
     ram_used_percent = Column(Float, nullable=True)
+    ram_used_percent_max = Column(Float, nullable=True)
     ram_used_gb = Column(Float, nullable=True)
     ram_total_gb = Column(Float, nullable=True)
 
     # GPU
     gpu_usage = Column(Float, nullable=True)
+    gpu_usage_max = Column(Float, nullable=True)
     gpu_temp = Column(Float, nullable=True)
-    gpu_name = Column(String(200), nullable=True)
+    gpu_temp_max = Column(Float, nullable=True)
+    gpu_name = Column(String(200), nullable=True)  # Legacy : plus ecrit, cf inventory
     gpu_vram_used = Column(Float, nullable=True)
 
-    # Storage (JSON pour plusieurs disques)
+    # Reseau (Mbps, moyenne de la fenetre + pic)
+    net_download = Column(Float, nullable=True)
+    net_download_max = Column(Float, nullable=True)
+    net_upload = Column(Float, nullable=True)
+    net_upload_max = Column(Float, nullable=True)
+
+    # Storage (JSON pour plusieurs disques) - detail type dans hardware_disk_samples
     storage = Column(JSON, nullable=True)
+    disks = relationship("HardwareDiskSample", cascade="all, delete-orphan", lazy="raise")
+    disk_temps = relationship("HardwareDiskTemp", cascade="all, delete-orphan", lazy="raise")
 
     # Donnees brutes completes
     raw_data = Column(JSON, nullable=True)
@@ -101,29 +147,156 @@ class HardwareSnapshot(Base):
     recorded_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
 
     def to_dict(self) -> dict:
-        """Convertit le modele en dictionnaire."""
+        """
+        Convertit le modele en dictionnaire.
+        Les champs statiques (noms, RAM totale, disques) sont resolus via l'inventaire.
+        """
+        # Import local : app.hardware importe ce module au chargement
+        from app.hardware.inventory import merge_inventory
+
+        inventory = self.inventory
+        static = inventory.data if inventory and isinstance(inventory.data, dict) else {}
         return {
             "cpu": {
                 "usage": self.cpu_usage,
+                "usage_min": self.cpu_usage_min,
+                "usage_max": self.cpu_usage_max,
                 "temp": self.cpu_temp,
-                "name": self.cpu_name,
+                "temp_max": self.cpu_temp_max,
+                "name": self.cpu_name or (inventory.cpu_name if inventory else None),
             },
             "ram": {
                 "used_percent": self.ram_used_percent,
+                "used_percent_max": self.ram_used_percent_max,
                 "used_gb": self.ram_used_gb,
-                "total_gb": self.ram_total_gb,
+                "total_gb": self.ram_total_gb if self.ram_total_gb is not None
+                else (static.get("ram") or {}).get("total_gb"),
             },
             "gpu": {
                 "usage": self.gpu_usage,
+                "usage_max": self.gpu_usage_max,
                 "temp": self.gpu_temp,
-                "name": self.gpu_name,
+                "temp_max": self.gpu_temp_max,
+                "name": self.gpu_name or (inventory.gpu_name if inventory else None),
                 "vram_used": self.gpu_vram_used,
             },
-            "storage": self.storage or [],
+            "network": {
+                "download_speed": self.net_download,
+                "download_speed_max": self.net_download_max,
+                "upload_speed": self.net_upload,
+                "upload_speed_max": self.net_upload_max,
+            },
+            "storage": merge_inventory({"storage": self.storage or []}, static)["storage"],
+            "recorded_at": self.recorded_at.isoformat() if self.recorded_at else None,
+        }
+
+
+class HardwareDiskSample(Base):
+    """Usage d'un disque dans un snapshot (une ligne par disque)."""
+
+    __tablename__ = "hardware_disk_samples"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    snapshot_id = Column(Integer, ForeignKey("hardware_snapshots.id", ondelete="CASCADE"), nullable=False, index=True)
+    device = Column(String(100), nullable=False)
+    used_gb = Column(Float, nullable=True)
+    total_gb = Column(Float, nullable=True)
+    percent = Column(Float, nullable=True)
+    recorded_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        Index("ix_hardware_disk_samples_device_date", "device", "recorded_at"),
+    )
+
+    def to_dict(self) -> dict:
+        return {
+            "device": self.device,
+            "used_gb": self.used_gb,
+            "total_gb": self.total_gb,
+            "percent": self.percent,
+            "recorded_at": self.recorded_at.isoformat() if self.recorded_at else None,
+        }
+
+
+class HardwareDiskTemp(Base):
+    """Temperature d'un disque dans un snapshot."""
+
+    __tablename__ = "hardware_disk_temps"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    snapshot_id = Column(Integer, ForeignKey("hardware_snapshots.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = Column(String(200), nullable=False)
+    temp = Column(Float, nullable=True)
+    recorded_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        Index("ix_hardware_disk_temps_name_date", "name", "recorded_at"),
+    )
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "temp": self.temp,
             "recorded_at": self.recorded_at.isoformat() if self.recorded_at else None,
         }
 
 
+class ScrapeRun(Base):
+    """
+    Chronologie d'un run de scrape (cf scrapers/tracing.py).
+    `spans` : liste compacte [chemin, debut_ms, duree_ms, erreur 0/1].
+    """
+
+    __tablename__ = "scrape_runs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tracker_name = Column(String(100), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    duration_ms = Column(Float, nullable=False)
+    status = Column(String(20), nullable=False)
+    spans = Column(JSON, nullable=True)
+
+    __table_args__ = (
+        Index("ix_scrape_runs_name_date", "tracker_name", "started_at"),
+    )
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "tracker_name": self.tracker_name,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "spans": [
+                {"step": path, "start_ms": start, "duration_ms": duration, "error": bool(error)}
+                for path, start, duration, error in (self.spans or [])
+            ],
+        }
+
+
+class ScrapeJob(Base):
+    """
+    Scrape d'un tracker execute hors du processus API (SCRAPE_MODE=process).
+    Cree par le pool (queued), pris par le processus de scrape (running) qui y
+    ecrit le resultat (done / failed) ; `killed` = arrete par le chien de garde.
+    `result` : ScrapedStats serialise ; `spans` : meme format que scrape_runs.
+    """
+
+    __tablename__ = "scrape_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tracker_name = Column(String(100), nullable=False)
+    status = Column(String(20), default="queued", nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), default=_utc_now, nullable=False, index=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    worker_pid = Column(Integer, nullable=True)
+    duration_ms = Column(Float, nullable=True)
+    result = Column(JSON, nullable=True)
+    spans = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+
 class ScraperState(Base):
     """
     Etat persistant du scraper par tracker. Rechargé au démarrage pour
@@ -137,9 +310,42 @@ class ScraperState(Base):
     consecutive_failures = Column(Integer, default=0, nullable=False)
     last_success_at = Column(DateTime(timezone=True), nullable=True)
     last_known_active_warnings = Column(Integer, default=0, nullable=False)
+    # Dernier resultat, lu par /scrapers/status depuis n'importe quel worker
+    # server_default : colonnes NOT NULL ajoutees a une table existante (cf alembic/versions)
+    status = Column(String(20), default="ok", server_default="ok", nullable=False)
+    last_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    parser_suspect = Column(Boolean, default=False, server_default=false(), nullable=False)
     updated_at = Column(
         DateTime(timezone=True),
         default=_utc_now,
         onupdate=_utc_now,
         nullable=False,
     )
+
+
+class MediaWebhookDelivery(Base):
+    """
+    Webhook media deja traite, partage entre workers et redemarrages.
+    `fingerprint` = empreinte du service + corps (cf media/webhooks.py) : une
+    relivraison dans MEDIA_WEBHOOK_DEDUPE_WINDOW n'est pas retraitee.
+    """
+
+    __tablename__ = "media_webhook_deliveries"
+
+    fingerprint = Column(String(40), primary_key=True)
+    service = Column(String(20), nullable=False)
+    received_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class LeaderLease(Base):
+    """
+    Bail exclusif partage entre workers : planificateur (sous SQLite) et scraping en cours.
+    Le detenteur le renouvelle avant `expires_at` ; un bail expire peut etre repris.
+    """
+
+    __tablename__ = "leader_leases"
+
+    name = Column(String(50), primary_key=True)
+    holder = Column(String(100), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
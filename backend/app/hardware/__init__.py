@@ -1,4 +1,5 @@
 # Hardware module
+from app.hardware.bus import FrameBus, hardware_bus
 from app.hardware.manager import HardwareManager, hardware_manager
 
-__all__ = ["HardwareManager", "hardware_manager"]
+__all__ = ["FrameBus", "hardware_bus", "HardwareManager", "hardware_manager"]
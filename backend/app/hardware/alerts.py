@@ -0,0 +1,231 @@
+"""
+Moteur de regles d'alerte hardware, evalue a chaque echantillon de l'agent.
+
+Les regles viennent de la config (`HW_ALERT_RULES`, liste JSON). Exemples :
+    {"name": "cpu_temp", "metric": "cpu.temp", "op": ">", "threshold": 90, "for_seconds": 60, "clear": 85}
+    {"name": "disk_full", "metric": "storage.percent", "op": ">", "threshold": 95, "clear": 93}
+    {"name": "gpu_temp_p95", "metric": "gpu.temp", "stat": "p95", "window": 300, "op": ">", "threshold": 83}
+    {"name": "dl_p95", "metric": "network.download_speed", "stat": "p95", "bounds": [0, 1000], "threshold": 500}
+
+- `metric` : chemin dans le payload agent. Si le chemin traverse une liste
+  (ex: `storage`), chaque element est suivi separement (cle `device`/`name`).
+- `stat` : last (defaut), ewma, avg, min, max ou pXX sur `window` secondes.
+- `bounds` : [min, max] de l'histogramme des pXX (valeurs hors bornes saturees).
+  Par defaut 0-100 pour les pourcentages (`usage`, `percent`, `*_percent`) et
+  0-150 pour les temperatures (`temp`, `*_temp`) ; une regle pXX sur une autre
+  metrique sans `bounds` est refusee.
+- `for_seconds` : la condition doit tenir en continu avant de declencher.
+- `clear` : seuil de retour a la normale (hysteresis). Defaut = `threshold`.
+- `cooldown` : delai minimal entre deux alertes identiques (dedupe).
+
+Tout est maintenu en memoire (cf stats.py), aucune requete DB.
+"""
+import logging
+import operator
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from app.hardware.stats import MetricWindow
+
+logger = logging.getLogger("dashboard.hardware.alerts")
+
+_OPS: dict[str, Callable[[float, float], bool]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+DEFAULT_WINDOW = 60.0
+DEFAULT_COOLDOWN = 1800.0
+
+
+def default_bounds(metric: str) -> Optional[tuple[float, float]]:
+    """Bornes d'histogramme connues d'apres la feuille du chemin, None si inconnues."""
+    leaf = metric.rsplit(".", 1)[-1]
+    if leaf in ("usage", "percent") or leaf.endswith("_percent"):
+        return (0.0, 100.0)
+    if leaf == "temp" or leaf.endswith("_temp"):
+        return (0.0, 150.0)
+    return None
+
+
+def _parse_bounds(raw: Any) -> Optional[tuple[float, float]]:
+    if raw is None:
+        return None
+    lo, hi = (float(v) for v in raw)
+    if not lo < hi:
+        raise ValueError(f"Bornes invalides: {raw}")
+    return (lo, hi)
+
+
+@dataclass
+class AlertRule:
+    """Regle de seuil sur une metrique hardware."""
+    name: str
+    metric: str
+    threshold: float
+    op: str = ">"
+    stat: str = "last"
+    window: float = DEFAULT_WINDOW
+    for_seconds: float = 0.0
+    clear: Optional[float] = None
+    cooldown: float = DEFAULT_COOLDOWN
+    ping_here: bool = False
+    bounds: Optional[tuple[float, float]] = None
+
+    @classmethod
+    def from_dict(cls, raw: dict) -> "AlertRule":
+        rule = cls(
+            name=str(raw["name"]),
+            metric=str(raw["metric"]),
+            threshold=float(raw["threshold"]),
+            op=raw.get("op", ">"),
+            stat=raw.get("stat", "last"),
+            window=float(raw.get("window", DEFAULT_WINDOW)),
+            for_seconds=float(raw.get("for_seconds", 0)),
+            clear=float(raw["clear"]) if raw.get("clear") is not None else None,
+            cooldown=float(raw.get("cooldown", DEFAULT_COOLDOWN)),
+            ping_here=bool(raw.get("ping_here", False)),
+            bounds=_parse_bounds(raw.get("bounds")),
+        )
+        if rule.op not in _OPS:
+            raise ValueError(f"Operateur inconnu: {rule.op}")
+        if rule.bounds is None:
+            rule.bounds = default_bounds(rule.metric)
+        # Valide le nom de stat (et les bornes des pXX) des le chargement plutot qu'au premier echantillon
+        MetricWindow(rule.window, rule.bounds).get(rule.stat)
+        return rule
+
+    @property
+    def clear_threshold(self) -> float:
+        return self.threshold if self.clear is None else self.clear
+
+    def breached(self, value: float) -> bool:
+        return _OPS[self.op](value, self.threshold)
+
+    def recovered(self, value: float) -> bool:
+        # Retour a la normale = condition inverse sur le seuil de clear
+        if self.op in (">", ">="):
+            return value < self.clear_threshold
+        return value > self.clear_threshold
+
+
+@dataclass
+class _RuleState:
+    pending_since: Optional[float] = None
+    firing: bool = False
+    notified: bool = False  # L'episode en cours a-t-il ete notifie ?
+    last_notified: Optional[float] = None
+
+
+@dataclass
+class AlertEvent:
+    """Transition d'une regle, a notifier."""
+    rule: AlertRule
+    label: str
+    value: float
+    resolved: bool = False
+
+
+def extract_metric(data: Any, path: str) -> dict[str, float]:
+    """
+    Resout un chemin pointe dans le payload agent.
+    Retourne {label: valeur}. Label vide pour une metrique scalaire,
+    `device` (ou `name`) de l'element pour les listes (ex: storage).
+    """
+    results: dict[str, float] = {}
+
+    def walk(node: Any, parts: list[str], label: str):
+        if not parts:
+            if isinstance(node, (int, float)) and not isinstance(node, bool):
+                results[label] = float(node)
+            return
+        if isinstance(node, list):
+            for item in node:
+                if isinstance(item, dict):
+                    item_label = str(item.get("device") or item.get("name") or "")
+                    walk(item, parts, item_label or label)
+            return
+        if isinstance(node, dict):
+            walk(node.get(parts[0]), parts[1:], label)
+
+    walk(data, path.split("."), "")
+    return results
+
+
+class AlertEngine:
+    """Evalue les regles sur chaque echantillon et produit les transitions a notifier."""
+
+    def __init__(self, rules: list[AlertRule]):
+        self.rules = rules
+        # Une fenetre par (metrique, label, taille, bornes) : partagee entre regles
+        self._windows: dict[tuple, MetricWindow] = {}
+        self._states: dict[tuple[str, str], _RuleState] = {}
+
+    @classmethod
+    def from_config(cls, raw_rules: list[dict]) -> "AlertEngine":
+        rules = []
+        for raw in raw_rules or []:
+            try:
+                rules.append(AlertRule.from_dict(raw))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning("Regle d'alerte ignoree %r: %s", raw, e)
+        return cls(rules)
+
+    def evaluate(self, data: dict, now: Optional[float] = None) -> list[AlertEvent]:
+        """Met a jour les fenetres et retourne les alertes declenchees/resolues."""
+        if not self.rules:
+            return []
+        now = time.monotonic() if now is None else now
+        events: list[AlertEvent] = []
+        updated: set[tuple] = set()
+
+        for rule in self.rules:
+            for label, sample in extract_metric(data, rule.metric).items():
+                wkey = (rule.metric, label, rule.window, rule.bounds)
+                window = self._windows.get(wkey)
+                if window is None:
+                    window = self._windows[wkey] = MetricWindow(rule.window, rule.bounds)
+                if wkey not in updated:
+                    window.update(sample, now)
+                    updated.add(wkey)
+
+                value = window.get(rule.stat)
+                if value is None:
+                    continue
+                event = self._step(rule, label, value, now)
+                if event is not None:
+                    events.append(event)
+        return events
+
+    def _step(self, rule: AlertRule, label: str, value: float, now: float) -> Optional[AlertEvent]:
+        state = self._states.setdefault((rule.name, label), _RuleState())
+
+        if state.firing:
+            if rule.recovered(value):
+                state.firing = False
+                state.pending_since = None
+                # Pas de "resolu" si l'alerte de cet episode n'a pas ete envoyee
+                if state.notified:
+                    state.notified = False
+                    return AlertEvent(rule, label, value, resolved=True)
+            return None
+
+        if not rule.breached(value):
+            state.pending_since = None
+            return None
+
+        if state.pending_since is None:
+            state.pending_since = now
+        if now - state.pending_since < rule.for_seconds:
+            return None
+
+        state.firing = True
+        if state.last_notified is not None and now - state.last_notified < rule.cooldown:
+            logger.debug("Alerte %s [%s] dedupliquee (cooldown)", rule.name, label)
+            return None
+        state.notified = True
+        state.last_notified = now
+        return AlertEvent(rule, label, value)
@@ -0,0 +1,226 @@
+"""
+Bus de trames hardware entre workers uvicorn d'une meme machine (socket Unix).
+
+L'agent n'est connecte qu'a un worker ; sans bus, les clients web servis par les
+autres workers ne recoivent rien. Le worker qui recoit l'agent publie la trame
+client encodee une seule fois ; chaque worker la relaie telle quelle a ses propres
+clients : n'importe quel worker sert le dashboard et la diffusion WebSocket se
+repartit sur tous les coeurs.
+
+Topologie en etoile, sans processus de plus :
+- le premier worker qui obtient le verrou `<HW_BUS_PATH>.lock` (flock) ecoute sur
+  HW_BUS_PATH et relaie chaque trame aux autres ;
+- les autres s'y connectent ; si le relais meurt, son verrou tombe avec lui et
+  un autre worker prend sa place a la reconnexion.
+
+Trame : longueur (4 octets, big-endian) + charge utile opaque (JSON deja encode).
+Un pair trop lent (tampon d'ecriture > MAX_PEER_BUFFER) est deconnecte plutot que
+de faire grossir la memoire : il se reconnecte et repart de la trame suivante.
+"""
+import asyncio
+import fcntl
+import logging
+import os
+import struct
+from typing import Awaitable, Callable, Optional
+
+from app.metrics import metrics
+
+logger = logging.getLogger("dashboard.hardware.bus")
+
+HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 4 * 1024 * 1024
+MAX_PEER_BUFFER = 1024 * 1024
+RECONNECT_DELAY = 0.5
+
+BUS_FRAMES = metrics.counter(
+    "hw_bus_frames_total", "Trames du bus hardware inter-workers", ("direction",),
+)
+
+FrameHandler = Callable[[bytes], Awaitable[None]]
+
+
+def _pack(payload: bytes) -> bytes:
+    return HEADER.pack(len(payload)) + payload
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    (size,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if size > MAX_FRAME_BYTES:
+        raise ValueError(f"trame de {size} octets")
+    return await reader.readexactly(size)
+
+
+class FrameBus:
+    """Publication / reception de trames entre les workers de la machine."""
+
+    def __init__(self):
+        self.path: Optional[str] = None
+        self.role: Optional[str] = None  # "hub" (relais) ou "peer"
+        self._handler: Optional[FrameHandler] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock_fd: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._peers: set[asyncio.StreamWriter] = set()  # Relais : workers connectes
+        self._peer_tasks: set[asyncio.Task] = set()
+        self._hub: Optional[asyncio.StreamWriter] = None  # Pair : connexion au relais
+        self.published = 0
+        self.received = 0
+        self.dropped_peers = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self, path: str, handler: FrameHandler):
+        if self.running:
+            return
+        self.path = path
+        self._handler = handler
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close_hub_role()
+        if self._hub is not None:
+            self._hub.close()
+            self._hub = None
+        self.role = None
+
+    # === Publication ===
+
+    def publish(self, payload: bytes):
+        """Envoie une trame aux autres workers (sans attendre : jamais bloquant)."""
+        if self.role is None:
+            return
+        frame = _pack(payload)
+        if self.role == "hub":
+            self._relay(frame, exclude=None)
+        elif self._hub is not None:
+            self._write(self._hub, frame)
+        self.published += 1
+        BUS_FRAMES.inc(direction="published")
+
+    def _relay(self, frame: bytes, exclude: Optional[asyncio.StreamWriter]):
+        for writer in list(self._peers):
+            if writer is not exclude and not self._write(writer, frame):
+                self._peers.discard(writer)
+
+    def _write(self, writer: asyncio.StreamWriter, frame: bytes) -> bool:
+        if writer.is_closing():
+            return False
+        if writer.transport.get_write_buffer_size() > MAX_PEER_BUFFER:
+            logger.warning("Bus hardware: pair trop lent, deconnecte")
+            self.dropped_peers += 1
+            BUS_FRAMES.inc(direction="dropped")
+            writer.close()
+            return False
+        writer.write(frame)
+        return True
+
+    async def _deliver(self, payload: bytes):
+        self.received += 1
+        BUS_FRAMES.inc(direction="received")
+        try:
+            await self._handler(payload)
+        except Exception as e:
+            logger.warning("Bus hardware: trame ignoree: %s", e)
+
+    # === Topologie ===
+
+    async def _run(self):
+        while True:
+            if self._try_lock():
+                await self._serve()
+                return  # Le relais reste en place jusqu'a stop()
+            try:
+                reader, self._hub = await asyncio.open_unix_connection(self.path)
+            except OSError:
+                # Relais en cours de demarrage ou mort (son verrou va se liberer)
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+            self.role = "peer"
+            logger.info("Bus hardware: connecte au relais %s", self.path)
+            try:
+                while True:
+                    await self._deliver(await _read_frame(reader))
+            except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+                logger.info("Bus hardware: relais perdu (%s), reconnexion", type(e).__name__)
+            finally:
+                self.role = None
+                self._hub.close()
+                self._hub = None
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    def _try_lock(self) -> bool:
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    async def _serve(self):
+        # Verrou tenu : un socket present est celui d'un relais mort
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self._server = await asyncio.start_unix_server(self._serve_peer, path=self.path)
+        self.role = "hub"
+        logger.info("Bus hardware: relais sur %s", self.path)
+
+    async def _serve_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._peers.add(writer)
+        self._peer_tasks.add(asyncio.current_task())
+        try:
+            while True:
+                payload = await _read_frame(reader)
+                self._relay(_pack(payload), exclude=writer)
+                await self._deliver(payload)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self._peers.discard(writer)
+            self._peer_tasks.discard(asyncio.current_task())
+            writer.close()
+
+    async def _close_hub_role(self):
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._peers):
+                writer.close()
+            # Les lectures en cours se terminent sur EOF
+            await asyncio.gather(*self._peer_tasks, return_exceptions=True)
+            self._peers.clear()
+            await self._server.wait_closed()
+            self._server = None
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # Libere le flock : un autre worker reprend le relais
+            self._lock_fd = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.path is not None,
+            "role": self.role,
+            "peers": len(self._peers),
+            "published": self.published,
+            "received": self.received,
+            "dropped_peers": self.dropped_peers,
+        }
+
+
+# Instance globale (demarree dans le lifespan si HW_BUS_PATH est defini)
+hardware_bus = FrameBus()
@@ -0,0 +1,126 @@
+"""
+Compression par bande morte (deadband) des snapshots hardware.
+
+Mode optionnel (`HW_DEADBAND=true`) : une ligne n'est ecrite que si au moins une
+metrique s'est eloignee de la derniere valeur ecrite de plus de sa tolerance, ou
+si `HW_DEADBAND_MAX_GAP` secondes se sont ecoulees depuis la derniere ecriture.
+Les extremes (`*_max`, `*_min`) sont compares comme les moyennes : un pic dans
+la fenetre force toujours l'ecriture.
+
+Les lecteurs reconstruisent une serie en escalier (`expand_steps`) : chaque
+ligne est repetee toutes les SNAPSHOT_INTERVAL secondes jusqu'a la suivante,
+sans depasser max_gap (au-dela = agent deconnecte, trou conserve).
+"""
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+# Tolerances par colonne de HardwareSnapshot (unite de la colonne)
+DEFAULT_TOLERANCES: dict[str, float] = {
+    "cpu_usage": 5.0,
+    "cpu_usage_min": 5.0,
+    "cpu_usage_max": 10.0,
+    "cpu_temp": 2.0,
+    "cpu_temp_max": 3.0,
+    "ram_used_percent": 2.0,
+    "ram_used_percent_max": 3.0,
+    "ram_used_gb": 0.5,
+    "gpu_usage": 5.0,
+    "gpu_usage_max": 10.0,
+    "gpu_temp": 2.0,
+    "gpu_temp_max": 3.0,
+    "gpu_vram_used": 256.0,
+    "net_download": 2.0,
+    "net_download_max": 10.0,
+    "net_upload": 2.0,
+    "net_upload_max": 10.0,
+    "storage_percent": 1.0,  # Par disque (cle `device`)
+}
+
+
+def _moved(new: Any, old: Any, tolerance: float) -> bool:
+    if new is None or old is None:
+        return (new is None) != (old is None)
+    return abs(new - old) > tolerance
+
+
+def _storage_percents(storage: Any) -> dict[str, Any]:
+    if not isinstance(storage, list):
+        return {}
+    return {d.get("device"): d.get("percent") for d in storage if isinstance(d, dict)}
+
+
+class Deadband:
+    """Decide si un snapshot apporte assez de nouveau pour etre ecrit."""
+
+    def __init__(self, tolerances: Optional[dict[str, float]] = None, max_gap: float = 900.0):
+        self.tolerances = {**DEFAULT_TOLERANCES, **(tolerances or {})}
+        self.max_gap = max_gap
+        self._last: Optional[dict[str, Any]] = None
+        self._last_storage: dict[str, Any] = {}
+        self._last_at: Optional[datetime] = None
+
+    def reset(self):
+        """Oublie la reference (nouvelle session agent : premiere ligne toujours ecrite)."""
+        self._last = None
+        self._last_storage = {}
+        self._last_at = None
+
+    def offer(self, values: dict[str, Any], storage: Any, at: datetime) -> bool:
+        """True si la ligne doit etre ecrite (et devient alors la nouvelle reference)."""
+        storage_percents = _storage_percents(storage)
+        if not self._changed(values, storage_percents, at):
+            return False
+        self._last = {column: values.get(column) for column in self.tolerances}
+        self._last_storage = storage_percents
+        self._last_at = at
+        return True
+
+    def _changed(self, values: dict[str, Any], storage: dict[str, Any], at: datetime) -> bool:
+        if self._last is None or self._last_at is None:
+            return True
+        if (at - self._last_at).total_seconds() >= self.max_gap:
+            return True
+        for column, tolerance in self.tolerances.items():
+            if column != "storage_percent" and _moved(values.get(column), self._last.get(column), tolerance):
+                return True
+        if storage.keys() != self._last_storage.keys():
+            return True
+        tolerance = self.tolerances.get("storage_percent", 0.0)
+        return any(_moved(p, self._last_storage.get(dev), tolerance) for dev, p in storage.items())
+
+
+def expand_steps(
+    rows: list[dict],
+    since: datetime,
+    until: datetime,
+    interval: float,
+    max_gap: float,
+) -> list[dict]:
+    """
+    Reconstruit la serie a pas regulier a partir des lignes compressees.
+    `rows` : dicts `to_dict()` tries par `recorded_at`, y compris la derniere
+    ligne anterieure a `since` (pour l'etat initial). Retourne les points >= since.
+    """
+    step = timedelta(seconds=interval)
+    out: list[dict] = []
+    for i, row in enumerate(rows):
+        start = datetime.fromisoformat(row["recorded_at"])
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=since.tzinfo)
+        end = start + timedelta(seconds=max_gap)
+        if i + 1 < len(rows):
+            nxt = datetime.fromisoformat(rows[i + 1]["recorded_at"])
+            if nxt.tzinfo is None:
+                nxt = nxt.replace(tzinfo=since.tzinfo)
+            end = min(end, nxt)
+        else:
+            end = min(end, until)
+
+        t = start
+        while True:
+            if t >= since:
+                out.append(row if t == start else {**row, "recorded_at": t.isoformat()})
+            t += step
+            if t >= end:
+                break
+    return out
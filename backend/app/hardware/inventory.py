@@ -0,0 +1,88 @@
+"""
+Inventaire materiel statique de l'agent (nom CPU, coeurs, RAM totale, GPU, disques...).
+
+L'agent l'envoie a la connexion et a chaque changement :
+    {"type": "inventory", "hash": "...", "data": {...}}
+Les trames de telemetrie ne portent ensuite que les valeurs dynamiques ; le
+serveur re-fusionne l'inventaire de la session pour que les clients WS et
+l'API REST gardent exactement la meme forme de donnees.
+
+La liste des champs statiques doit rester alignee avec hw-agent/agent.py.
+"""
+import hashlib
+import json
+from typing import Any, Optional
+
+# Champs statiques par section (dicts)
+STATIC_FIELDS: dict[str, tuple[str, ...]] = {
+    "cpu": ("name", "cores", "physical_cores", "frequency_max"),
+    "ram": ("total_gb",),
+    "gpu": ("name", "memory_total"),
+}
+# Champs statiques de premier niveau
+STATIC_TOP: tuple[str, ...] = ("os", "hostname")
+# Disques : cle + champs statiques par disque
+STORAGE_KEY = "device"
+STORAGE_STATIC: tuple[str, ...] = ("name", "mountpoint", "fstype", "total_gb")
+
+
+def inventory_hash(inventory: dict) -> str:
+    """Empreinte stable de l'inventaire (cle de dedup en DB)."""
+    canonical = json.dumps(inventory, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+def extract_inventory(payload: dict) -> dict:
+    """Extrait la partie statique d'une trame complete (agent ancien, backfill)."""
+    inventory: dict[str, Any] = {k: payload[k] for k in STATIC_TOP if payload.get(k) is not None}
+    for section, fields in STATIC_FIELDS.items():
+        data = payload.get(section)
+        if isinstance(data, dict):
+            static = {k: data[k] for k in fields if k in data}
+            if static:
+                inventory[section] = static
+    storage = payload.get("storage")
+    if isinstance(storage, list):
+        inventory["storage"] = [
+            {STORAGE_KEY: disk.get(STORAGE_KEY), **{k: disk[k] for k in STORAGE_STATIC if k in disk}}
+            for disk in storage if isinstance(disk, dict)
+        ]
+    return inventory
+
+
+def strip_inventory(payload: dict) -> dict:
+    """Retire les champs statiques d'une trame (ce qui reste = telemetrie)."""
+    data = {k: v for k, v in payload.items() if k not in STATIC_TOP}
+    for section, fields in STATIC_FIELDS.items():
+        if isinstance(data.get(section), dict):
+            data[section] = {k: v for k, v in data[section].items() if k not in fields}
+    if isinstance(data.get("storage"), list):
+        data["storage"] = [
+            {k: v for k, v in disk.items() if k not in STORAGE_STATIC} if isinstance(disk, dict) else disk
+            for disk in data["storage"]
+        ]
+    return data
+
+
+def merge_inventory(payload: dict, inventory: Optional[dict]) -> dict:
+    """
+    Re-injecte l'inventaire dans une trame de telemetrie.
+    Les valeurs presentes dans la trame l'emportent (agent ancien = trame complete).
+    """
+    if not inventory:
+        return payload
+    data = dict(payload)
+    for key in STATIC_TOP:
+        if data.get(key) in (None, "") and key in inventory:
+            data[key] = inventory[key]
+    for section in STATIC_FIELDS:
+        static = inventory.get(section)
+        if isinstance(static, dict) and isinstance(data.get(section), dict):
+            data[section] = {**static, **data[section]}
+    disks = {d.get(STORAGE_KEY): d for d in inventory.get("storage") or [] if isinstance(d, dict)}
+    if disks and isinstance(data.get("storage"), list):
+        data["storage"] = [
+            {**disks.get(disk.get(STORAGE_KEY), {}), **disk} if isinstance(disk, dict) else disk
+            for disk in data["storage"]
+        ]
+    return data
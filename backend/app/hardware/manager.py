@@ -1,18 +1,41 @@
 """
 Gestionnaire de connexions hardware WebSocket.
 Gere les connexions des agents hardware et la diffusion aux clients.
-Persiste un snapshot en DB toutes les SNAPSHOT_INTERVAL secondes.
+Persiste un snapshot en DB toutes les SNAPSHOT_INTERVAL secondes : moyenne/min/max
+de tous les echantillons de la fenetre, pas un point pris au hasard.
+Evalue les regles d'alerte hardware a chaque echantillon.
+L'inventaire statique de l'agent est recu a part et re-fusionne dans chaque trame.
+Avec plusieurs workers, l'etat est partage par le bus de trames (cf bus.py) :
+le worker de l'agent publie, tous diffusent a leurs clients.
 """
+import base64
+import binascii
+import json
 import logging
+import time
+import zlib
 from typing import Dict, Optional
 from datetime import datetime, timezone
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, replace
 from fastapi import WebSocket
+from sqlalchemy import select
 import asyncio
 
+from app.config import get_settings
 from app.db.database import async_session
-from app.db.models import HardwareSnapshot
-from app.notifications import notify_agent_disconnect, notify_agent_reconnect
+from app.db.models import HardwareSnapshot, HardwareInventory, HardwareDiskSample, HardwareDiskTemp
+from app.hardware.alerts import AlertEngine, AlertEvent
+from app.hardware.bus import FrameBus
+from app.hardware.deadband import Deadband
+from app.hardware.stats import RunningStats
+from app.hardware.inventory import (
+    extract_inventory, inventory_hash, merge_inventory, strip_inventory,
+)
+from app.metrics import metrics
+from app.notifications import (
+    notify_agent_disconnect, notify_agent_reconnect,
+    notify_hardware_alert, notify_hardware_alert_resolved,
+)
 
 logger = logging.getLogger("dashboard.hardware")
 
@@ -21,6 +44,52 @@ logger = logging.getLogger("dashboard.hardware")
 # 60s = 1440 lignes/jour, raisonnable pour des charts sur 7-30 jours.
 SNAPSHOT_INTERVAL = 60
 
+# Metriques agregees sur chaque fenetre de persistance :
+# colonne (= moyenne) -> (section, champ du payload, colonnes d'extremes "<colonne>_min/_max")
+AGGREGATED_METRICS: dict[str, tuple[str, str, tuple[str, ...]]] = {
+    "cpu_usage": ("cpu", "usage", ("min", "max")),
+    "cpu_temp": ("cpu", "temp", ("max",)),
+    "ram_used_percent": ("ram", "used_percent", ("max",)),
+    "ram_used_gb": ("ram", "used_gb", ()),
+    "gpu_usage": ("gpu", "usage", ("max",)),
+    "gpu_temp": ("gpu", "temp", ("max",)),
+    "gpu_vram_used": ("gpu", "memory_used", ()),
+    "net_download": ("network", "download_speed", ("max",)),
+    "net_upload": ("network", "upload_speed", ("max",)),
+}
+
+WS_RECEIVE_SECONDS = metrics.histogram("ws_receive_seconds", "Traitement d'une trame agent (diffusion et persistance incluses)")
+WS_BROADCAST_SECONDS = metrics.histogram("ws_broadcast_seconds", "Diffusion d'une trame a tous les clients web")
+WS_SEND_SECONDS = metrics.histogram("ws_client_send_seconds", "Envoi d'une trame a un client web")
+
+# Sections selectionnables par les clients web (message "subscribe").
+# `cpu_cores` = charge par coeur (cpu.core_usage), separable du reste du CPU.
+# Les champs systeme (os, uptime, hostname, timestamp, agent_connected) sont toujours envoyes.
+SECTIONS = frozenset({
+    "cpu", "cpu_cores", "ram", "gpu", "storage", "disk_temps", "network", "processes",
+})
+MAX_CLIENT_INTERVAL = 300.0
+
+# Sans trame du bus pendant ce delai (plusieurs intervalles agent), l'agent distant
+# est considere perdu : worker de l'agent ou relais mort sans trame de deconnexion
+REMOTE_AGENT_TIMEOUT = 15.0
+
+# Champs de trame gardes en memoire (health) mais pas dans raw_data des snapshots
+UNPERSISTED_KEYS = frozenset({"diagnostics"})
+
+# Rejeu du tampon hors connexion de l'agent : taille max d'un lot decompresse
+MAX_BACKFILL_BYTES = 16 * 1024 * 1024
+
+
+@dataclass
+class ClientSubscription:
+    """Abonnement d'un client web : sections voulues + intervalle minimal entre deux envois."""
+    sections: frozenset = SECTIONS
+    min_interval: float = 0.0
+    last_sent: float = 0.0  # time.monotonic()
+    pending: bool = False  # Donnees plus recentes que le dernier envoi (client throttle)
+    flush_task: Optional[asyncio.Task] = None
+
 
 @dataclass
 class HardwareData:
@@ -31,6 +100,9 @@ class HardwareData:
     storage: list = field(default_factory=list)
     network: dict = field(default_factory=dict)
     processes: list = field(default_factory=list)
+    processes_by_cpu: list = field(default_factory=list)
+    disk_temps: list = field(default_factory=list)
+    diagnostics: dict = field(default_factory=dict)  # Cout de l'agent (health), non diffuse
     os: str = ""
     uptime: str = ""
     hostname: str = ""
@@ -46,21 +118,42 @@ class HardwareManager:
     - Diffuse aux clients web connectes
     - Maintient un cache des dernieres donnees
     - Persiste un snapshot en DB toutes les SNAPSHOT_INTERVAL secondes
+    - Evalue les regles d'alerte (fenetres glissantes en memoire)
     """
 
     def __init__(self):
         self.agent_ws: Optional[WebSocket] = None
         self.agent_token: Optional[str] = None
         self.clients: Dict[str, WebSocket] = {}
-        self.latest_data: HardwareData = HardwareData()
+        self.subscriptions: Dict[str, ClientSubscription] = {}
+        # Trames clients encodees pour latest_data, par combinaison de sections
+        # (videes a chaque remplacement de latest_data)
+        self._frames: Dict[frozenset, str] = {}
+        self.latest_data = HardwareData()
         self._lock = asyncio.Lock()
         self._last_persist: Optional[datetime] = None
+        self._window: Dict[str, RunningStats] = {}  # Agregats de la fenetre de persistance en cours
         self._disconnect_notified: bool = False
         self._disconnect_checker: Optional[asyncio.Task] = None
+        settings = get_settings()
+        self.alerts = AlertEngine.from_config(settings.hw_alert_rules)
+        # Compression optionnelle : n'ecrire que les snapshots qui apportent du nouveau
+        self.deadband: Optional[Deadband] = (
+            Deadband(settings.hw_deadband_tolerances, settings.hw_deadband_max_gap)
+            if settings.hw_deadband else None
+        )
+        # Inventaire statique de la session agent en cours (+ cache hash -> id DB)
+        self.inventory: Optional[dict] = None
+        self.inventory_hash: Optional[str] = None
+        self._inventory_ids: Dict[str, int] = {}
+        # Bus inter-workers (None = worker unique) ; agent connecte a un autre worker
+        self.bus: Optional[FrameBus] = None
+        self.remote_agent: bool = False
+        self._remote_seen: float = 0.0  # time.monotonic() de la derniere trame du bus
+        self._remote_watch: Optional[asyncio.Task] = None
 
     async def connect_agent(self, websocket: WebSocket, token: str) -> bool:
         """Connecte l'agent hardware."""
-        from app.config import get_settings
         settings = get_settings()
 
         if token != settings.hw_agent_token:
@@ -76,27 +169,35 @@ class HardwareManager:
             await websocket.accept()
             self.agent_ws = websocket
             self.agent_token = token
-            self.latest_data.agent_connected = True
+            self.remote_agent = False
+            self.latest_data = replace(self.latest_data, agent_connected=True)
             self._last_persist = None  # Reset: persist immediately on new agent
+            self._window = {}
+            if self.deadband is not None:
+                self.deadband.reset()
+            self.inventory = None  # Renvoye par l'agent en debut de session
+            self.inventory_hash = None
 
             # Cancel le checker de deconnexion et notifier la reconnexion
             if self._disconnect_checker and not self._disconnect_checker.done():
                 self._disconnect_checker.cancel()
             if self._disconnect_notified:
                 self._disconnect_notified = False
-                asyncio.create_task(notify_agent_reconnect())
+                await notify_agent_reconnect()  # Mise en file uniquement
 
             logger.info("Agent connecte")
-            return True
+        self._publish()
+        return True
 
     async def disconnect_agent(self):
         """Deconnecte l'agent hardware."""
         async with self._lock:
             self.agent_ws = None
             self.agent_token = None
-            self.latest_data.agent_connected = False
+            self.latest_data = replace(self.latest_data, agent_connected=False)
             self._last_persist = None
             logger.info("Agent deconnecte")
+        self._publish()
 
         # Lancer un timer: si pas reconnecte dans 5 min, notifier
         self._disconnect_checker = asyncio.create_task(self._check_disconnect_timeout())
@@ -116,11 +217,13 @@ class HardwareManager:
         await websocket.accept()
         async with self._lock:
             self.clients[client_id] = websocket
+            self.subscriptions[client_id] = ClientSubscription()
             logger.debug("Client connecte: %s", client_id)
 
             if self.latest_data.timestamp:
                 try:
-                    await websocket.send_json(self._format_data())
+                    await websocket.send_text(self._frame(SECTIONS))
+                    self.subscriptions[client_id].last_sent = time.monotonic()
                 except:
                     pass
 
@@ -130,10 +233,96 @@ class HardwareManager:
             if client_id in self.clients:
                 del self.clients[client_id]
                 logger.debug("Client deconnecte: %s", client_id)
+            sub = self.subscriptions.pop(client_id, None)
+            if sub and sub.flush_task and not sub.flush_task.done():
+                sub.flush_task.cancel()
+
+    async def subscribe(self, client_id: str, sections: Optional[list] = None,
+                        min_interval: float = 0.0) -> Optional[dict]:
+        """
+        Met a jour l'abonnement d'un client.
+        Sections inconnues ignorees ; liste absente = toutes les sections.
+        Envoie immediatement une trame a jour avec le nouveau filtre.
+        """
+        sub = self.subscriptions.get(client_id)
+        if sub is None:
+            return None
+
+        if sections is None:
+            sub.sections = SECTIONS
+        else:
+            sub.sections = frozenset(str(s) for s in sections) & SECTIONS
+        try:
+            interval = float(min_interval or 0)
+        except (TypeError, ValueError):
+            interval = 0.0
+        sub.min_interval = min(max(interval, 0.0), MAX_CLIENT_INTERVAL)
+
+        # Nouveau filtre : envoyer tout de suite (ex: onglet qui redevient visible)
+        sub.last_sent = 0.0
+        if self.latest_data.timestamp:
+            await self._send_to_client(client_id)
+
+        return {"sections": sorted(sub.sections), "min_interval": sub.min_interval}
+
+    async def receive_inventory(self, message: dict) -> Optional[str]:
+        """Enregistre l'inventaire statique de la session agent. Retourne son hash."""
+        inventory = message.get("data")
+        if not isinstance(inventory, dict):
+            logger.warning("Inventaire agent invalide, ignore")
+            return None
+        digest = inventory_hash(inventory)
+        if digest != self.inventory_hash:
+            logger.info("Inventaire agent: %s (%s)", inventory.get("hostname"), digest[:12])
+        self.inventory = inventory
+        self.inventory_hash = digest
+        await self._store_inventory(inventory, digest)
+        return digest
+
+    async def _store_inventory(self, inventory: dict, digest: str) -> Optional[int]:
+        """Insere l'inventaire s'il est nouveau (dedup par hash), sinon rafraichit last_seen."""
+        try:
+            async with async_session() as session:
+                row = (await session.execute(
+                    select(HardwareInventory).where(HardwareInventory.hash == digest)
+                )).scalar_one_or_none()
+                if row is None:
+                    row = HardwareInventory(
+                        hash=digest,
+                        hostname=inventory.get("hostname"),
+                        cpu_name=(inventory.get("cpu") or {}).get("name"),
+                        gpu_name=(inventory.get("gpu") or {}).get("name"),
+                        data=inventory,
+                    )
+                    session.add(row)
+                else:
+                    row.last_seen = datetime.now(timezone.utc)
+                await session.commit()
+                self._inventory_ids[digest] = row.id
+                return row.id
+        except Exception as e:
+            logger.warning("Failed to persist hardware inventory: %s", e, exc_info=True)
+            return None
+
+    async def _resolve_inventory_id(self, inventory: Optional[dict]) -> Optional[int]:
+        """Id DB d'un inventaire (cache memoire, une requete par configuration au plus)."""
+        if not inventory:
+            return None
+        digest = self.inventory_hash if inventory is self.inventory else inventory_hash(inventory)
+        if digest in self._inventory_ids:
+            return self._inventory_ids[digest]
+        return await self._store_inventory(inventory, digest)
 
     async def receive_data(self, data: dict):
         """Recoit des donnees de l'agent, les diffuse aux clients, et persiste periodiquement."""
+        with WS_RECEIVE_SECONDS.time():
+            await self._receive_data(data)
+
+    async def _receive_data(self, data: dict):
         should_persist = False
+        aggregates: Dict[str, RunningStats] = {}
+        # Trame de telemetrie seule : on re-injecte l'inventaire de la session
+        data = merge_inventory(data, self.inventory)
 
         async with self._lock:
             self.latest_data = HardwareData(
@@ -143,6 +332,9 @@ class HardwareManager:
                 storage=data.get("storage", []),
                 network=data.get("network", {}),
                 processes=data.get("processes", []),
+                processes_by_cpu=data.get("processes_by_cpu", []),
+                disk_temps=data.get("disk_temps", []),
+                diagnostics=data.get("diagnostics") or {},
                 os=data.get("os", ""),
                 uptime=data.get("uptime", ""),
                 hostname=data.get("hostname", ""),
@@ -150,42 +342,275 @@ class HardwareManager:
                 agent_connected=True,
             )
 
+            self._accumulate(data)
+
             # Check persist eligibility inside the lock to avoid race conditions
             now = datetime.now(timezone.utc)
             if not self._last_persist or (now - self._last_persist).total_seconds() >= SNAPSHOT_INTERVAL:
                 should_persist = True
                 self._last_persist = now  # Claim the slot immediately
+                aggregates, self._window = self._window, {}
 
+        await self._dispatch_alerts(self.alerts.evaluate(data))
+
+        self._publish()
         await self.broadcast()
 
         if should_persist:
-            await self._persist_snapshot(data, now)
+            await self._persist_snapshot(data, now, aggregates)
+
+    @property
+    def latest_data(self) -> HardwareData:
+        return self._latest
+
+    @latest_data.setter
+    def latest_data(self, data: HardwareData):
+        """Remplacer l'etat (jamais le modifier en place) invalide les trames encodees."""
+        self._latest = data
+        self._frames = {}
+
+    def _frame(self, sections: frozenset) -> str:
+        """Trame client pour ces sections, encodee une fois par etat."""
+        frame = self._frames.get(sections)
+        if frame is None:
+            frame = self._frames[sections] = json.dumps(self._format_data(sections))
+        return frame
+
+    def _publish(self):
+        """
+        Partage l'etat courant avec les autres workers. La charge utile est la trame
+        client complete deja encodee, relayee telle quelle aux clients des autres
+        workers, suivie (apres un saut de ligne) des champs non diffuses.
+        """
+        if self.bus is not None:
+            extras = json.dumps({"diagnostics": self.latest_data.diagnostics})
+            self.bus.publish(f"{self._frame(SECTIONS)}\n{extras}".encode())
+
+    async def receive_remote(self, payload: bytes):
+        """
+        Etat publie par le worker de l'agent : diffuse aux clients de ce worker.
+        La trame complete est reprise telle quelle ; seuls les abonnements partiels
+        sont re-encodes. Ni persistance ni alertes ici, le worker de l'agent s'en charge.
+        """
+        if self.agent_ws is not None:
+            return  # L'agent est ici : l'etat local fait foi
+        frame, _, extras = payload.decode().partition("\n")
+        data = json.loads(frame)
+        hidden = json.loads(extras) if extras else {}
+        known = {f.name for f in fields(HardwareData)}
+        async with self._lock:
+            self.latest_data = HardwareData(**{k: v for k, v in {**data, **hidden}.items() if k in known})
+            self._frames[SECTIONS] = frame  # Relayee telle quelle aux abonnements complets
+            self.remote_agent = self.latest_data.agent_connected
+            self._remote_seen = time.monotonic()
+        if self.remote_agent and (self._remote_watch is None or self._remote_watch.done()):
+            self._remote_watch = asyncio.create_task(self._expire_remote())
+        await self.broadcast()
+
+    async def _expire_remote(self):
+        """Oublie l'agent distant si le bus se tait plus de REMOTE_AGENT_TIMEOUT secondes."""
+        while self.remote_agent:
+            remaining = self._remote_seen + REMOTE_AGENT_TIMEOUT - time.monotonic()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+                continue
+            async with self._lock:
+                self.remote_agent = False
+                self.latest_data = HardwareData()
+            logger.warning("Agent distant sans nouvelles depuis %.0fs, considere deconnecte", REMOTE_AGENT_TIMEOUT)
+            await self.broadcast()
+
+    def _accumulate(self, data: dict):
+        """Ajoute l'echantillon aux agregats de la fenetre (O(1) par metrique)."""
+        for column, (section, name, _) in AGGREGATED_METRICS.items():
+            values = data.get(section)
+            if not isinstance(values, dict):
+                continue
+            value = values.get(name)
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            lo, hi = values.get(f"{name}_min"), values.get(f"{name}_max")
+            stats = self._window.get(column)
+            if stats is None:
+                stats = self._window[column] = RunningStats()
+            stats.update(
+                value,
+                lo if isinstance(lo, (int, float)) else None,
+                hi if isinstance(hi, (int, float)) else None,
+            )
 
-    async def _persist_snapshot(self, data: dict, recorded_at: datetime):
+    async def _dispatch_alerts(self, events: list[AlertEvent]):
+        """Envoie les transitions d'alerte (mise en file Discord, sans attente reseau)."""
+        for ev in events:
+            if ev.resolved:
+                logger.info("Alerte resolue: %s [%s] = %.1f", ev.rule.name, ev.label, ev.value)
+                await notify_hardware_alert_resolved(ev.rule.name, ev.rule.metric, ev.label, ev.value)
+            else:
+                logger.warning("Alerte: %s [%s] = %.1f", ev.rule.name, ev.label, ev.value)
+                await notify_hardware_alert(
+                    ev.rule.name, ev.rule.metric, ev.label, ev.value, ev.rule.threshold,
+                    ping_here=ev.rule.ping_here,
+                )
+
+    async def receive_backfill(self, message: dict) -> int:
+        """
+        Ingere un lot d'echantillons pris par l'agent hors connexion.
+        Persistes avec leur horodatage d'origine (1 par SNAPSHOT_INTERVAL au plus),
+        sans toucher aux donnees live : ni broadcast, ni alertes, ni latest_data.
+        Retourne le nombre d'echantillons recus (accuse de reception).
+        """
+        samples = self._decode_backfill(message)
+        if samples is None:
+            return 0
+
+        dated = []
+        now = datetime.now(timezone.utc)
+        for sample in samples:
+            if not isinstance(sample, dict):
+                continue
+            recorded_at = self._parse_timestamp(sample.get("timestamp"))
+            if recorded_at is None or recorded_at > now:
+                continue
+            dated.append((recorded_at, sample))
+        dated.sort(key=lambda x: x[0])
+
+        snapshots = []
+        last_kept: Optional[datetime] = None
+        for recorded_at, sample in dated:
+            if last_kept and (recorded_at - last_kept).total_seconds() < SNAPSHOT_INTERVAL:
+                continue
+            inventory_id = await self._resolve_inventory_id(extract_inventory(sample) or self.inventory)
+            snapshots.append(self._build_snapshot(sample, recorded_at, inventory_id))
+            last_kept = recorded_at
+
+        if snapshots:
+            try:
+                async with async_session() as session:
+                    session.add_all(snapshots)
+                    await session.commit()
+                logger.info("Backfill agent: %d snapshot(s) persiste(s) sur %d recu(s)", len(snapshots), len(samples))
+            except Exception as e:
+                logger.warning("Failed to persist backfill: %s", e, exc_info=True)
+        return len(samples)
+
+    @staticmethod
+    def _decode_backfill(message: dict) -> Optional[list]:
+        """Decode un lot `zlib+base64` (taille decompressee bornee)."""
+        if message.get("encoding") != "zlib+base64":
+            logger.warning("Backfill: encodage non supporte %r", message.get("encoding"))
+            return None
+        try:
+            blob = base64.b64decode(message.get("data") or "", validate=True)
+            inflater = zlib.decompressobj()
+            raw = inflater.decompress(blob, MAX_BACKFILL_BYTES)
+            if inflater.unconsumed_tail:
+                logger.warning("Backfill: lot trop volumineux, ignore")
+                return None
+            samples = json.loads(raw)
+        except (binascii.Error, zlib.error, ValueError) as e:
+            logger.warning("Backfill: lot illisible: %s", e)
+            return None
+        return samples if isinstance(samples, list) else None
+
+    @staticmethod
+    def _parse_timestamp(value) -> Optional[datetime]:
+        if not isinstance(value, str):
+            return None
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+    @staticmethod
+    def _build_snapshot(
+        data: dict,
+        recorded_at: datetime,
+        inventory_id: Optional[int] = None,
+        aggregates: Optional[Dict[str, RunningStats]] = None,
+    ) -> HardwareSnapshot:
+        """
+        Construit la ligne HardwareSnapshot a partir d'un payload agent.
+        `aggregates` (fenetre de persistance) remplace les valeurs ponctuelles.
+        Les champs statiques (noms CPU/GPU, RAM totale, nom/fstype/taille des disques)
+        vivent dans hardware_inventory : ils ne sont recopies dans la ligne que si
+        l'inventaire n'a pas pu etre enregistre (`inventory_id` absent).
+        """
+        cpu = data.get("cpu") or {}
+        ram = data.get("ram") or {}
+        gpu = data.get("gpu") or {}
+        network = data.get("network") or {}
+        storage_data = data.get("storage")
+        if not isinstance(storage_data, list):
+            storage_data = []
+        telemetry = strip_inventory(data)
+        stored = telemetry if inventory_id is not None else data
+        stored_storage = stored.get("storage") if isinstance(stored.get("storage"), list) else []
+        disk_temps = data.get("disk_temps")
+        if not isinstance(disk_temps, list):
+            disk_temps = []
+
+        snapshot = HardwareSnapshot(
+            cpu_usage=cpu.get("usage"),
+            # Agent recent : usage = moyenne de la fenetre, + extremes (sinon = instantane)
+            cpu_usage_min=cpu.get("usage_min", cpu.get("usage")),
+            cpu_usage_max=cpu.get("usage_max", cpu.get("usage")),
+            cpu_temp=cpu.get("temp"),
+            cpu_temp_max=cpu.get("temp"),
+            ram_used_percent=ram.get("used_percent"),
+            ram_used_percent_max=ram.get("used_percent"),
+            ram_used_gb=ram.get("used_gb"),
+            ram_total_gb=ram.get("total_gb") if inventory_id is None else None,
+            gpu_usage=gpu.get("usage"),
+            gpu_usage_max=gpu.get("usage_max", gpu.get("usage")),
+            gpu_temp=gpu.get("temp"),
+            gpu_temp_max=gpu.get("temp_max", gpu.get("temp")),
+            gpu_vram_used=gpu.get("memory_used"),  # Agent sends "memory_used"
+            net_download=network.get("download_speed"),
+            net_download_max=network.get("download_speed_max", network.get("download_speed")),
+            net_upload=network.get("upload_speed"),
+            net_upload_max=network.get("upload_speed_max", network.get("upload_speed")),
+            storage=stored_storage,
+            # Lignes typees par disque : requetables par device sans parser le JSON
+            disks=[
+                HardwareDiskSample(
+                    device=str(d.get("device"))[:100],
+                    used_gb=d.get("used_gb"),
+                    total_gb=d.get("total_gb"),
+                    percent=d.get("percent"),
+                    recorded_at=recorded_at,
+                )
+                for d in storage_data if isinstance(d, dict) and d.get("device")
+            ],
+            disk_temps=[
+                HardwareDiskTemp(name=str(t.get("name"))[:200], temp=t.get("temp"), recorded_at=recorded_at)
+                for t in disk_temps if isinstance(t, dict) and t.get("name")
+            ],
+            raw_data={k: v for k, v in telemetry.items() if k not in UNPERSISTED_KEYS},
+            inventory_id=inventory_id,
+            recorded_at=recorded_at,
+        )
+        for column, stats in (aggregates or {}).items():
+            if not stats.count:
+                continue
+            setattr(snapshot, column, round(stats.mean, 2))
+            for extreme in AGGREGATED_METRICS[column][2]:
+                setattr(snapshot, f"{column}_{extreme}", getattr(stats, extreme))
+        return snapshot
+
+    async def _persist_snapshot(
+        self, data: dict, recorded_at: datetime, aggregates: Optional[Dict[str, RunningStats]] = None,
+    ):
         """Ecrit un snapshot en DB. Appelé seulement quand le check d'intervalle a passé."""
         try:
-            cpu = data.get("cpu") or {}
-            ram = data.get("ram") or {}
-            gpu = data.get("gpu") or {}
-            storage_data = data.get("storage")
-            if not isinstance(storage_data, list):
-                storage_data = []
-
-            snapshot = HardwareSnapshot(
-                cpu_usage=cpu.get("usage"),
-                cpu_temp=cpu.get("temp"),
-                cpu_name=cpu.get("name"),
-                ram_used_percent=ram.get("used_percent"),
-                ram_used_gb=ram.get("used_gb"),
-                ram_total_gb=ram.get("total_gb"),
-                gpu_usage=gpu.get("usage"),
-                gpu_temp=gpu.get("temp"),
-                gpu_name=gpu.get("name"),
-                gpu_vram_used=gpu.get("memory_used"),  # Agent sends "memory_used"
-                storage=storage_data,
-                raw_data=data,
-                recorded_at=recorded_at,
-            )
+            inventory_id = await self._resolve_inventory_id(self.inventory or extract_inventory(data))
+            snapshot = self._build_snapshot(data, recorded_at, inventory_id, aggregates)
+
+            if self.deadband is not None:
+                values = {c: getattr(snapshot, c, None) for c in self.deadband.tolerances}
+                if not self.deadband.offer(values, snapshot.storage, recorded_at):
+                    logger.debug("Hardware snapshot dans la bande morte, non ecrit")
+                    return
 
             async with async_session() as session:
                 session.add(snapshot)
@@ -196,38 +621,87 @@ class HardwareManager:
             logger.warning("Failed to persist hardware snapshot: %s", e, exc_info=True)
 
     async def broadcast(self):
-        """Diffuse les dernieres donnees a tous les clients."""
+        """
+        Diffuse les dernieres donnees aux clients, selon leur abonnement.
+        Chaque combinaison de sections n'est encodee qu'une fois par etat (cf _frame).
+        Les clients throttles recoivent la derniere valeur une fois leur intervalle ecoule
+        (les echantillons intermediaires sont fusionnes).
+        """
         if not self.clients:
             return
 
-        data = self._format_data()
         disconnected = []
+        now = time.monotonic()
 
-        for client_id, ws in self.clients.items():
-            try:
-                await ws.send_json(data)
-            except Exception as e:
-                logger.warning("Erreur envoi client %s: %s", client_id, e)
-                disconnected.append(client_id)
+        with WS_BROADCAST_SECONDS.time():
+            for client_id in list(self.clients):
+                sub = self.subscriptions.get(client_id)
+                if sub is not None and sub.min_interval and now - sub.last_sent < sub.min_interval:
+                    self._schedule_flush(client_id, sub, sub.min_interval - (now - sub.last_sent))
+                    continue
+                if not await self._send_to_client(client_id):
+                    disconnected.append(client_id)
 
         for client_id in disconnected:
             await self.disconnect_client(client_id)
 
-    def _format_data(self) -> dict:
-        """Formate les donnees pour l'envoi."""
-        return {
-            "cpu": self.latest_data.cpu,
-            "ram": self.latest_data.ram,
-            "gpu": self.latest_data.gpu,
-            "storage": self.latest_data.storage,
-            "network": self.latest_data.network,
-            "processes": self.latest_data.processes,
-            "os": self.latest_data.os,
-            "uptime": self.latest_data.uptime,
-            "hostname": self.latest_data.hostname,
-            "timestamp": self.latest_data.timestamp,
-            "agent_connected": self.latest_data.agent_connected,
+    async def _send_to_client(self, client_id: str) -> bool:
+        """Envoie la trame correspondant a l'abonnement du client. False si l'envoi echoue."""
+        ws = self.clients.get(client_id)
+        if ws is None:
+            return True
+        sub = self.subscriptions.get(client_id)
+        sections = sub.sections if sub is not None else SECTIONS
+
+        frame = self._frame(sections)
+        try:
+            with WS_SEND_SECONDS.time():
+                await ws.send_text(frame)
+        except Exception as e:
+            logger.warning("Erreur envoi client %s: %s", client_id, e)
+            return False
+        if sub is not None:
+            sub.last_sent = time.monotonic()
+            sub.pending = False
+        return True
+
+    def _schedule_flush(self, client_id: str, sub: ClientSubscription, delay: float):
+        """Programme l'envoi differe de la derniere valeur a un client throttle."""
+        sub.pending = True
+        if sub.flush_task is None or sub.flush_task.done():
+            sub.flush_task = asyncio.create_task(self._flush_later(client_id, delay))
+
+    async def _flush_later(self, client_id: str, delay: float):
+        try:
+            await asyncio.sleep(max(delay, 0))
+            sub = self.subscriptions.get(client_id)
+            if sub is not None and sub.pending:
+                if not await self._send_to_client(client_id):
+                    await self.disconnect_client(client_id)
+        except asyncio.CancelledError:
+            pass
+
+    def _format_data(self, sections: frozenset = SECTIONS) -> dict:
+        """Formate les donnees pour l'envoi, limitees aux sections demandees."""
+        d = self.latest_data
+        data = {
+            "os": d.os,
+            "uptime": d.uptime,
+            "hostname": d.hostname,
+            "timestamp": d.timestamp,
+            "agent_connected": d.agent_connected,
         }
+        if "cpu" in sections:
+            cpu = d.cpu or {}
+            if "cpu_cores" not in sections and "core_usage" in cpu:
+                cpu = {k: v for k, v in cpu.items() if k != "core_usage"}
+            data["cpu"] = cpu
+        for name in ("ram", "gpu", "storage", "disk_temps", "network", "processes"):
+            if name in sections:
+                data[name] = getattr(d, name)
+        if "processes" in sections:
+            data["processes_by_cpu"] = d.processes_by_cpu
+        return data
 
     def get_latest(self) -> dict:
         """Retourne les dernieres donnees (pour API REST)."""
@@ -235,9 +709,12 @@ class HardwareManager:
 
     @property
     def is_agent_connected(self) -> bool:
-        """Verifie si l'agent est connecte."""
-        return self.agent_ws is not None
+        """Verifie si l'agent est connecte (a ce worker ou, via le bus, a un autre)."""
+        return self.agent_ws is not None or self.remote_agent
 
 
 # Instance globale
 hardware_manager = HardwareManager()
+
+metrics.gauge("ws_clients", "Clients web connectes au flux hardware", fn=lambda: len(hardware_manager.clients))
+metrics.gauge("hw_agent_connected", "Agent hardware connecte (0/1)", fn=lambda: int(hardware_manager.is_agent_connected))
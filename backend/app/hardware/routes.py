@@ -2,18 +2,24 @@
 Routes pour le monitoring hardware.
 Inclut les endpoints WebSocket, REST et historique.
 """
+import json
 import logging
 from datetime import datetime, timezone, timedelta
+from typing import Optional
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, Depends
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
+from operator import itemgetter
 
-from app.hardware.manager import hardware_manager
+from app.config import get_settings
+from app.hardware.deadband import expand_steps
+from app.hardware.manager import SNAPSHOT_INTERVAL, hardware_manager
 from app.auth.jwt import get_current_user, verify_token, TokenData
+from app.db.counters import row_counters
 from app.db.database import get_db
-from app.db.models import HardwareSnapshot
+from app.db.models import HardwareSnapshot, HardwareDiskSample, HardwareDiskTemp
 
 logger = logging.getLogger("dashboard.hardware")
 router = APIRouter()
@@ -29,6 +35,14 @@ async def hardware_agent_websocket(
 
     L'agent envoie periodiquement les stats hardware.
     Authentification par token dans query string.
+
+    A la reconnexion, l'agent rejoue son tampon hors connexion :
+        {"type": "backfill", "encoding": "zlib+base64", "count": N, "data": "..."}
+    Le serveur repond {"type": "backfill_ack", "count": N} une fois le lot persiste.
+
+    Inventaire statique (a la connexion et a chaque changement materiel) :
+        {"type": "inventory", "hash": "...", "data": {"os": ..., "cpu": {"name": ...}, ...}}
+    Les trames suivantes ne portent que les valeurs dynamiques.
     """
     if not await hardware_manager.connect_agent(websocket, token):
         await websocket.close(code=4001, reason="Token invalide")
@@ -38,6 +52,13 @@ async def hardware_agent_websocket(
         while True:
             # Recevoir les donnees de l'agent
             data = await websocket.receive_json()
+            if data.get("type") == "backfill":
+                count = await hardware_manager.receive_backfill(data)
+                await websocket.send_json({"type": "backfill_ack", "count": count})
+                continue
+            if data.get("type") == "inventory":
+                await hardware_manager.receive_inventory(data)
+                continue
             await hardware_manager.receive_data(data)
 
     except WebSocketDisconnect:
@@ -57,6 +78,11 @@ async def hardware_client_websocket(
 
     Les clients recoivent les stats hardware en temps reel.
     Authentification par token JWT dans query string.
+
+    Un client peut restreindre ce qu'il recoit (onglet en arriere-plan, vue mobile) :
+        {"type": "subscribe", "sections": ["cpu", "ram"], "min_interval": 30}
+    `sections` parmi cpu, cpu_cores, ram, gpu, storage, disk_temps, network, processes
+    (absent = tout). `min_interval` en secondes (0 = cadence de l'agent).
     """
     try:
         verify_token(token)
@@ -70,11 +96,25 @@ async def hardware_client_websocket(
     try:
         while True:
             # Garder la connexion ouverte (ping/pong gere par le protocole)
-            # On peut aussi recevoir des commandes du client si necessaire
+            # et traiter les commandes d'abonnement du client
             message = await websocket.receive_text()
 
             if message == "ping":
                 await websocket.send_text("pong")
+                continue
+
+            try:
+                command = json.loads(message)
+            except ValueError:
+                continue
+            if isinstance(command, dict) and command.get("type") == "subscribe":
+                sub = await hardware_manager.subscribe(
+                    client_id,
+                    command.get("sections"),
+                    command.get("min_interval", 0),
+                )
+                if sub is not None:
+                    await websocket.send_text(json.dumps({"type": "subscribed", **sub}))
 
     except WebSocketDisconnect:
         await hardware_manager.disconnect_client(client_id)
@@ -101,6 +141,34 @@ async def get_hardware_status():
     }
 
 
+def _deadband_start(since: datetime) -> datetime:
+    """Debut de lecture : en mode deadband, inclut la derniere ligne anterieure a `since`."""
+    settings = get_settings()
+    if not settings.hw_deadband:
+        return since
+    return since - timedelta(seconds=settings.hw_deadband_max_gap)
+
+
+def _expand_series(rows: list[dict], since: datetime, until: datetime, limit: int,
+                   key: Optional[str] = None) -> list[dict]:
+    """
+    Mode deadband : escalier a pas regulier (un point par SNAPSHOT_INTERVAL), serie
+    par serie (`key` : disque, sonde), fusionne par date. Meme forme qu'en mode normal.
+    """
+    series: dict[Optional[str], list[dict]] = {}
+    for row in rows:
+        series.setdefault(row.get(key) if key else None, []).append(row)
+    max_gap = get_settings().hw_deadband_max_gap
+    points = [
+        point
+        for group in series.values()
+        for point in expand_steps(group, since, until, SNAPSHOT_INTERVAL, max_gap)
+    ]
+    if len(series) > 1:
+        points.sort(key=itemgetter("recorded_at"))
+    return points[:limit]
+
+
 @router.get("/history")
 async def get_hardware_history(
     hours: int = Query(default=24, ge=1, le=720, description="Nombre d'heures d'historique (max 30j)"),
@@ -112,17 +180,137 @@ async def get_hardware_history(
     Historique hardware depuis la DB.
     Retourne les snapshots dans l'ordre chronologique (plus ancien en premier).
     ASC order uses the recorded_at index directly.
+
+    En mode deadband, les lignes compressees sont re-echantillonnees en escalier
+    (un point par SNAPSHOT_INTERVAL) : meme forme de reponse qu'en mode normal.
     """
-    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    now = datetime.now(timezone.utc)
+    since = now - timedelta(hours=hours)
+    settings = get_settings()
+    if not settings.hw_deadband:
+        query = (
+            select(HardwareSnapshot)
+            .where(HardwareSnapshot.recorded_at >= since)
+            .order_by(HardwareSnapshot.recorded_at.asc())
+            .limit(limit)
+        )
+        result = await db.execute(query)
+        snapshots = result.scalars().all()
+        return [s.to_dict() for s in snapshots]
+
+    # Inclut la derniere ligne anterieure a `since` (etat initial de l'escalier)
     query = (
         select(HardwareSnapshot)
-        .where(HardwareSnapshot.recorded_at >= since)
+        .where(HardwareSnapshot.recorded_at >= _deadband_start(since))
         .order_by(HardwareSnapshot.recorded_at.asc())
-        .limit(limit)
     )
-    result = await db.execute(query)
-    snapshots = result.scalars().all()
-    return [s.to_dict() for s in snapshots]
+    rows = [s.to_dict() for s in (await db.execute(query)).scalars().all()]
+    return _expand_series(rows, since, now, limit)
+
+
+@router.get("/history/devices")
+async def get_hardware_history_devices(
+    hours: int = Query(default=24, ge=1, le=720),
+    user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Disques et sondes de temperature presents dans l'historique (pour les selecteurs)."""
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    disks = await db.execute(
+        select(HardwareDiskSample.device).where(HardwareDiskSample.recorded_at >= since).distinct()
+    )
+    temps = await db.execute(
+        select(HardwareDiskTemp.name).where(HardwareDiskTemp.recorded_at >= since).distinct()
+    )
+    return {
+        "disks": sorted(disks.scalars().all()),
+        "disk_temps": sorted(temps.scalars().all()),
+    }
+
+
+@router.get("/history/disks")
+async def get_hardware_disk_history(
+    device: Optional[str] = Query(default=None, description="Filtre sur un disque (ex: C:, /dev/sda1)"),
+    hours: int = Query(default=24, ge=1, le=720),
+    limit: int = Query(default=5000, ge=1, le=20000),
+    user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Historique d'usage par disque (index device + date). Escalier par disque en mode deadband."""
+    now = datetime.now(timezone.utc)
+    since = now - timedelta(hours=hours)
+    deadband = get_settings().hw_deadband
+    query = select(HardwareDiskSample).where(HardwareDiskSample.recorded_at >= _deadband_start(since))
+    if device:
+        query = query.where(HardwareDiskSample.device == device)
+    query = query.order_by(HardwareDiskSample.recorded_at.asc())
+    if not deadband:
+        query = query.limit(limit)
+    rows = [r.to_dict() for r in (await db.execute(query)).scalars().all()]
+    return _expand_series(rows, since, now, limit, key="device") if deadband else rows
+
+
+@router.get("/history/disk-temps")
+async def get_hardware_disk_temp_history(
+    name: Optional[str] = Query(default=None, description="Filtre sur une sonde (nom du disque)"),
+    hours: int = Query(default=24, ge=1, le=720),
+    limit: int = Query(default=5000, ge=1, le=20000),
+    user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Historique des temperatures disques (index nom + date). Escalier par sonde en mode deadband."""
+    now = datetime.now(timezone.utc)
+    since = now - timedelta(hours=hours)
+    deadband = get_settings().hw_deadband
+    query = select(HardwareDiskTemp).where(HardwareDiskTemp.recorded_at >= _deadband_start(since))
+    if name:
+        query = query.where(HardwareDiskTemp.name == name)
+    query = query.order_by(HardwareDiskTemp.recorded_at.asc())
+    if not deadband:
+        query = query.limit(limit)
+    rows = [r.to_dict() for r in (await db.execute(query)).scalars().all()]
+    return _expand_series(rows, since, now, limit, key="name") if deadband else rows
+
+
+@router.get("/history/network")
+async def get_hardware_network_history(
+    hours: int = Query(default=24, ge=1, le=720),
+    limit: int = Query(default=5000, ge=1, le=20000),
+    user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Debits reseau (Mbps) : colonnes typees uniquement, sans charger raw_data ni storage.
+    Escalier a pas regulier en mode deadband, comme /history.
+    """
+    now = datetime.now(timezone.utc)
+    since = now - timedelta(hours=hours)
+    deadband = get_settings().hw_deadband
+    query = (
+        select(
+            HardwareSnapshot.recorded_at,
+            HardwareSnapshot.net_download,
+            HardwareSnapshot.net_download_max,
+            HardwareSnapshot.net_upload,
+            HardwareSnapshot.net_upload_max,
+        )
+        .where(HardwareSnapshot.recorded_at >= _deadband_start(since))
+        .order_by(HardwareSnapshot.recorded_at.asc())
+    )
+    if not deadband:
+        query = query.limit(limit)
+    rows = (await db.execute(query)).all()
+    points = [
+        {
+            "recorded_at": r.recorded_at.isoformat(),
+            "download_speed": r.net_download,
+            "download_speed_max": r.net_download_max,
+            "upload_speed": r.net_upload,
+            "upload_speed_max": r.net_upload_max,
+        }
+        for r in rows
+    ]
+    return _expand_series(points, since, now, limit) if deadband else points
 
 
 @router.get("/history/summary")
@@ -130,10 +318,16 @@ async def get_hardware_history_summary(
     user: TokenData = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Compte de snapshots et plage temporelle disponible."""
-    count = (await db.execute(select(func.count(HardwareSnapshot.id)))).scalar() or 0
+    """
+    Compte de snapshots et plage temporelle disponible.
+    Compte et date la plus recente servis par les compteurs en memoire (cf
+    db/counters.py) ; min(recorded_at) lit une extremite de l'index.
+    """
+    tables = await row_counters.ensure(db, get_settings().health_counters_resync)
+    counter = tables.get("hardware_snapshots")
+    count = counter.rows if counter else 0
+    newest = counter.last_at if counter else None
     oldest = (await db.execute(select(func.min(HardwareSnapshot.recorded_at)))).scalar()
-    newest = (await db.execute(select(func.max(HardwareSnapshot.recorded_at)))).scalar()
     return {
         "total_snapshots": count,
         "oldest_at": oldest.isoformat() if oldest else None,
@@ -0,0 +1,209 @@
+"""
+Statistiques glissantes en streaming pour les metriques hardware.
+
+Chaque structure est mise a jour en O(1) (amorti) par echantillon et ne
+relit jamais l'historique : pas de requete DB, pas de tri de fenetre.
+
+- Ewma : moyenne exponentielle ponderee par le temps
+- WindowedExtremum : min ou max glissant (deque monotone)
+- WindowedHistogram : quantiles glissants sur bins fixes
+- MetricWindow : regroupe le tout pour une metrique et une fenetre donnees
+- RunningStats : moyenne/min/max cumules sur une fenetre a bornes fixes (persistance)
+"""
+import math
+from collections import deque
+from typing import Optional
+
+
+class Ewma:
+    """Moyenne exponentielle ponderee par le temps (constante `tau` en secondes)."""
+
+    __slots__ = ("tau", "value", "_last_ts")
+
+    def __init__(self, tau: float):
+        self.tau = max(tau, 1e-6)
+        self.value: Optional[float] = None
+        self._last_ts: Optional[float] = None
+
+    def update(self, x: float, ts: float) -> float:
+        if self.value is None or self._last_ts is None:
+            self.value = x
+        else:
+            dt = max(ts - self._last_ts, 0.0)
+            alpha = 1.0 - math.exp(-dt / self.tau)
+            self.value += alpha * (x - self.value)
+        self._last_ts = ts
+        return self.value
+
+
+class WindowedExtremum:
+    """
+    Min ou max sur une fenetre temporelle glissante.
+    Deque monotone : chaque echantillon entre et sort au plus une fois.
+    """
+
+    __slots__ = ("window", "_is_max", "_q")
+
+    def __init__(self, window: float, mode: str = "max"):
+        self.window = window
+        self._is_max = mode == "max"
+        self._q: deque[tuple[float, float]] = deque()
+
+    def update(self, x: float, ts: float) -> None:
+        q = self._q
+        if self._is_max:
+            while q and q[-1][1] <= x:
+                q.pop()
+        else:
+            while q and q[-1][1] >= x:
+                q.pop()
+        q.append((ts, x))
+        self.expire(ts)
+
+    def expire(self, now: float) -> None:
+        cutoff = now - self.window
+        q = self._q
+        while q and q[0][0] < cutoff:
+            q.popleft()
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._q[0][1] if self._q else None
+
+
+class WindowedHistogram:
+    """
+    Histogramme a bins fixes sur une fenetre glissante.
+    Ajout/expiration en O(1), quantile en O(nb_bins) (constant, independant
+    du nombre d'echantillons). Precision = largeur d'un bin.
+    """
+
+    __slots__ = ("window", "lo", "hi", "width", "_counts", "_q", "_total")
+
+    def __init__(self, window: float, lo: float = 0.0, hi: float = 150.0, width: float = 0.5):
+        self.window = window
+        self.lo = lo
+        self.hi = hi
+        self.width = width
+        self._counts = [0] * (int(math.ceil((hi - lo) / width)) + 1)
+        self._q: deque[tuple[float, int]] = deque()
+        self._total = 0
+
+    def _bin(self, x: float) -> int:
+        idx = int((x - self.lo) / self.width)
+        return min(max(idx, 0), len(self._counts) - 1)
+
+    def update(self, x: float, ts: float) -> None:
+        b = self._bin(x)
+        self._counts[b] += 1
+        self._total += 1
+        self._q.append((ts, b))
+        self.expire(ts)
+
+    def expire(self, now: float) -> None:
+        cutoff = now - self.window
+        q = self._q
+        while q and q[0][0] < cutoff:
+            _, b = q.popleft()
+            self._counts[b] -= 1
+            self._total -= 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self._total == 0:
+            return None
+        rank = q * (self._total - 1)
+        seen = 0
+        for idx, count in enumerate(self._counts):
+            seen += count
+            if seen > rank:
+                # Centre du bin (borne haute pour le dernier bin, qui sature)
+                return min(self.lo + (idx + 0.5) * self.width, self.hi)
+        return self.hi
+
+
+HIST_BINS = 300
+
+
+class MetricWindow:
+    """
+    Stats glissantes d'une metrique sur une fenetre : last, ewma, avg, min, max, pXX.
+    `bounds` = (lo, hi) de l'histogramme des quantiles, decoupe en HIST_BINS bins ;
+    None = pas d'histogramme (pXX refuse).
+    """
+
+    def __init__(self, window: float, bounds: Optional[tuple[float, float]] = (0.0, 150.0)):
+        self.window = window
+        self.last: Optional[float] = None
+        self.last_ts: Optional[float] = None
+        self.ewma = Ewma(tau=max(window / 3.0, 1.0))
+        self._min = WindowedExtremum(window, "min")
+        self._max = WindowedExtremum(window, "max")
+        self._hist: Optional[WindowedHistogram] = None
+        if bounds is not None:
+            lo, hi = bounds
+            self._hist = WindowedHistogram(window, lo, hi, width=(hi - lo) / HIST_BINS)
+        self._samples: deque[tuple[float, float]] = deque()
+        self._sum = 0.0
+
+    def update(self, x: float, ts: float) -> None:
+        self.last = x
+        self.last_ts = ts
+        self.ewma.update(x, ts)
+        self._min.update(x, ts)
+        self._max.update(x, ts)
+        if self._hist is not None:
+            self._hist.update(x, ts)
+        self._samples.append((ts, x))
+        self._sum += x
+        cutoff = ts - self.window
+        while self._samples and self._samples[0][0] < cutoff:
+            self._sum -= self._samples.popleft()[1]
+
+    @property
+    def count(self) -> int:
+        return len(self._samples)
+
+    def get(self, stat: str) -> Optional[float]:
+        """Retourne la stat demandee ("last", "ewma", "avg", "min", "max", "p50", "p95"...)."""
+        if stat == "last":
+            return self.last
+        if stat == "ewma":
+            return self.ewma.value
+        if stat == "avg":
+            return self._sum / len(self._samples) if self._samples else None
+        if stat == "min":
+            return self._min.value
+        if stat == "max":
+            return self._max.value
+        if stat.startswith("p") and stat[1:].isdigit():
+            if self._hist is None:
+                raise ValueError(f"Quantile {stat} sans bornes d'histogramme")
+            return self._hist.quantile(int(stat[1:]) / 100.0)
+        raise ValueError(f"Stat inconnue: {stat}")
+
+
+class RunningStats:
+    """
+    Moyenne, min et max cumules depuis la derniere remise a zero. O(1) memoire.
+    `lo`/`hi` : extremes deja agreges en amont (ex: usage_min/usage_max de l'agent).
+    """
+
+    __slots__ = ("count", "total", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def update(self, x: float, lo: Optional[float] = None, hi: Optional[float] = None) -> None:
+        lo = x if lo is None else min(lo, x)
+        hi = x if hi is None else max(hi, x)
+        self.count += 1
+        self.total += x
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
@@ -3,20 +3,35 @@ Healthchecks reels de TrackBoard.
 
 `/health` : public, minimal (statut global + version). Compatible Docker HEALTHCHECK.
 `/health/full` : auth requise, detail composant par composant.
+`/metrics` : metriques au format Prometheus (token METRICS_TOKEN, cf app/metrics.py).
+
+Aucune sonde ne parcourt les tables : le ping DB est mis en cache quelques
+secondes (HEALTH_PROBE_TTL) et les comptes viennent de db/counters.py.
 """
+import hmac
 import logging
+import time
 from datetime import datetime, timezone, timedelta
-from typing import Optional, Any
+from typing import Awaitable, Callable, Optional, Any
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import text, select, func
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import get_settings
+from app.db.counters import row_counters
 from app.db.database import get_db
-from app.db.models import TrackerStats, HardwareSnapshot
 from app.scrapers import registry
 from app.scrapers import scheduler as scheduler_mod
+from app.scrapers.leader import scheduler_leader
+from app.scrapers.pool import scrape_pool
+from app.hardware.bus import hardware_bus
 from app.hardware.manager import hardware_manager
+from app.http_clients import http_pool
+from app.metrics import metrics
+from app.notifications import dispatcher as notification_dispatcher
+from app.loop_monitor import loop_monitor
 from app.auth.jwt import get_current_user, TokenData
 
 logger = logging.getLogger("dashboard.health")
@@ -25,6 +40,21 @@ router = APIRouter()
 VERSION = "2.0.0"
 
 
+# Resultats de sondes couteuses : nom -> (time.monotonic() d'expiration, resultat)
+_probe_cache: dict[str, tuple[float, dict]] = {}
+
+
+async def _cached_probe(name: str, probe: Callable[[], Awaitable[dict]]) -> dict:
+    """Resultat de sonde reutilise pendant HEALTH_PROBE_TTL secondes (HEALTHCHECK frequents)."""
+    now = time.monotonic()
+    cached = _probe_cache.get(name)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    result = await probe()
+    _probe_cache[name] = (now + get_settings().health_probe_ttl, result)
+    return result
+
+
 async def _check_database(db: AsyncSession) -> dict:
     """Ping DB + mesure latence."""
     start = datetime.now(timezone.utc)
@@ -41,7 +71,11 @@ async def _check_database(db: AsyncSession) -> dict:
 
 
 def _check_scheduler() -> dict:
-    """Etat de la tache asyncio du scheduler de scraping."""
+    """Etat de la tache asyncio du scheduler de scraping (dans le worker leader)."""
+    election = scheduler_leader.stats()
+    if not scheduler_leader.is_leader and scheduler_leader.running:
+        # Un autre worker porte le planificateur
+        return {"status": "ok", "running": False, "election": election}
     task = scheduler_mod._scheduler_task
     if task is None:
         return {"status": "down", "running": False, "reason": "task_not_started"}
@@ -69,13 +103,15 @@ def _check_scheduler() -> dict:
         "status": "ok",
         "running": True,
         "next_run_at": next_run_at,
+        "election": election,
     }
 
 
 def _check_hardware_agent() -> dict:
-    """Etat de l'agent hardware (PC home)."""
+    """Etat de l'agent hardware (PC home) + son propre cout (CPU, RAM, collecteurs)."""
     connected = hardware_manager.is_agent_connected
     last_ts = hardware_manager.latest_data.timestamp
+    diagnostics = hardware_manager.latest_data.diagnostics or None
 
     if not connected:
         return {
@@ -83,6 +119,7 @@ def _check_hardware_agent() -> dict:
             "connected": False,
             "last_message_at": last_ts,
             "clients_count": len(hardware_manager.clients),
+            "diagnostics": diagnostics,
         }
 
     # Considere "stale" si pas de message depuis 30s
@@ -100,6 +137,7 @@ def _check_hardware_agent() -> dict:
         "stale": stale,
         "last_message_at": last_ts,
         "clients_count": len(hardware_manager.clients),
+        "diagnostics": diagnostics,
     }
 
 
@@ -119,35 +157,28 @@ def _check_scrapers() -> dict:
 
 
 async def _check_last_scrapes(db: AsyncSession) -> dict:
-    """Date du dernier scrape par tracker."""
+    """Date du dernier scrape par tracker (compteurs en memoire)."""
     try:
-        query = (
-            select(
-                TrackerStats.tracker_name,
-                func.max(TrackerStats.scraped_at).label("last_at"),
-            )
-            .group_by(TrackerStats.tracker_name)
-        )
-        result = await db.execute(query)
-        rows = result.all()
-        return {
-            row.tracker_name: row.last_at.isoformat() if row.last_at else None
-            for row in rows
-        }
+        tables = await row_counters.ensure(db, get_settings().health_counters_resync)
+        counter = tables.get("tracker_stats")
+        if counter is None:
+            return {}
+        return {name: at.isoformat() for name, at in sorted(counter.last_by_key.items())}
     except Exception as e:
         return {"_error": f"{type(e).__name__}: {str(e)[:200]}"}
 
 
 async def _check_hardware_history(db: AsyncSession) -> dict:
-    """Compte des snapshots hardware en DB + dernier."""
+    """Compte des snapshots hardware en DB + dernier (compteurs en memoire)."""
     try:
-        count_q = select(func.count(HardwareSnapshot.id))
-        last_q = select(func.max(HardwareSnapshot.recorded_at))
-        count = (await db.execute(count_q)).scalar() or 0
-        last = (await db.execute(last_q)).scalar()
+        tables = await row_counters.ensure(db, get_settings().health_counters_resync)
+        counter = tables.get("hardware_snapshots")
+        if counter is None:
+            return {"snapshots_total": 0, "last_snapshot_at": None}
         return {
-            "snapshots_total": int(count),
-            "last_snapshot_at": last.isoformat() if last else None,
+            "snapshots_total": counter.rows,
+            "snapshots_estimated": counter.estimated,
+            "last_snapshot_at": counter.last_at.isoformat() if counter.last_at else None,
         }
     except Exception as e:
         return {"_error": f"{type(e).__name__}: {str(e)[:200]}"}
@@ -174,7 +205,7 @@ async def health_minimal(db: AsyncSession = Depends(get_db)):
     Compatible avec Docker HEALTHCHECK et monitoring externe.
     Retourne uniquement le statut global et la version, pas de details.
     """
-    db_check = await _check_database(db)
+    db_check = await _cached_probe("database", lambda: _check_database(db))
     sched_check = _check_scheduler()
     agent_check = _check_hardware_agent()
 
@@ -202,7 +233,7 @@ async def health_full(
     Retourne l'etat de chaque composant + dernier scrape par tracker
     + nombre de snapshots hardware.
     """
-    db_check = await _check_database(db)
+    db_check = await _cached_probe("database", lambda: _check_database(db))
     sched_check = _check_scheduler()
     agent_check = _check_hardware_agent()
     scrapers_check = _check_scrapers()
@@ -228,4 +259,30 @@ async def health_full(
         },
         "last_scrapes_by_tracker": last_scrapes,
         "hardware_history": hw_history,
+        "http_clients": http_pool.stats(),
+        "notifications": notification_dispatcher.stats(),
+        "hardware_bus": hardware_bus.stats(),
+        "scrape_pool": scrape_pool.stats(),
+        "event_loop": loop_monitor.stats(),
     }
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics(
+    authorization: Optional[str] = Header(default=None),
+):
+    """
+    Metriques du processus au format texte Prometheus.
+    Authentification : `Authorization: Bearer <METRICS_TOKEN>` uniquement
+    (`authorization.credentials` de Prometheus) ; pas de `?token=`, qui finirait
+    dans les logs d'acces et du reverse proxy. Desactive si METRICS_TOKEN est vide.
+    """
+    expected = get_settings().metrics_token
+    if not expected:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Metriques desactivees")
+    provided = None
+    if authorization and authorization.lower().startswith("bearer "):
+        provided = authorization[7:]
+    if not provided or not hmac.compare_digest(provided.encode(), expected.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
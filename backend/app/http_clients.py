@@ -0,0 +1,118 @@
+"""
+Clients HTTP partages (httpx) pour les appels sortants : services media, webhook Discord.
+
+Un AsyncClient par hote amont (schema + host + port), cree une seule fois et
+ferme au shutdown (lifespan). Keep-alive, limites de pool, HTTP/2 si le paquet
+`h2` est installe (negocie en TLS, sans effet sur les services LAN en http).
+
+La reutilisation des connexions est mesuree via l'extension `trace` de httpx :
+chaque requete qui ouvre une connexion TCP compte comme "miss", les autres
+comme "hit" (connexion du pool reutilisee). Expose dans /health/full.
+
+Le scraping passe par Playwright (navigateur), pas par httpx : non concerne.
+"""
+import importlib.util
+import logging
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger("dashboard.http")
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+DEFAULT_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+DEFAULT_TIMEOUT = httpx.Timeout(10.0)
+
+
+@dataclass
+class PoolStats:
+    requests: int = 0
+    new_connections: int = 0
+
+    @property
+    def hits(self) -> int:
+        return max(self.requests - self.new_connections, 0)
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "connection_hits": self.hits,
+            "connection_misses": self.new_connections,
+            "hit_ratio": round(self.hits / self.requests, 3) if self.requests else None,
+        }
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+class HttpClientPool:
+    """Un httpx.AsyncClient par origine, avec compteurs de reutilisation des connexions."""
+
+    def __init__(self, limits: httpx.Limits = DEFAULT_LIMITS, timeout: httpx.Timeout = DEFAULT_TIMEOUT):
+        self.limits = limits
+        self.timeout = timeout
+        # Transport force (tests : httpx.MockTransport)
+        self.transport: Optional[httpx.AsyncBaseTransport] = None
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._stats: dict[str, PoolStats] = {}
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """Client partage de l'hote de `url` (cree a la premiere demande)."""
+        origin = _origin(url)
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            client = self._clients[origin] = self._create(origin)
+        return client
+
+    def warm(self, urls: list[Optional[str]]):
+        """Cree les clients des hotes configures (au demarrage)."""
+        for url in urls:
+            if url:
+                self.client_for(url)
+
+    def _create(self, origin: str) -> httpx.AsyncClient:
+        stats = self._stats.setdefault(origin, PoolStats())
+
+        async def trace(event: str, info: dict):
+            if event == "connection.connect_tcp.started":
+                stats.new_connections += 1
+
+        async def on_request(request: httpx.Request):
+            stats.requests += 1
+            request.extensions["trace"] = trace
+
+        kwargs = {}
+        if self.transport is not None:
+            kwargs["transport"] = self.transport
+        logger.debug("Client HTTP cree pour %s (http2=%s)", origin, HTTP2_AVAILABLE)
+        return httpx.AsyncClient(
+            limits=self.limits,
+            timeout=self.timeout,
+            http2=HTTP2_AVAILABLE,
+            event_hooks={"request": [on_request]},
+            **kwargs,
+        )
+
+    def stats(self) -> dict:
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "hosts": {origin: s.to_dict() for origin, s in self._stats.items()},
+        }
+
+    async def aclose(self):
+        """Ferme tous les clients (shutdown)."""
+        for origin, client in list(self._clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning("Fermeture client HTTP %s: %s", origin, e)
+        self._clients.clear()
+
+
+# Instance globale
+http_pool = HttpClientPool()
@@ -0,0 +1,118 @@
+"""
+Surveillance de la boucle asyncio : retard d'ordonnancement et callbacks bloquants.
+
+- Une tache se reveille toutes les LOOP_LAG_INTERVAL secondes ; l'ecart entre le
+  reveil prevu et le reveil reel est le retard de la boucle (histogramme
+  `event_loop_lag_seconds` sur /metrics).
+- Un thread de garde surveille ce battement : si la boucle ne l'a pas mis a jour
+  depuis plus de LOOP_BLOCK_THRESHOLD secondes au-dela de l'intervalle, un
+  callback la bloque. La pile du thread de la boucle est alors journalisee (une
+  fois par blocage) et `event_loop_blocked_total` incremente : on voit la ligne
+  fautive (I/O disque synchrone, parsing lourd...) et pas seulement le symptome.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from app.metrics import metrics
+
+logger = logging.getLogger("dashboard.loop_monitor")
+
+LOOP_LAG_SECONDS = metrics.histogram(
+    "event_loop_lag_seconds", "Retard de reveil de la boucle asyncio",
+)
+LOOP_BLOCKED = metrics.counter(
+    "event_loop_blocked_total", "Blocages de la boucle asyncio au-dela du seuil",
+)
+# Pile journalisee : les frames du moniteur et de la boucle n'apportent rien
+MAX_STACK_FRAMES = 25
+
+
+class LoopLagMonitor:
+    """Mesure le retard de la boucle courante et signale les callbacks bloquants."""
+
+    def __init__(self, interval: float = 0.5, threshold: float = 0.25):
+        self.interval = interval
+        self.threshold = threshold
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.blocked = 0
+        self._beat = 0.0  # time.monotonic() du dernier reveil de la boucle
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Demarre la mesure (a appeler depuis la boucle a surveiller)."""
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._tick())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+
+    async def _tick(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - expected, 0.0)
+            self._beat = now
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            LOOP_LAG_SECONDS.observe(lag)
+
+    def _watch(self):
+        reported_beat = None
+        while not self._stop.wait(min(self.threshold / 2, 0.1)):
+            beat = self._beat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled > self.threshold and beat != reported_beat:
+                reported_beat = beat  # Un seul rapport par blocage
+                self._report(stalled)
+
+    def _report(self, stalled: float):
+        self.blocked += 1
+        LOOP_BLOCKED.inc()
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame, limit=MAX_STACK_FRAMES)) if frame else "(pile indisponible)\n"
+        logger.warning(
+            "Boucle asyncio bloquee depuis %.0f ms (seuil %.0f ms), pile du callback :\n%s",
+            stalled * 1000, self.threshold * 1000, stack.rstrip(),
+        )
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "last_lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "blocked": self.blocked,
+        }
+
+
+# Instance globale (demarree dans le lifespan)
+loop_monitor = LoopLagMonitor()
@@ -17,10 +17,17 @@ from app.db.database import init_db  # noqa: E402
 from app.auth.routes import router as auth_router  # noqa: E402
 from app.scrapers.routes import router as scraper_router, load_scraper_state_from_db  # noqa: E402
 from app.scrapers.scheduler import start_scheduler, stop_scheduler  # noqa: E402
+from app.scrapers.leader import scheduler_leader  # noqa: E402
 from app.hardware.routes import router as hardware_router  # noqa: E402
 from app.api.routes import router as api_router  # noqa: E402
 from app.media.routes import router as media_router  # noqa: E402
 from app.health import router as health_router, VERSION  # noqa: E402
+from app.profiler import router as profiler_router  # noqa: E402
+from app.http_clients import http_pool  # noqa: E402
+from app.notifications import dispatcher as notification_dispatcher  # noqa: E402
+from app.loop_monitor import loop_monitor  # noqa: E402
+from app.hardware.bus import hardware_bus  # noqa: E402
+from app.hardware.manager import hardware_manager  # noqa: E402
 
 logger = logging.getLogger("dashboard")
 
@@ -29,6 +36,11 @@ logger = logging.getLogger("dashboard")
 async def lifespan(app: FastAPI):
     """Lifecycle manager - initialisation et cleanup."""
     # Startup
+    settings = get_settings()
+    loop_monitor.interval = settings.loop_lag_interval
+    loop_monitor.threshold = settings.loop_block_threshold
+    loop_monitor.start()
+
     logger.info("Initialisation de la base de donnees...")
     await init_db()
     logger.info("Base de donnees prete.")
@@ -37,15 +49,37 @@ async def lifespan(app: FastAPI):
     # depuis la DB avant de lancer le scheduler.
     await load_scraper_state_from_db()
 
-    # Demarrer le planificateur de scraping automatique
-    start_scheduler()
-    logger.info("Planificateur de scraping demarre.")
+    # Clients HTTP partages (un par hote amont, keep-alive)
+    http_pool.warm([
+        settings.media_plex_url,
+        settings.media_radarr_url,
+        settings.media_sonarr_url,
+        settings.media_tautulli_url,
+        settings.discord_webhook_url,
+    ])
+
+    # Trames hardware partagees entre workers (l'agent n'est connecte qu'a l'un d'eux)
+    if settings.hw_bus_path:
+        hardware_manager.bus = hardware_bus
+        await hardware_bus.start(settings.hw_bus_path, hardware_manager.receive_remote)
+
+    # File d'envoi des notifications Discord
+    notification_dispatcher.start()
+
+    # Planificateur de scraping : lance par le seul worker elu leader
+    scheduler_leader.ttl = settings.scheduler_lease_ttl
+    scheduler_leader.start(on_elected=start_scheduler, on_lost=stop_scheduler)
+    logger.info("Election du planificateur demarree.")
 
     yield
 
-    # Shutdown
-    stop_scheduler()
+    # Shutdown (arrete le planificateur si ce worker est leader)
+    await scheduler_leader.stop()
     logger.info("Fermeture des connexions...")
+    await notification_dispatcher.stop()
+    await http_pool.aclose()
+    await hardware_bus.stop()
+    await loop_monitor.stop()
 
 
 # Creation de l'application FastAPI
@@ -89,6 +123,7 @@ app.include_router(scraper_router, prefix="/scrapers", tags=["Scrapers"])
 app.include_router(hardware_router, prefix="/hardware", tags=["Hardware"])
 app.include_router(api_router, prefix="/api", tags=["API"])
 app.include_router(media_router, prefix="/media", tags=["Media"])
+app.include_router(profiler_router, prefix="/admin", tags=["Admin"])
 
 
 @app.get("/")
@@ -0,0 +1,129 @@
+"""
+Cache stale-while-revalidate pour les donnees des services media.
+
+Chaque "piece" (ex: `radarr.catalog`, `plex.sessions`) a sa propre TTL :
+- valeur fraiche : servie directement ;
+- valeur perimee : servie immediatement, un rafraichissement part en tache de fond ;
+- pas de valeur (demarrage) : on attend le chargement.
+
+Un seul chargement a la fois par piece (single-flight) : des pages ouvertes en
+parallele ne declenchent jamais d'appels amont concurrents.
+Un loader qui retourne None (service en erreur) ne remplace pas la valeur en cache.
+Un echec est memorise NEGATIVE_TTL secondes, pendant lesquelles aucune lecture ne
+relance le service en panne :
+- sans valeur en cache, les lectures repondent None tout de suite (piece degradee)
+  au lieu d'attendre a nouveau son timeout ;
+- avec une valeur perimee, elle reste servie sans nouveau rafraichissement a
+  chaque requete.
+Ensuite le nouvel essai part en tache de fond. `refresh()` (webhook) n'attend pas.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger("dashboard.media.cache")
+
+Loader = Callable[[], Awaitable[Optional[Any]]]
+
+NEGATIVE_TTL = 30.0
+
+
+@dataclass
+class CacheEntry:
+    value: Any = None
+    fetched_at: Optional[float] = None  # time.monotonic() du dernier chargement reussi
+    task: Optional[asyncio.Task] = None
+    failed_at: Optional[float] = None  # time.monotonic() du dernier echec
+    error: Optional[str] = None
+
+    @property
+    def has_value(self) -> bool:
+        return self.fetched_at is not None
+
+    def age(self, now: float) -> Optional[float]:
+        return None if self.fetched_at is None else now - self.fetched_at
+
+
+class SWRCache:
+    """Cache par cle, TTL fournie a la lecture, rafraichissement unique par cle."""
+
+    def __init__(self, negative_ttl: float = NEGATIVE_TTL):
+        self.negative_ttl = negative_ttl
+        self._entries: dict[str, CacheEntry] = {}
+
+    async def get(self, key: str, ttl: float, loader: Loader) -> Any:
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and entry.has_value:
+            if entry.age(now) >= ttl and not self._backing_off(entry, now):
+                self._refresh(key, loader)  # En fond : on sert la valeur perimee
+            return entry.value
+        if entry is not None and entry.failed_at is not None:
+            # Echec connu sans valeur : reponse degradee immediate, nouvel essai en fond
+            if not self._backing_off(entry, now):
+                self._refresh(key, loader)
+            return None
+        # Rien en cache : attendre le chargement (partage avec les autres appelants)
+        return await asyncio.shield(self._refresh(key, loader))
+
+    def _backing_off(self, entry: CacheEntry, now: float) -> bool:
+        """Dernier chargement en echec il y a moins de negative_ttl secondes."""
+        return entry.failed_at is not None and now - entry.failed_at < self.negative_ttl
+
+    def refresh(self, key: str, loader: Loader) -> asyncio.Task:
+        """Lance un rafraichissement (ex: webhook) sans attendre ; la valeur actuelle reste servie."""
+        return self._refresh(key, loader)
+
+    def _refresh(self, key: str, loader: Loader) -> asyncio.Task:
+        entry = self._entries.setdefault(key, CacheEntry())
+        if entry.task is None or entry.task.done():
+            entry.task = asyncio.create_task(self._load(key, entry, loader))
+        return entry.task
+
+    async def _load(self, key: str, entry: CacheEntry, loader: Loader) -> Any:
+        error = "aucune donnee"
+        try:
+            value = await loader()
+        except Exception as e:
+            logger.warning("Rafraichissement %s echoue: %s", key, e)
+            value, error = None, str(e)
+        if value is not None:
+            entry.value = value
+            entry.fetched_at = time.monotonic()
+            entry.failed_at, entry.error = None, None
+        else:
+            entry.failed_at, entry.error = time.monotonic(), error
+        return entry.value
+
+    def set(self, key: str, value: Any):
+        """Remplace la valeur (mise a jour poussee, ex: webhook)."""
+        entry = self._entries.setdefault(key, CacheEntry())
+        entry.value = value
+        entry.fetched_at = time.monotonic()
+        entry.failed_at, entry.error = None, None
+
+    def invalidate(self, key: str):
+        """Marque la piece perimee : prochaine lecture = valeur actuelle + rafraichissement."""
+        entry = self._entries.get(key)
+        if entry is not None and entry.has_value:
+            entry.fetched_at = float("-inf")
+
+    def clear(self):
+        for entry in self._entries.values():
+            if entry.task is not None and not entry.task.done():
+                entry.task.cancel()
+        self._entries.clear()
+
+    def stats(self) -> dict[str, dict]:
+        """Age et etat de chaque piece (diagnostic)."""
+        now = time.monotonic()
+        return {
+            key: {
+                "age_s": round(age, 1) if (age := entry.age(now)) is not None and age != float("inf") else None,
+                "refreshing": entry.task is not None and not entry.task.done(),
+                "error": entry.error,
+            }
+            for key, entry in self._entries.items()
+        }
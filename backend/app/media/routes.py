@@ -1,16 +1,35 @@
 """
 Media Services Router - Plex, Radarr, Sonarr, Tautulli.
 Aggrege les donnees de tous les services media en un seul endpoint.
+Les donnees sont decoupees en pieces cachees (cf media/cache.py) : activite en
+secondes, catalogues en minutes. Les catalogues Radarr/Sonarr sont synchronises
+par difference (cf media/sync.py). Les webhooks des services (cf media/webhooks.py)
+rafraichissent les pieces concernees ; un service qui les envoie est alors
+beaucoup moins interroge (MEDIA_WEBHOOK_TTL).
 """
 import asyncio
+import hmac
+import json
 import logging
-from typing import Optional
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
 
 import httpx
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.jwt import TokenData, get_current_user
 from app.config import get_settings
+from app.db.database import get_db
+from app.db.models import MediaWebhookDelivery
+from app.http_clients import http_pool
+from app.media.cache import SWRCache
+from app.media.sync import radarr_sync, sonarr_sync
+from app.media.webhooks import SERVICES as WEBHOOK_SERVICES, fingerprint, interpret
+from app.metrics import metrics
 
 logger = logging.getLogger("dashboard.media")
 router = APIRouter()
@@ -18,233 +37,339 @@ router = APIRouter()
 TIMEOUT = httpx.Timeout(10.0)
 
 
-async def _fetch_plex(client: httpx.AsyncClient, url: str, token: str) -> Optional[dict]:
-    """Recupere les donnees Plex (bibliotheques + sessions actives)."""
-    try:
-        headers = {"X-Plex-Token": token, "Accept": "application/json"}
-
-        # Libraries
-        libs_resp = await client.get(f"{url}/library/sections", headers=headers, timeout=TIMEOUT)
-        libs_resp.raise_for_status()
-        libs_data = libs_resp.json()
-        sections = libs_data.get("MediaContainer", {}).get("Directory", [])
-
-        libraries = []
-        for section in sections:
-            section_id = section.get("key")
-            section_type = section.get("type", "unknown")
-            count_resp = await client.get(
-                f"{url}/library/sections/{section_id}/all",
-                headers={**headers},
-                params={"X-Plex-Container-Start": 0, "X-Plex-Container-Size": 0},
-                timeout=TIMEOUT,
-            )
-            count_resp.raise_for_status()
-            total = count_resp.json().get("MediaContainer", {}).get("totalSize", 0)
-            libraries.append({
-                "title": section.get("title"),
-                "type": section_type,
-                "count": total,
-            })
-
-        # Sessions
-        sessions_resp = await client.get(f"{url}/status/sessions", headers=headers, timeout=TIMEOUT)
-        sessions_resp.raise_for_status()
-        sessions_data = sessions_resp.json().get("MediaContainer", {})
-        active_streams = sessions_data.get("size", 0)
+# === PIECES ===
+# Chaque service est decoupe en pieces cachees separement :
+# "activity" (sessions, queue...) = TTL courte, "catalog" (bibliotheques, comptes) = TTL longue.
+
 
+async def _fetch_plex_libraries(client: httpx.AsyncClient, url: str, token: str) -> Optional[dict]:
+    """Bibliotheques Plex avec leur nombre d'elements."""
+    headers = {"X-Plex-Token": token, "Accept": "application/json"}
+    libs_resp = await client.get(f"{url}/library/sections", headers=headers, timeout=TIMEOUT)
+    libs_resp.raise_for_status()
+    sections = libs_resp.json().get("MediaContainer", {}).get("Directory", [])
+
+    async def count(section: dict) -> dict:
+        count_resp = await client.get(
+            f"{url}/library/sections/{section.get('key')}/all",
+            headers=headers,
+            params={"X-Plex-Container-Start": 0, "X-Plex-Container-Size": 0},
+            timeout=TIMEOUT,
+        )
+        count_resp.raise_for_status()
         return {
-            "libraries": libraries,
-            "active_streams": active_streams,
+            "title": section.get("title"),
+            "type": section.get("type", "unknown"),
+            "count": count_resp.json().get("MediaContainer", {}).get("totalSize", 0),
         }
-    except Exception as e:
-        logger.warning(f"Plex error: {e}")
-        return None
 
+    # Une requete par section, en parallele
+    libraries = list(await asyncio.gather(*(count(section) for section in sections)))
+    return {"libraries": libraries}
 
-async def _fetch_radarr(client: httpx.AsyncClient, url: str, api_key: str) -> Optional[dict]:
-    """Recupere les donnees Radarr (films, queue, espace disque)."""
-    try:
-        headers = {"X-Api-Key": api_key}
 
-        movie_resp, queue_resp, disk_resp, calendar_resp = await asyncio.gather(
-            client.get(f"{url}/api/v3/movie", headers=headers, timeout=TIMEOUT),
-            client.get(f"{url}/api/v3/queue", headers=headers, params={"pageSize": 50}, timeout=TIMEOUT),
-            client.get(f"{url}/api/v3/diskspace", headers=headers, timeout=TIMEOUT),
-            client.get(f"{url}/api/v3/calendar", headers=headers, params={"unmonitored": "false"}, timeout=TIMEOUT),
-        )
+async def _fetch_plex_sessions(client: httpx.AsyncClient, url: str, token: str) -> Optional[dict]:
+    """Nombre de streams Plex actifs."""
+    headers = {"X-Plex-Token": token, "Accept": "application/json"}
+    sessions_resp = await client.get(f"{url}/status/sessions", headers=headers, timeout=TIMEOUT)
+    sessions_resp.raise_for_status()
+    return {"active_streams": sessions_resp.json().get("MediaContainer", {}).get("size", 0)}
 
-        movies = movie_resp.json() if movie_resp.status_code == 200 else []
-        queue_data = queue_resp.json() if queue_resp.status_code == 200 else {}
-        disks = disk_resp.json() if disk_resp.status_code == 200 else []
-        calendar = calendar_resp.json() if calendar_resp.status_code == 200 else []
 
-        total_movies = len(movies)
-        monitored = sum(1 for m in movies if m.get("monitored"))
-        queue_count = queue_data.get("totalRecords", 0)
+async def _fetch_radarr_catalog(client: httpx.AsyncClient, url: str, api_key: str) -> Optional[dict]:
+    """Comptes du catalogue Radarr (films, surveilles), synchro incrementale."""
+    return await radarr_sync.refresh(client, url, api_key, get_settings().media_sync_reconcile_interval)
 
-        disk_info = []
-        for d in disks:
-            disk_info.append({
-                "path": d.get("path"),
-                "free_gb": round(d.get("freeSpace", 0) / (1024**3), 1),
-                "total_gb": round(d.get("totalSpace", 0) / (1024**3), 1),
-            })
 
-        upcoming = [
-            {"title": m.get("title"), "year": m.get("year"), "status": m.get("status")}
-            for m in calendar[:10]
-        ]
+async def _fetch_radarr_activity(client: httpx.AsyncClient, url: str, api_key: str) -> Optional[dict]:
+    """Queue, espace disque et calendrier Radarr."""
+    headers = {"X-Api-Key": api_key}
+    queue_resp, disk_resp, calendar_resp = await asyncio.gather(
+        client.get(f"{url}/api/v3/queue", headers=headers, params={"pageSize": 50}, timeout=TIMEOUT),
+        client.get(f"{url}/api/v3/diskspace", headers=headers, timeout=TIMEOUT),
+        client.get(f"{url}/api/v3/calendar", headers=headers, params={"unmonitored": "false"}, timeout=TIMEOUT),
+    )
 
-        return {
-            "total_movies": total_movies,
-            "monitored": monitored,
-            "queue_count": queue_count,
-            "disk_space": disk_info,
-            "upcoming": upcoming,
-        }
-    except Exception as e:
-        logger.warning(f"Radarr error: {e}")
-        return None
+    queue_data = queue_resp.json() if queue_resp.status_code == 200 else {}
+    disks = disk_resp.json() if disk_resp.status_code == 200 else []
+    calendar = calendar_resp.json() if calendar_resp.status_code == 200 else []
 
+    disk_info = []
+    for d in disks:
+        disk_info.append({
+            "path": d.get("path"),
+            "free_gb": round(d.get("freeSpace", 0) / (1024**3), 1),
+            "total_gb": round(d.get("totalSpace", 0) / (1024**3), 1),
+        })
 
-async def _fetch_sonarr(client: httpx.AsyncClient, url: str, api_key: str) -> Optional[dict]:
-    """Recupere les donnees Sonarr (series, episodes, queue)."""
-    try:
-        headers = {"X-Api-Key": api_key}
+    upcoming = [
+        {"title": m.get("title"), "year": m.get("year"), "status": m.get("status")}
+        for m in calendar[:10]
+    ]
 
-        series_resp, queue_resp, calendar_resp = await asyncio.gather(
-            client.get(f"{url}/api/v3/series", headers=headers, timeout=TIMEOUT),
-            client.get(f"{url}/api/v3/queue", headers=headers, params={"pageSize": 50}, timeout=TIMEOUT),
-            client.get(f"{url}/api/v3/calendar", headers=headers, params={"unmonitored": "false"}, timeout=TIMEOUT),
-        )
+    return {
+        "queue_count": queue_data.get("totalRecords", 0),
+        "disk_space": disk_info,
+        "upcoming": upcoming,
+    }
 
-        series = series_resp.json() if series_resp.status_code == 200 else []
-        queue_data = queue_resp.json() if queue_resp.status_code == 200 else {}
-        calendar = calendar_resp.json() if calendar_resp.status_code == 200 else []
-
-        total_series = len(series)
-        monitored = sum(1 for s in series if s.get("monitored"))
-        total_episodes = sum(s.get("statistics", {}).get("episodeFileCount", 0) for s in series)
-        queue_count = queue_data.get("totalRecords", 0)
-
-        upcoming = [
-            {
-                "series": e.get("series", {}).get("title", "") or e.get("seriesTitle", ""),
-                "title": e.get("title", ""),
-                "season": e.get("seasonNumber"),
-                "episode": e.get("episodeNumber"),
-                "air_date": e.get("airDate"),
-            }
-            for e in calendar[:10]
-        ]
 
-        return {
-            "total_series": total_series,
-            "monitored": monitored,
-            "total_episodes": total_episodes,
-            "queue_count": queue_count,
-            "upcoming": upcoming,
+async def _fetch_sonarr_catalog(client: httpx.AsyncClient, url: str, api_key: str) -> Optional[dict]:
+    """Comptes du catalogue Sonarr (series, surveillees, episodes), synchro incrementale."""
+    return await sonarr_sync.refresh(client, url, api_key, get_settings().media_sync_reconcile_interval)
+
+
+async def _fetch_sonarr_activity(client: httpx.AsyncClient, url: str, api_key: str) -> Optional[dict]:
+    """Queue et calendrier Sonarr."""
+    headers = {"X-Api-Key": api_key}
+    queue_resp, calendar_resp = await asyncio.gather(
+        client.get(f"{url}/api/v3/queue", headers=headers, params={"pageSize": 50}, timeout=TIMEOUT),
+        client.get(f"{url}/api/v3/calendar", headers=headers, params={"unmonitored": "false"}, timeout=TIMEOUT),
+    )
+
+    queue_data = queue_resp.json() if queue_resp.status_code == 200 else {}
+    calendar = calendar_resp.json() if calendar_resp.status_code == 200 else []
+
+    upcoming = [
+        {
+            "series": e.get("series", {}).get("title", "") or e.get("seriesTitle", ""),
+            "title": e.get("title", ""),
+            "season": e.get("seasonNumber"),
+            "episode": e.get("episodeNumber"),
+            "air_date": e.get("airDate"),
         }
-    except Exception as e:
-        logger.warning(f"Sonarr error: {e}")
-        return None
+        for e in calendar[:10]
+    ]
+
+    return {
+        "queue_count": queue_data.get("totalRecords", 0),
+        "upcoming": upcoming,
+    }
 
 
-async def _fetch_tautulli(client: httpx.AsyncClient, url: str, api_key: str) -> Optional[dict]:
-    """Recupere les donnees Tautulli (activite, stats)."""
-    try:
-        params_base = {"apikey": api_key}
+async def _fetch_tautulli_activity(client: httpx.AsyncClient, url: str, api_key: str) -> Optional[dict]:
+    """Activite Tautulli (streams en cours, bande passante)."""
+    activity_resp = await client.get(
+        f"{url}/api/v2", params={"apikey": api_key, "cmd": "get_activity"}, timeout=TIMEOUT,
+    )
+    activity_resp.raise_for_status()
+    activity = activity_resp.json().get("response", {}).get("data", {})
+
+    total_bandwidth = activity.get("total_bandwidth", 0)
+    sessions = []
+    for s in activity.get("sessions", []):
+        sessions.append({
+            "user": s.get("friendly_name", ""),
+            "title": s.get("full_title", ""),
+            "state": s.get("state", ""),
+            "progress": s.get("progress_percent", "0"),
+            "quality": s.get("quality_profile", ""),
+            "player": s.get("player", ""),
+        })
 
-        activity_resp, stats_resp = await asyncio.gather(
-            client.get(f"{url}/api/v2", params={**params_base, "cmd": "get_activity"}, timeout=TIMEOUT),
-            client.get(f"{url}/api/v2", params={**params_base, "cmd": "get_home_stats", "stats_count": 5}, timeout=TIMEOUT),
-        )
+    return {
+        "stream_count": activity.get("stream_count", 0),
+        "total_bandwidth_mbps": round(total_bandwidth / 1000, 1) if total_bandwidth else 0,
+        "sessions": sessions,
+    }
 
-        activity = {}
-        if activity_resp.status_code == 200:
-            activity = activity_resp.json().get("response", {}).get("data", {})
-
-        stats = []
-        if stats_resp.status_code == 200:
-            stats = stats_resp.json().get("response", {}).get("data", [])
-
-        stream_count = activity.get("stream_count", 0)
-        total_bandwidth = activity.get("total_bandwidth", 0)
-        sessions = []
-        for s in activity.get("sessions", []):
-            sessions.append({
-                "user": s.get("friendly_name", ""),
-                "title": s.get("full_title", ""),
-                "state": s.get("state", ""),
-                "progress": s.get("progress_percent", "0"),
-                "quality": s.get("quality_profile", ""),
-                "player": s.get("player", ""),
-            })
-
-        # Extract most watched
-        most_watched = []
-        for stat_group in stats:
-            if stat_group.get("stat_id") == "top_movies":
-                for item in stat_group.get("rows", [])[:5]:
-                    most_watched.append({
-                        "title": item.get("title", ""),
-                        "total_plays": item.get("total_plays", 0),
-                    })
 
-        return {
-            "stream_count": stream_count,
-            "total_bandwidth_mbps": round(total_bandwidth / 1000, 1) if total_bandwidth else 0,
-            "sessions": sessions,
-            "most_watched": most_watched,
-        }
+async def _fetch_tautulli_stats(client: httpx.AsyncClient, url: str, api_key: str) -> Optional[dict]:
+    """Statistiques Tautulli (films les plus vus)."""
+    stats_resp = await client.get(
+        f"{url}/api/v2", params={"apikey": api_key, "cmd": "get_home_stats", "stats_count": 5}, timeout=TIMEOUT,
+    )
+    stats_resp.raise_for_status()
+    stats = stats_resp.json().get("response", {}).get("data", [])
+
+    most_watched = []
+    for stat_group in stats:
+        if stat_group.get("stat_id") == "top_movies":
+            for item in stat_group.get("rows", [])[:5]:
+                most_watched.append({
+                    "title": item.get("title", ""),
+                    "total_plays": item.get("total_plays", 0),
+                })
+    return {"most_watched": most_watched}
+
+
+Fetcher = Callable[[httpx.AsyncClient, str, str], Awaitable[Optional[dict]]]
+
+# piece -> (service, type de TTL, fetcher)
+PIECES: dict[str, tuple[str, str, Fetcher]] = {
+    "plex.libraries": ("plex", "catalog", _fetch_plex_libraries),
+    "plex.sessions": ("plex", "activity", _fetch_plex_sessions),
+    "radarr.catalog": ("radarr", "catalog", _fetch_radarr_catalog),
+    "radarr.activity": ("radarr", "activity", _fetch_radarr_activity),
+    "sonarr.catalog": ("sonarr", "catalog", _fetch_sonarr_catalog),
+    "sonarr.activity": ("sonarr", "activity", _fetch_sonarr_activity),
+    "tautulli.activity": ("tautulli", "activity", _fetch_tautulli_activity),
+    "tautulli.stats": ("tautulli", "catalog", _fetch_tautulli_stats),
+}
+
+# Forme complete de chaque service (piece manquante = valeurs neutres)
+SERVICE_DEFAULTS: dict[str, dict] = {
+    "plex": {"libraries": [], "active_streams": 0},
+    "radarr": {"total_movies": 0, "monitored": 0, "queue_count": 0, "disk_space": [], "upcoming": []},
+    "sonarr": {"total_series": 0, "monitored": 0, "total_episodes": 0, "queue_count": 0, "upcoming": []},
+    "tautulli": {"stream_count": 0, "total_bandwidth_mbps": 0, "sessions": [], "most_watched": []},
+}
+
+media_cache = SWRCache()
+CATALOG_SYNCS = {"radarr": radarr_sync, "sonarr": sonarr_sync}
+# Dernier webhook recu par service (time.monotonic()), par worker : ne sert qu'a
+# allonger la TTL de polling. La dedup des livraisons est en DB (cf _first_delivery).
+webhook_seen: dict[str, float] = {}
+# Sans webhook pendant ce delai, le service repasse en polling normal
+WEBHOOK_ALIVE = 3600
+
+MEDIA_UPSTREAM_SECONDS = metrics.histogram(
+    "media_upstream_seconds", "Chargement d'une piece media depuis le service amont", ("piece", "outcome"),
+)
+metrics.gauge(
+    "media_cache_refreshing", "Pieces media en cours de rafraichissement",
+    fn=lambda: sum(1 for s in media_cache.stats().values() if s["refreshing"]),
+)
+
+
+def _service_credentials(settings, service: str) -> Optional[tuple[str, str]]:
+    """(url, secret) du service s'il est configure."""
+    url = getattr(settings, f"media_{service}_url")
+    secret = getattr(settings, "media_plex_token" if service == "plex" else f"media_{service}_api_key")
+    return (url, secret) if url and secret else None
+
+
+async def _load_piece(piece: str, url: str, secret: str) -> Optional[dict]:
+    _, _, fetcher = PIECES[piece]
+    start = time.perf_counter()
+    try:
+        value = await fetcher(http_pool.client_for(url), url, secret)
     except Exception as e:
-        logger.warning(f"Tautulli error: {e}")
+        logger.warning("%s error: %s", piece, e)
+        value = None
+    MEDIA_UPSTREAM_SECONDS.observe(
+        time.perf_counter() - start, piece=piece, outcome="ok" if value is not None else "error",
+    )
+    return value
+
+
+async def _get_piece(settings, piece: str) -> Optional[dict]:
+    service, kind, _ = PIECES[piece]
+    creds = _service_credentials(settings, service)
+    if creds is None:
         return None
-
-
-async def _noop() -> None:
-    return None
+    ttl = settings.media_cache_activity_ttl if kind == "activity" else settings.media_cache_catalog_ttl
+    seen = webhook_seen.get(service)
+    if seen is not None and time.monotonic() - seen < WEBHOOK_ALIVE:
+        # Changements pousses par webhook : le polling ne sert plus que de filet
+        ttl = max(ttl, settings.media_webhook_ttl)
+    return await media_cache.get(piece, ttl, lambda: _load_piece(piece, *creds))
 
 
 @router.get("/overview")
 async def media_overview(user: TokenData = Depends(get_current_user)):
-    """Retourne un apercu agrege de tous les services media."""
+    """
+    Retourne un apercu agrege de tous les services media.
+    Servi depuis le cache (stale-while-revalidate) : pas d'attente des services
+    amont une fois le cache chaud.
+    """
     settings = get_settings()
+    names = list(PIECES)
+    values = await asyncio.gather(*(_get_piece(settings, piece) for piece in names))
+
+    overview: dict[str, Optional[dict]] = {service: None for service in SERVICE_DEFAULTS}
+    for piece, value in zip(names, values):
+        if value is None:
+            continue
+        service = PIECES[piece][0]
+        if overview[service] is None:
+            overview[service] = dict(SERVICE_DEFAULTS[service])
+        overview[service].update(value)
+    return overview
+
+
+async def _webhook_payload(request: Request) -> dict:
+    """Corps JSON, ou champ `payload` d'un formulaire multipart (Plex)."""
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form = await request.form()
+        raw = form.get("payload")
+        return json.loads(raw) if isinstance(raw, str) else {}
+    try:
+        payload = await request.json()
+    except ValueError:
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+async def _first_delivery(db: AsyncSession, service: str, payload: dict) -> bool:
+    """
+    Enregistre la livraison ; False si le meme corps a deja ete traite dans la
+    fenetre de dedup, par ce worker ou un autre (retry du service, redemarrage).
+    Une ligne plus ancienne que la fenetre est reprise (evenement identique legitime).
+    """
+    window = get_settings().media_webhook_dedupe_window
+    if window <= 0:
+        return True
+    now = datetime.now(timezone.utc)
+    insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(MediaWebhookDelivery).values(
+        fingerprint=fingerprint(service, payload), service=service, received_at=now,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["fingerprint"],
+        set_={"received_at": stmt.excluded.received_at},
+        where=MediaWebhookDelivery.received_at < now - timedelta(seconds=window),
+    ).returning(MediaWebhookDelivery.fingerprint)
+    try:
+        claimed = (await db.execute(stmt)).first() is not None
+        await db.commit()
+    except Exception as e:
+        # DB indisponible : mieux vaut un rafraichissement en double qu'un evenement perdu
+        logger.warning("Dedup webhook %s indisponible: %s", service, e)
+        return True
+    return claimed
+
+
+@router.post("/webhooks/{service}")
+async def media_webhook(
+    service: str,
+    request: Request,
+    token: str = Query(..., description="MEDIA_WEBHOOK_TOKEN"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Webhook entrant Plex / Radarr / Sonarr / Tautulli.
+    Authentification par token dans query string (seule option commune aux 4 services).
+    Rafraichit en tache de fond les seules pieces touchees par l'evenement.
+    Une relivraison du meme corps (cf MEDIA_WEBHOOK_DEDUPE_WINDOW) est acquittee sans effet.
+    """
+    settings = get_settings()
+    if not settings.media_webhook_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Webhooks desactives")
+    if not hmac.compare_digest(token.encode(), settings.media_webhook_token.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
+    if service not in WEBHOOK_SERVICES:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service inconnu")
 
-    async with httpx.AsyncClient() as client:
-        plex_task = (
-            _fetch_plex(client, settings.media_plex_url, settings.media_plex_token)
-            if settings.media_plex_url and settings.media_plex_token
-            else _noop()
-        )
-        radarr_task = (
-            _fetch_radarr(client, settings.media_radarr_url, settings.media_radarr_api_key)
-            if settings.media_radarr_url and settings.media_radarr_api_key
-            else _noop()
-        )
-        sonarr_task = (
-            _fetch_sonarr(client, settings.media_sonarr_url, settings.media_sonarr_api_key)
-            if settings.media_sonarr_url and settings.media_sonarr_api_key
-            else _noop()
-        )
-        tautulli_task = (
-            _fetch_tautulli(client, settings.media_tautulli_url, settings.media_tautulli_api_key)
-            if settings.media_tautulli_url and settings.media_tautulli_api_key
-            else _noop()
-        )
-
-        plex, radarr, sonarr, tautulli = await asyncio.gather(
-            plex_task, radarr_task, sonarr_task, tautulli_task,
-            return_exceptions=True,
-        )
-
-    def safe(r):
-        return None if isinstance(r, BaseException) else r
-
-    return {
-        "plex": safe(plex),
-        "radarr": safe(radarr),
-        "sonarr": safe(sonarr),
-        "tautulli": safe(tautulli),
-    }
+    try:
+        payload = await _webhook_payload(request)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Payload invalide")
+
+    effect = interpret(service, payload)
+    webhook_seen[service] = time.monotonic()
+    if effect.pieces and not await _first_delivery(db, service, payload):
+        logger.debug("Webhook %s %s deja traite, ignore", service, effect.event)
+        return {"event": effect.event, "refreshed": [], "duplicate": True}
+    if effect.item_ids and service in CATALOG_SYNCS:
+        CATALOG_SYNCS[service].mark(effect.item_ids)
+
+    refreshed = []
+    for piece in effect.pieces:
+        creds = _service_credentials(settings, PIECES[piece][0])
+        if creds is None:
+            continue
+        media_cache.refresh(piece, lambda piece=piece, creds=creds: _load_piece(piece, *creds))
+        refreshed.append(piece)
+    logger.debug("Webhook %s %s -> %s", service, effect.event, refreshed)
+    return {"event": effect.event, "refreshed": refreshed}
@@ -0,0 +1,200 @@
+"""
+Synchronisation incrementale des catalogues Radarr / Sonarr.
+
+Au lieu de telecharger tout le catalogue (plusieurs Mo de JSON) a chaque
+rafraichissement pour n'en garder que des comptes, on garde en memoire un resume
+compact par element (id -> tuple d'entiers) et les totaux correspondants :
+
+- premiere synchro (ou reconciliation periodique) : liste complete ;
+- ensuite : `/api/v3/history/since?date=...` donne les ids touches depuis la
+  derniere synchro, seuls ces elements sont relus (`/api/v3/movie/{id}`) ;
+  un 404 = element supprime.
+
+L'historique ne voit pas tout (ajout sans telechargement, bascule "monitored") :
+une liste complete est refaite toutes les MEDIA_SYNC_RECONCILE_INTERVAL secondes,
+l'empreinte des resumes indique si une derive a ete rattrapee. Cette empreinte
+(XOR des hash par element) est tenue a jour a chaque ajout / retrait : une synchro
+incrementale ne coute que les elements relus, pas la taille de la bibliotheque.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import httpx
+
+logger = logging.getLogger("dashboard.media.sync")
+
+TIMEOUT = httpx.Timeout(30.0)
+# Au-dela, relire la liste complete coute moins cher que N requetes unitaires
+MAX_INCREMENTAL_ITEMS = 50
+ITEM_CONCURRENCY = 5
+
+Summary = tuple[int, ...]
+
+
+def _radarr_summary(movie: dict) -> Summary:
+    return (int(bool(movie.get("monitored"))),)
+
+
+def _sonarr_summary(series: dict) -> Summary:
+    return (
+        int(bool(series.get("monitored"))),
+        int((series.get("statistics") or {}).get("episodeFileCount", 0) or 0),
+    )
+
+
+def _item_hash(item_id: int, summary: Summary) -> int:
+    canonical = f"{item_id}:{','.join(map(str, summary))}"
+    return int.from_bytes(hashlib.sha1(canonical.encode()).digest()[:8], "big")
+
+
+class CatalogSync:
+    """Resumes par element + totaux d'un catalogue *arr, mis a jour par difference."""
+
+    def __init__(
+        self,
+        service: str,
+        endpoint: str,
+        id_field: str,
+        total_key: str,
+        fields: tuple[str, ...],
+        summarize: Callable[[dict], Summary],
+    ):
+        self.service = service
+        self.endpoint = endpoint  # "movie" / "series"
+        self.id_field = id_field  # Champ des evenements d'historique ("movieId"...)
+        self.total_key = total_key
+        self.fields = fields  # Nom de chaque composante du resume (= cle du total)
+        self.summarize = summarize
+        self.reset()
+
+    def reset(self):
+        self.items: dict[int, Summary] = {}
+        self.pending: set[int] = set()  # Ids signales par webhook, relus a la prochaine synchro
+        self.totals: list[int] = [0] * len(self.fields)
+        self._fingerprint = 0  # XOR des _item_hash()
+        self.synced_at: Optional[datetime] = None  # Marqueur pour history/since
+        self.last_full: Optional[float] = None  # time.monotonic() de la derniere liste complete
+        self.digest: Optional[str] = None
+        self.source: Optional[str] = None  # URL synchronisee
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+        self.items_fetched = 0
+
+    # === Etat ===
+
+    def aggregates(self) -> dict:
+        return {
+            self.total_key: len(self.items),
+            **{name: total for name, total in zip(self.fields, self.totals)},
+        }
+
+    def _set(self, item_id: int, summary: Summary):
+        previous = self.items.get(item_id)
+        if previous is not None:
+            self.totals = [t - p for t, p in zip(self.totals, previous)]
+            self._fingerprint ^= _item_hash(item_id, previous)
+        self.items[item_id] = summary
+        self.totals = [t + s for t, s in zip(self.totals, summary)]
+        self._fingerprint ^= _item_hash(item_id, summary)
+
+    def _drop(self, item_id: int):
+        previous = self.items.pop(item_id, None)
+        if previous is not None:
+            self.totals = [t - p for t, p in zip(self.totals, previous)]
+            self._fingerprint ^= _item_hash(item_id, previous)
+
+    def mark(self, item_ids: list[int]):
+        """Force la relecture d'elements a la prochaine synchro (ajout/suppression hors historique)."""
+        self.pending.update(item_ids)
+
+    def _digest(self) -> str:
+        """Empreinte du catalogue, independante de l'ordre (O(1) : maintenue par _set/_drop)."""
+        return f"{self._fingerprint:016x}"
+
+    # === Synchro ===
+
+    async def refresh(self, client: httpx.AsyncClient, url: str, api_key: str, reconcile_interval: float) -> dict:
+        """Met a jour les resumes (complet ou incremental) et retourne les totaux."""
+        if self.source != url:
+            self.reset()
+            self.source = url
+        headers = {"X-Api-Key": api_key}
+        # Marqueur pris avant les requetes : un changement pendant la synchro sera revu
+        started_at = datetime.now(timezone.utc)
+        due = self.last_full is None or time.monotonic() - self.last_full >= reconcile_interval
+        if self.synced_at is None or due or not await self._incremental(client, url, headers):
+            await self._full(client, url, headers)
+        self.synced_at = started_at
+        return self.aggregates()
+
+    async def _full(self, client: httpx.AsyncClient, url: str, headers: dict):
+        resp = await client.get(f"{url}/api/v3/{self.endpoint}", headers=headers, timeout=TIMEOUT)
+        resp.raise_for_status()
+        previous = self.digest
+        self.items = {}
+        self.totals = [0] * len(self.fields)
+        self._fingerprint = 0
+        for item in resp.json():
+            if item.get("id") is not None:
+                self._set(item["id"], self.summarize(item))
+        self.pending.clear()
+        self.digest = self._digest()
+        self.last_full = time.monotonic()
+        self.full_syncs += 1
+        if previous is not None and previous != self.digest:
+            logger.info("%s: reconciliation, catalogue modifie hors historique", self.service)
+
+    async def _incremental(self, client: httpx.AsyncClient, url: str, headers: dict) -> bool:
+        """Relit les elements cites dans l'historique. False = trop de changements (liste complete)."""
+        resp = await client.get(
+            f"{url}/api/v3/history/since",
+            headers=headers,
+            params={"date": self.synced_at.strftime("%Y-%m-%dT%H:%M:%SZ")},
+            timeout=TIMEOUT,
+        )
+        resp.raise_for_status()
+        changed = {e.get(self.id_field) for e in resp.json() if isinstance(e, dict)} - {None}
+        changed |= self.pending
+        if len(changed) > MAX_INCREMENTAL_ITEMS:
+            return False
+
+        semaphore = asyncio.Semaphore(ITEM_CONCURRENCY)
+
+        async def fetch(item_id: int) -> tuple[int, Optional[dict]]:
+            async with semaphore:
+                r = await client.get(f"{url}/api/v3/{self.endpoint}/{item_id}", headers=headers, timeout=TIMEOUT)
+            if r.status_code == 404:
+                return item_id, None
+            r.raise_for_status()
+            return item_id, r.json()
+
+        for item_id, item in await asyncio.gather(*(fetch(i) for i in changed)):
+            if item is None:
+                self._drop(item_id)
+            else:
+                self._set(item_id, self.summarize(item))
+        self.pending -= changed
+        self.digest = self._digest()
+        self.incremental_syncs += 1
+        self.items_fetched += len(changed)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "items": len(self.items),
+            "full_syncs": self.full_syncs,
+            "incremental_syncs": self.incremental_syncs,
+            "items_fetched": self.items_fetched,
+            "synced_at": self.synced_at.isoformat() if self.synced_at else None,
+        }
+
+
+# Instances globales
+radarr_sync = CatalogSync("radarr", "movie", "movieId", "total_movies", ("monitored",), _radarr_summary)
+sonarr_sync = CatalogSync(
+    "sonarr", "series", "seriesId", "total_series", ("monitored", "total_episodes"), _sonarr_summary,
+)
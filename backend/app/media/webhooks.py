@@ -0,0 +1,94 @@
+"""
+Webhooks entrants des services media : evenement -> pieces du cache a rafraichir.
+
+Formats recus :
+- Plex : multipart/form-data, champ `payload` (JSON), cle `event` (media.play...) ;
+- Radarr / Sonarr : JSON, cle `eventType` (Grab, Download, MovieAdded...) ;
+- Tautulli : agent "Webhook" configure avec un JSON libre contenant `event`
+  (ex: {"event": "{action}"} -> play, stop, watched...).
+
+Seules les pieces touchees sont rafraichies ; un evenement inconnu ne fait rien.
+Les ids d'elements (film, serie) sont remontes pour que la synchro de catalogue
+les relise meme quand l'historique *arr ne les mentionne pas (ajout, suppression).
+
+Aucun de ces services n'envoie d'identifiant de livraison : une relivraison est
+reconnue a l'empreinte de son corps (cf fingerprint, table media_webhook_deliveries).
+"""
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Optional
+
+SERVICES = ("plex", "radarr", "sonarr", "tautulli")
+
+PLEX_EVENTS: dict[str, tuple[str, ...]] = {
+    "media.play": ("plex.sessions", "tautulli.activity"),
+    "media.pause": ("plex.sessions", "tautulli.activity"),
+    "media.resume": ("plex.sessions", "tautulli.activity"),
+    "media.stop": ("plex.sessions", "tautulli.activity"),
+    "media.scrobble": ("tautulli.stats",),
+    "library.new": ("plex.libraries",),
+}
+
+# Radarr et Sonarr partagent la plupart des noms d'evenements
+ARR_EVENTS: dict[str, tuple[str, ...]] = {
+    "Grab": ("activity",),
+    "Download": ("activity", "catalog"),
+    "ManualInteractionRequired": ("activity",),
+    "MovieAdded": ("catalog",),
+    "MovieDelete": ("catalog",),
+    "MovieFileDelete": ("catalog",),
+    "SeriesAdd": ("catalog",),
+    "SeriesDelete": ("catalog",),
+    "EpisodeFileDelete": ("catalog",),
+    "Rename": ("catalog",),
+}
+
+TAUTULLI_EVENTS: dict[str, tuple[str, ...]] = {
+    "play": ("tautulli.activity", "plex.sessions"),
+    "pause": ("tautulli.activity",),
+    "resume": ("tautulli.activity",),
+    "stop": ("tautulli.activity", "plex.sessions"),
+    "buffer": ("tautulli.activity",),
+    "watched": ("tautulli.stats",),
+    "created": ("plex.libraries",),
+}
+
+
+@dataclass
+class WebhookEffect:
+    event: Optional[str]
+    pieces: tuple[str, ...] = ()
+    item_ids: list[int] = field(default_factory=list)  # Elements du catalogue a relire
+
+
+def _arr_item_ids(payload: dict, service: str) -> list[int]:
+    key = "movie" if service == "radarr" else "series"
+    item = payload.get(key)
+    if isinstance(item, dict) and isinstance(item.get("id"), int):
+        return [item["id"]]
+    return []
+
+
+def fingerprint(service: str, payload: dict) -> str:
+    """Empreinte stable d'une livraison (cle de dedup en DB)."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(f"{service}:{canonical}".encode()).hexdigest()
+
+
+def interpret(service: str, payload: dict) -> WebhookEffect:
+    """Traduit un evenement en pieces a rafraichir."""
+    if service == "plex":
+        event = payload.get("event")
+        return WebhookEffect(event, PLEX_EVENTS.get(event, ()))
+    if service in ("radarr", "sonarr"):
+        event = payload.get("eventType")
+        kinds = ARR_EVENTS.get(event, ())
+        effect = WebhookEffect(event, tuple(f"{service}.{kind}" for kind in kinds))
+        if "catalog" in kinds:
+            effect.item_ids = _arr_item_ids(payload, service)
+        return effect
+    if service == "tautulli":
+        event = str(payload.get("event") or payload.get("action") or "").lower() or None
+        return WebhookEffect(event, TAUTULLI_EVENTS.get(event, ()))
+    return WebhookEffect(None)
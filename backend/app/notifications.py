@@ -1,22 +1,36 @@
 """
 Notifications Discord via webhook.
-Non-bloquant, ne crash jamais l'app.
+Non-bloquant, ne crash jamais l'app : les alertes passent par une file videe en
+tache de fond (lots de 10 embeds, respect des 429, dedup sur une fenetre).
 
 Alertes :
 - Scrape fail (3+ consecutifs) + recovery
 - Ratio sous 0.85 (@here)
 - Avertissements actifs (H&R en cours) nouveaux + critique 2+ (@here) - ignore le compteur historique
 - Agent hardware offline >1h (@here) + reconnect
+- Regles de seuil hardware (cf hardware/alerts.py) + retour a la normale
 """
+import asyncio
+import json
 import logging
+import time
 from datetime import datetime, timezone
-
-import httpx
+from typing import Optional
 
 from app.config import get_settings
+from app.http_clients import http_pool
+from app.metrics import metrics
 
 logger = logging.getLogger("dashboard.notifications")
 
+# Limites Discord : 10 embeds par message, 6000 caracteres d'embeds au total
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS = 6000
+QUEUE_SIZE = 500
+# Attente apres le premier embed pour regrouper une rafale en un seul message
+BATCH_WINDOW = 1.0
+MAX_ATTEMPTS = 5
+
 
 def _get_webhook_url() -> str | None:
     settings = get_settings()
@@ -24,20 +38,210 @@ def _get_webhook_url() -> str | None:
     return url if url else None
 
 
+def _embed_size(embed: dict) -> int:
+    return len(json.dumps(embed, ensure_ascii=False))
+
+
+def _dedupe_key(embed: dict, ping_here: bool) -> tuple:
+    """Identite d'une alerte : tout sauf l'horodatage."""
+    content = {k: v for k, v in embed.items() if k != "timestamp"}
+    return (json.dumps(content, sort_keys=True, ensure_ascii=False), ping_here)
+
+
+class NotificationDispatcher:
+    """
+    File d'envoi du webhook Discord, videe par une tache de fond.
+
+    - `submit` ne fait jamais d'I/O : l'appelant (scrape, agent) n'attend pas Discord ;
+    - jusqu'a 10 embeds par appel webhook (rafale = un seul message) ;
+    - 429 : attente de `retry_after` puis renvoi du meme lot ;
+    - alerte identique (hors timestamp) deja en file ou envoyee dans la fenetre :
+      ignoree ; un lot non delivre libere ses cles (la meme alerte repartira).
+    """
+
+    def __init__(self, pool=http_pool):
+        self.pool = pool
+        self.queue: Optional[asyncio.Queue[tuple[dict, bool]]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._carry: Optional[tuple[dict, bool]] = None  # Embed reporte au lot suivant (taille)
+        self._task: Optional[asyncio.Task] = None
+        self._recent: dict[tuple, float] = {}  # cle de dedup -> time.monotonic()
+        self.sent = 0
+        self.batches = 0
+        self.deduped = 0
+        self.dropped = 0
+        self.failed = 0
+        self.rate_limited = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _bind(self):
+        """File rattachee a la boucle courante (creee au premier usage)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+            self._carry = None
+            self._task = None
+
+    def start(self):
+        self._bind()
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 5.0):
+        """Vide la file (borne par `timeout`) puis arrete la tache."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Notifications non envoyees au shutdown: %s", self.queue.qsize())
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def submit(self, embed: dict, ping_here: bool = False):
+        now = time.monotonic()
+        window = get_settings().discord_dedupe_window
+        self._recent = {k: t for k, t in self._recent.items() if now - t < window}
+        key = _dedupe_key(embed, ping_here)
+        if key in self._recent:
+            self.deduped += 1
+            return
+        self._bind()
+        try:
+            self.queue.put_nowait((embed, ping_here))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("File de notifications pleine, alerte ignoree: %s", embed.get("title"))
+            return
+        self._recent[key] = now
+        self.start()
+
+    async def _next_batch(self) -> list[tuple[dict, bool]]:
+        if self._carry is not None:
+            batch, self._carry = [self._carry], None
+        else:
+            batch = [await self.queue.get()]
+        size = _embed_size(batch[0][0])
+        deadline = time.monotonic() + BATCH_WINDOW
+        while len(batch) < MAX_EMBEDS_PER_MESSAGE:
+            if self.queue.empty():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(remaining, 0.1))
+                continue
+            embed, ping = self.queue.get_nowait()
+            size += _embed_size(embed)
+            if size > MAX_EMBED_CHARS:
+                # Trop gros pour ce message : ouvre le lot suivant
+                self._carry = (embed, ping)
+                break
+            batch.append((embed, ping))
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                delivered = await self._post(batch)
+            except Exception as e:
+                logger.warning("Discord notification failed: %s", e)
+                delivered = False
+            try:
+                if not delivered:
+                    self._forget(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _forget(self, batch: list[tuple[dict, bool]]):
+        """Lot perdu : ses alertes ne doivent pas rester dedupliquees toute la fenetre."""
+        self.failed += len(batch)
+        for embed, ping in batch:
+            self._recent.pop(_dedupe_key(embed, ping), None)
+
+    async def _post(self, batch: list[tuple[dict, bool]]) -> bool:
+        """Envoie un lot. True si Discord l'a accepte."""
+        url = _get_webhook_url()
+        if not url:
+            return False
+        payload = {"username": "TrackBoard", "embeds": [embed for embed, _ in batch]}
+        if any(ping for _, ping in batch):
+            payload["content"] = "@here"
+
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                resp = await self.pool.client_for(url).post(url, json=payload)
+            except Exception as e:
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                logger.debug("Discord webhook erreur reseau (%s), nouvel essai", e)
+                await asyncio.sleep(2 ** attempt)
+                continue
+            if resp.status_code in (200, 204):
+                self.sent += len(batch)
+                self.batches += 1
+                return True
+            if resp.status_code == 429 or resp.status_code >= 500:
+                delay = self._retry_after(resp) if resp.status_code == 429 else 2 ** attempt
+                if resp.status_code == 429:
+                    self.rate_limited += 1
+                logger.info("Discord webhook %s, nouvel essai dans %.1fs", resp.status_code, delay)
+                await asyncio.sleep(delay)
+                continue
+            logger.warning("Discord webhook %s: %s", resp.status_code, resp.text[:200])
+            return False
+        logger.warning("Discord webhook : lot de %s alerte(s) abandonne", len(batch))
+        return False
+
+    @staticmethod
+    def _retry_after(resp) -> float:
+        """Delai impose par Discord (corps JSON `retry_after`, sinon en-tete Retry-After)."""
+        try:
+            return float(resp.json().get("retry_after"))
+        except (ValueError, TypeError, AttributeError):
+            pass
+        try:
+            return float(resp.headers.get("retry-after", 1))
+        except ValueError:
+            return 1.0
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "sent": self.sent,
+            "batches": self.batches,
+            "deduped": self.deduped,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+        }
+
+
+# Instance globale (demarree dans le lifespan, ou au premier envoi)
+dispatcher = NotificationDispatcher()
+
+metrics.gauge(
+    "notification_queue_depth", "Alertes Discord en attente d'envoi",
+    fn=lambda: dispatcher.queue.qsize() if dispatcher.queue is not None else 0,
+)
+
+
 async def _send(embed: dict, ping_here: bool = False):
-    """Envoie un embed Discord. Fire-and-forget, ne crash jamais."""
-    url = _get_webhook_url()
-    if not url:
+    """Met un embed Discord en file. Retour immediat, ne crash jamais."""
+    if not _get_webhook_url():
         return
-
     try:
-        payload = {"username": "TrackBoard", "embeds": [embed]}
-        if ping_here:
-            payload["content"] = "@here"
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.post(url, json=payload)
-            if resp.status_code not in (200, 204):
-                logger.warning("Discord webhook %s: %s", resp.status_code, resp.text[:200])
+        dispatcher.submit(embed, ping_here)
     except Exception as e:
         logger.warning("Discord notification failed: %s", e)
 
@@ -137,3 +341,26 @@ async def notify_agent_reconnect():
         "color": 0x44BB44,
         "timestamp": datetime.now(timezone.utc).isoformat(),
     })
+
+
+async def notify_hardware_alert(rule_name: str, metric: str, label: str, value: float, threshold: float,
+                                ping_here: bool = False):
+    """Regle de seuil hardware declenchee."""
+    target = f"{metric} [{label}]" if label else metric
+    await _send({
+        "title": f"Alerte hardware : {rule_name}",
+        "description": f"**{target}** a **{value:.1f}** (seuil : {threshold:g})",
+        "color": 0xFF4444,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }, ping_here=ping_here)
+
+
+async def notify_hardware_alert_resolved(rule_name: str, metric: str, label: str, value: float):
+    """Regle de seuil hardware revenue a la normale."""
+    target = f"{metric} [{label}]" if label else metric
+    await _send({
+        "title": f"Alerte hardware resolue : {rule_name}",
+        "description": f"**{target}** revenu a **{value:.1f}**",
+        "color": 0x44BB44,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    })
@@ -0,0 +1,177 @@
+"""
+Profileur echantillonneur a la demande (admin) pour le backend en production.
+
+`GET /admin/profile?seconds=10` : un thread lit la pile des threads Python toutes
+les `interval_ms` ms pendant N secondes (sys._current_frames), sans instrumenter
+le code : cout nul hors profil, quelques % pendant.
+
+Chaque echantillon du thread de la boucle asyncio est prefixe par la tache en
+cours (`task:<coroutine>`), `loop` si la boucle attend des I/O : un pic CPU se
+rattache a un scrape, a la diffusion WebSocket, etc.
+
+Sortie :
+- `collapsed` : une ligne par pile "racine;...;feuille N" (flamegraph.pl, speedscope) ;
+- `html` : rapport autonome (fonctions par temps propre / cumule + piles).
+"""
+import asyncio
+import html
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import HTMLResponse, PlainTextResponse
+
+from app.auth.jwt import TokenData, get_current_user
+
+router = APIRouter()
+
+MAX_SECONDS = 60
+_profile_lock = asyncio.Lock()
+
+
+def _short_path(filename: str) -> str:
+    for marker in ("site-packages" + os.sep, os.sep + "app" + os.sep, os.sep + "lib" + os.sep):
+        idx = filename.rfind(marker)
+        if idx != -1:
+            return filename[idx + len(marker):]
+    return os.path.basename(filename)
+
+
+class SamplingProfiler:
+    """Echantillonne les piles Python depuis un thread dedie."""
+
+    def __init__(self, interval: float = 0.005, all_threads: bool = False,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.interval = interval
+        self.all_threads = all_threads
+        self.loop = loop
+        self.loop_thread_id = threading.get_ident()  # Construit depuis la boucle
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.elapsed = 0.0
+        self._labels: dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{_short_path(code.co_filename)}:{code.co_qualname}".replace(";", ",")
+        return label
+
+    def _task_label(self) -> str:
+        if self.loop is None:
+            return "loop"
+        # Lecture sans verrou du registre des taches courantes (le GIL suffit)
+        task = getattr(asyncio.tasks, "_current_tasks", {}).get(self.loop)
+        if task is None:
+            return "loop"
+        coro = task.get_coro()
+        return f"task:{getattr(coro, '__qualname__', task.get_name())}"
+
+    def _stack(self, frame: Optional[FrameType]) -> list[str]:
+        stack = []
+        while frame is not None:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def _sample(self):
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()} if self.all_threads else {}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == me:
+                continue
+            if thread_id == self.loop_thread_id:
+                root = self._task_label()
+            elif self.all_threads:
+                root = f"thread:{names.get(thread_id, thread_id)}"
+            else:
+                continue
+            self.stacks[";".join([root] + self._stack(frame))] += 1
+        self.samples += 1
+
+    def _run(self):
+        start = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            self._sample()
+        self.elapsed = time.perf_counter() - start
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    # === Rendu ===
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def functions(self) -> list[tuple[str, int, int]]:
+        """(fonction, echantillons propres, echantillons cumules), par temps propre decroissant."""
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for name in set(frames):
+                total[name] += count
+        return sorted(((name, own[name], total[name]) for name in total), key=lambda r: (-r[1], -r[2]))
+
+    def html(self, top: int = 40) -> str:
+        hits = sum(self.stacks.values()) or 1
+        rows = "".join(
+            f"<tr><td>{html.escape(name)}</td><td>{own}</td><td>{own * 100 / hits:.1f}%</td>"
+            f"<td>{tot}</td><td>{tot * 100 / hits:.1f}%</td></tr>"
+            for name, own, tot in self.functions()[:top]
+        )
+        stacks = html.escape("".join(f"{count:>6}  {stack}\n" for stack, count in self.stacks.most_common(200)))
+        return (
+            "<!doctype html><html><head><meta charset='utf-8'><title>Profil TrackBoard</title>"
+            "<style>body{font-family:monospace;margin:1.5em}table{border-collapse:collapse}"
+            "td,th{border:1px solid #ccc;padding:2px 8px;text-align:left}</style></head><body>"
+            f"<h1>Profil : {self.elapsed:.1f}s, {self.samples} echantillons "
+            f"({self.interval * 1000:.0f} ms)</h1>"
+            "<h2>Fonctions</h2><table><tr><th>Fonction</th><th>Propre</th><th>%</th>"
+            f"<th>Cumule</th><th>%</th></tr>{rows}</table>"
+            f"<h2>Piles (format collapsed)</h2><pre>{stacks}</pre></body></html>"
+        )
+
+
+@router.get("/profile")
+async def profile(
+    seconds: float = Query(default=10, gt=0, le=MAX_SECONDS, description="Duree d'echantillonnage"),
+    interval_ms: float = Query(default=5, ge=1, le=100, description="Periode d'echantillonnage"),
+    format: str = Query(default="collapsed", pattern="^(collapsed|html)$"),
+    all_threads: bool = Query(default=False, description="Inclure les threads (to_thread, agents...)"),
+    user: TokenData = Depends(get_current_user),
+):
+    """
+    Profile le processus en cours pendant `seconds` secondes.
+    Un seul profil a la fois (409 sinon).
+    """
+    if _profile_lock.locked():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Profil deja en cours")
+    async with _profile_lock:
+        profiler = SamplingProfiler(
+            interval=interval_ms / 1000, all_threads=all_threads, loop=asyncio.get_running_loop(),
+        )
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+
+    if format == "html":
+        return HTMLResponse(profiler.html())
+    return PlainTextResponse(profiler.collapsed())
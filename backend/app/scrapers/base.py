@@ -1,21 +1,44 @@
 """
 Classe de base abstraite pour tous les scrapers de trackers.
 """
+import asyncio
 import json
 import logging
 import os
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional
 from dataclasses import dataclass
 from playwright.async_api import Page, Browser, BrowserContext
 import re
 
+from app.metrics import SLOW_BUCKETS, metrics
+from app.scrapers.tracing import span
+
 logger = logging.getLogger("dashboard.scraper")
 
+SCRAPE_STEP_SECONDS = metrics.histogram(
+    "scrape_step_seconds", "Duree de chaque etape Playwright d'un scrape", ("tracker", "step"), SLOW_BUCKETS,
+)
+
 COOKIES_DIR = Path("/app/cookies") if os.path.isdir("/app") else Path("cookies")
 
 
+def _read_json(path: Path) -> Optional[dict]:
+    """Lit un fichier JSON (None s'il n'existe pas). Bloquant : via asyncio.to_thread."""
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return None
+
+
+def _write_json(path: Path, data) -> None:
+    """Ecrit un fichier JSON (dossier cree au besoin). Bloquant : via asyncio.to_thread."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data))
+
+
 @dataclass
 class ScraperConfig:
     """Configuration d'un scraper."""
@@ -96,6 +119,12 @@ class BaseScraper(ABC):
         """
         pass
 
+    @contextmanager
+    def _step(self, step: str):
+        """Chronometre une etape du scrape : histogramme /metrics + span de la trace du run."""
+        with SCRAPE_STEP_SECONDS.time(tracker=self.name, step=step), span(step):
+            yield
+
     def _cookies_path(self) -> Path:
         """Chemin du fichier cookies pour ce tracker."""
         safe_name = re.sub(r'[^a-zA-Z0-9]', '_', self.name).lower()
@@ -104,9 +133,8 @@ class BaseScraper(ABC):
     async def _save_cookies(self, context: BrowserContext) -> None:
         """Sauvegarde les cookies du context pour reutilisation."""
         try:
-            COOKIES_DIR.mkdir(parents=True, exist_ok=True)
             state = await context.storage_state()
-            self._cookies_path().write_text(json.dumps(state))
+            await asyncio.to_thread(_write_json, self._cookies_path(), state)
             logger.info("[%s] Cookies sauvegardes", self.name)
         except Exception as e:
             logger.warning("[%s] Impossible de sauvegarder les cookies: %s", self.name, e)
@@ -114,29 +142,34 @@ class BaseScraper(ABC):
     async def _try_with_cookies(self, browser: Browser) -> Optional[ScrapedStats]:
         """Tente le scraping avec des cookies sauvegardes (skip login)."""
         cookies_path = self._cookies_path()
-        if not cookies_path.exists():
-            return None
-
         try:
-            state = json.loads(cookies_path.read_text())
-            context = await browser.new_context(storage_state=state)
-            page = await context.new_page()
+            # I/O disque hors de la boucle (les scrapes tournent en parallele)
+            state = await asyncio.to_thread(_read_json, cookies_path)
+            if state is None:
+                return None
+            with self._step("context"):
+                context = await browser.new_context(storage_state=state)
+                page = await context.new_page()
             page.set_default_timeout(60000)
 
             try:
                 logger.info("[%s] Tentative avec cookies sauvegardes", self.name)
-                await page.goto(self.profile_url, timeout=90000)
-                await page.wait_for_load_state("networkidle", timeout=30000)
+                with self._step("goto_profile"):
+                    await page.goto(self.profile_url, timeout=90000)
+                with self._step("networkidle"):
+                    await page.wait_for_load_state("networkidle", timeout=30000)
 
                 # Si on est redirige vers /login, les cookies sont expires
                 if "/login" in page.url:
                     logger.info("[%s] Cookies expires, suppression", self.name)
-                    cookies_path.unlink(missing_ok=True)
+                    await asyncio.to_thread(cookies_path.unlink, missing_ok=True)
                     return None
 
-                stats = await self.scrape(page)
+                with self._step("parse"):
+                    stats = await self.scrape(page)
                 # Rafraichir les cookies apres usage reussi
-                await self._save_cookies(context)
+                with self._step("save_cookies"):
+                    await self._save_cookies(context)
                 logger.info("[%s] Scraping termine (via cookies)", self.name)
                 return stats
             finally:
@@ -144,7 +177,7 @@ class BaseScraper(ABC):
 
         except Exception as e:
             logger.warning("[%s] Erreur avec cookies: %s", self.name, e)
-            cookies_path.unlink(missing_ok=True)
+            await asyncio.to_thread(cookies_path.unlink, missing_ok=True)
             return None
 
     async def run(self, browser: Browser) -> ScrapedStats:
@@ -153,33 +186,42 @@ class BaseScraper(ABC):
         Tente d'abord avec des cookies sauvegardes, puis login classique.
         """
         # Essayer avec les cookies sauvegardes
-        result = await self._try_with_cookies(browser)
+        with span("cookies"):
+            result = await self._try_with_cookies(browser)
         if result is not None:
             return result
 
         # Login classique
-        context = await browser.new_context()
-        page = await context.new_page()
+        with self._step("context"):
+            context = await browser.new_context()
+            page = await context.new_page()
         page.set_default_timeout(60000)
 
         try:
             logger.info("[%s] Navigation vers %s", self.name, self.config.login_url)
-            await page.goto(self.config.login_url, timeout=90000)
+            with self._step("goto_login"):
+                await page.goto(self.config.login_url, timeout=90000)
 
-            if not await self.login(page):
+            with self._step("login"):
+                logged_in = await self.login(page)
+            if not logged_in:
                 logger.warning("[%s] Echec du login", self.name)
                 return ScrapedStats(tracker_name=self.name, raw_data={"error": "login_failed"})
 
             # Sauvegarder les cookies apres login reussi
-            await self._save_cookies(context)
+            with self._step("save_cookies"):
+                await self._save_cookies(context)
 
             # Navigation vers le profil
             logger.info("[%s] Navigation vers %s", self.name, self.profile_url)
-            await page.goto(self.profile_url, timeout=90000)
-            await page.wait_for_load_state("networkidle", timeout=30000)
+            with self._step("goto_profile"):
+                await page.goto(self.profile_url, timeout=90000)
+            with self._step("networkidle"):
+                await page.wait_for_load_state("networkidle", timeout=30000)
 
             # Scrape
-            stats = await self.scrape(page)
+            with self._step("parse"):
+                stats = await self.scrape(page)
             logger.info("[%s] Scraping termine", self.name)
             return stats
 
@@ -38,7 +38,7 @@ COOKIE_FILES = {
 
 
 def _load_saved_tiers() -> dict:
-    """Charge les paliers sauvegardes."""
+    """Charge les paliers sauvegardes (bloquant : appele via asyncio.to_thread)."""
     if os.path.exists(TIERS_FILE):
         with open(TIERS_FILE) as f:
             return json.load(f)
@@ -46,7 +46,7 @@ def _load_saved_tiers() -> dict:
 
 
 def _save_tiers(tiers: dict):
-    """Sauvegarde les paliers."""
+    """Sauvegarde les paliers (bloquant : appele via asyncio.to_thread)."""
     with open(TIERS_FILE, "w") as f:
         json.dump(tiers, f, indent=2, ensure_ascii=False)
 
@@ -122,7 +122,7 @@ async def _scrape_tracker_tiers(name: str) -> list[dict] | None:
             cookie_file = COOKIE_FILES.get(name)
             if cookie_file:
                 cpath = f"/app/cookies/{cookie_file}"
-                if not os.path.exists(cpath):
+                if not await asyncio.to_thread(os.path.exists, cpath):
                     logger.warning("[bonus] %s: pas de cookies", name)
                     await browser.close()
                     return None
@@ -173,7 +173,7 @@ async def check_bonus_tiers():
     Compare avec les valeurs sauvegardees, notifie si changement.
     """
     logger.info("[bonus] Debut de la verification hebdomadaire des paliers")
-    saved = _load_saved_tiers()
+    saved = await asyncio.to_thread(_load_saved_tiers)
     current = {}
     changes = []
 
@@ -198,7 +198,7 @@ async def check_bonus_tiers():
 
     # Sauvegarder les nouvelles valeurs
     if current:
-        _save_tiers(current)
+        await asyncio.to_thread(_save_tiers, current)
 
     # Notifier les changements
     if changes:
@@ -0,0 +1,214 @@
+"""
+Election d'un leader entre workers uvicorn : un seul lance le planificateur.
+
+Chaque worker execute le lifespan ; sans election, chaque scrape, check bonus et
+purge de retention tournerait N fois. Le worker elu demarre les boucles du
+planificateur, les autres restent en attente et retentent toutes les TTL/3 s :
+- PostgreSQL : verrou consultatif de session (`pg_try_advisory_lock`) porte par
+  une connexion dediee ; il tombe avec elle (crash, coupure) et un autre worker
+  le prend au tour suivant ;
+- SQLite : bail dans la table leader_leases, renouvele avant expiration
+  (SCHEDULER_LEASE_TTL) ; un worker mort libere la place au plus tard apres un TTL.
+
+Les memes baux servent aux sections exclusives courtes (`acquire_lease`), par
+exemple "un scraping a la fois" partage par tous les workers.
+"""
+import asyncio
+import logging
+import os
+import socket
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional, Union
+
+from sqlalchemy import delete, or_, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.db.database import async_session, engine
+from app.db.models import LeaderLease
+
+logger = logging.getLogger("dashboard.leader")
+
+# Identifiant de ce processus dans les baux
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+Callback = Callable[[], Union[None, Awaitable[None]]]
+
+
+def _advisory_key(name: str) -> int:
+    return zlib.crc32(f"trackboard:{name}".encode())
+
+
+async def acquire_lease(db: AsyncSession, name: str, holder: str, ttl: float, renew: bool = True) -> bool:
+    """
+    Prend ou renouvelle le bail `name` pour `holder`. False si un autre le tient encore.
+    Avec renew=False (section exclusive), un bail encore valide refuse aussi son
+    propre detenteur : deux scrapes du meme worker ne se chevauchent pas.
+    """
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(seconds=ttl)
+    takeover = LeaderLease.expires_at < now
+    if renew:
+        takeover = or_(LeaderLease.holder == holder, takeover)
+    result = await db.execute(
+        update(LeaderLease)
+        .where(LeaderLease.name == name, takeover)
+        .values(holder=holder, expires_at=expires_at)
+    )
+    if result.rowcount:
+        await db.commit()
+        return True
+    # Pas de ligne reprise : bail inexistant (insertion) ou tenu par un autre (conflit)
+    db.add(LeaderLease(name=name, holder=holder, expires_at=expires_at))
+    try:
+        await db.commit()
+        return True
+    except IntegrityError:
+        await db.rollback()
+        return False
+
+
+async def release_lease(db: AsyncSession, name: str, holder: str):
+    await db.execute(delete(LeaderLease).where(LeaderLease.name == name, LeaderLease.holder == holder))
+    await db.commit()
+
+
+async def lease_holder(db: AsyncSession, name: str) -> Optional[str]:
+    """Detenteur actuel du bail (None si libre ou expire)."""
+    return (await db.execute(
+        select(LeaderLease.holder).where(
+            LeaderLease.name == name, LeaderLease.expires_at >= datetime.now(timezone.utc),
+        )
+    )).scalar()
+
+
+class LeaderElection:
+    """Maintient (ou attend) le role de leader et notifie les changements."""
+
+    def __init__(self, name: str, ttl: float = 30, worker_id: str = WORKER_ID):
+        self.name = name
+        self.ttl = ttl
+        self.worker_id = worker_id
+        self.is_leader = False
+        self.elected_at: Optional[datetime] = None
+        self.transitions = 0
+        self._on_elected: Optional[Callback] = None
+        self._on_lost: Optional[Callback] = None
+        self._conn: Optional[AsyncConnection] = None  # PostgreSQL : porte le verrou
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def backend(self) -> str:
+        return "advisory_lock" if engine.dialect.name == "postgresql" else "lease"
+
+    def start(self, on_elected: Callback, on_lost: Callback):
+        if self._task is not None and not self._task.done():
+            return
+        self._on_elected = on_elected
+        self._on_lost = on_lost
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader:
+            await self._set_leader(False)
+        try:
+            await self._release()
+        except Exception as e:
+            logger.warning("Liberation du role %s impossible: %s", self.name, e)
+
+    async def _run(self):
+        while True:
+            try:
+                leader = await self._try_lead()
+            except Exception as e:
+                logger.warning("Election %s: base injoignable (%s)", self.name, e)
+                leader = False
+            if leader != self.is_leader:
+                await self._set_leader(leader)
+            await asyncio.sleep(self.ttl / 3)
+
+    async def _set_leader(self, leader: bool):
+        self.is_leader = leader
+        self.transitions += 1
+        self.elected_at = datetime.now(timezone.utc) if leader else None
+        logger.info("%s %s (%s)", self.worker_id, "elu leader" if leader else "n'est plus leader", self.name)
+        callback = self._on_elected if leader else self._on_lost
+        if callback is not None:
+            result = callback()
+            if asyncio.iscoroutine(result):
+                await result
+
+    async def _try_lead(self) -> bool:
+        if self.backend == "advisory_lock":
+            return await self._advisory_lock()
+        async with async_session() as db:
+            return await acquire_lease(db, self.name, self.worker_id, self.ttl)
+
+    async def _advisory_lock(self) -> bool:
+        if self._conn is not None:
+            try:
+                # Connexion vivante = verrou toujours detenu
+                await self._conn.execute(text("SELECT 1"))
+                await self._conn.commit()
+                return True
+            except Exception:
+                await self._drop_connection()
+                raise
+        conn = await engine.connect()
+        try:
+            acquired = (await conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": _advisory_key(self.name)},
+            )).scalar()
+            # Verrou de session : il survit au commit, pas de transaction laissee ouverte
+            await conn.commit()
+        except Exception:
+            await conn.close()
+            raise
+        if acquired:
+            self._conn = conn
+            return True
+        await conn.close()
+        return False
+
+    async def _drop_connection(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                await conn.invalidate()
+            except Exception:
+                pass
+
+    async def _release(self):
+        if self._conn is not None:
+            await self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _advisory_key(self.name)})
+            await self._conn.commit()
+            await self._conn.close()
+            self._conn = None
+        elif self.backend == "lease":
+            async with async_session() as db:
+                await release_lease(db, self.name, self.worker_id)
+
+    def stats(self) -> dict:
+        return {
+            "worker": self.worker_id,
+            "backend": self.backend,
+            "role": "leader" if self.is_leader else "follower",
+            "elected_at": self.elected_at.isoformat() if self.elected_at else None,
+            "transitions": self.transitions,
+        }
+
+
+# Instance globale (demarree dans le lifespan)
+scheduler_leader = LeaderElection("scheduler")
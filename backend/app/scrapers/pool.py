@@ -0,0 +1,195 @@
+"""
+Pool de processus de scrape (SCRAPE_MODE=process).
+
+Playwright et Chromium ne tournent plus dans la boucle qui sert l'API et les
+WebSockets hardware : chaque tracker est un job de la table scrape_jobs, execute
+par un processus `python -m app.scrapers.worker <job_id>` (SCRAPE_WORKERS au plus
+en parallele). Limites par job :
+- CPU : RLIMIT_CPU (SCRAPE_JOB_CPU_SECONDS), pose par le worker lui-meme avant
+  de lancer Chromium qui en herite (pas de preexec_fn : le processus API a des
+  threads, un fork + code Python avant exec peut s'y bloquer) ;
+- memoire : RSS cumulee du groupe de processus (worker + Chromium), relevee
+  chaque seconde dans /proc (SCRAPE_JOB_MEMORY_MB) ; pas de RLIMIT_AS, Chromium
+  reserve des Go d'espace d'adressage sans les utiliser ;
+- duree : SCRAPE_JOB_TIMEOUT.
+Au-dela, le chien de garde tue tout le groupe (SIGKILL) et le job passe `killed`.
+Les processus Chromium orphelins sont tues de la meme facon en fin de job.
+"""
+import asyncio
+import logging
+import os
+import signal
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from app.config import get_settings
+from app.db.database import async_session
+from app.db.models import ScrapeJob
+from app.metrics import metrics
+
+logger = logging.getLogger("dashboard.scraper.pool")
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+WATCH_INTERVAL = 1.0
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+SCRAPE_JOBS = metrics.counter("scrape_jobs_total", "Jobs de scrape hors processus par issue", ("outcome",))
+
+
+def group_rss_mb(pgid: int) -> float:
+    """RSS cumulee (Mo) des processus du groupe `pgid` (0 hors Linux). Bloquant : via to_thread."""
+    total = 0
+    try:
+        entries = os.scandir("/proc")
+    except OSError:
+        return 0.0
+    with entries:
+        for entry in entries:
+            if not entry.name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry.name}/stat") as f:
+                    stat = f.read()
+                # Le nom (2e champ) peut contenir des espaces : on repart de la parenthese fermante
+                fields = stat.rsplit(")", 1)[1].split()
+                if int(fields[2]) == pgid:  # pgrp
+                    total += int(fields[21]) * PAGE_SIZE  # rss (pages)
+            except (OSError, ValueError, IndexError):
+                continue
+    return total / (1024 * 1024)
+
+
+class ScrapePool:
+    """Execute les jobs de scrape dans des processus limites et surveilles."""
+
+    def __init__(
+        self,
+        size: int = 2,
+        timeout: float = 300,
+        memory_mb: int = 1536,
+        cpu_seconds: int = 240,
+        command: Optional[list[str]] = None,
+    ):
+        self.size = size
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.cpu_seconds = cpu_seconds
+        self.command = command or [sys.executable, "-m", "app.scrapers.worker"]
+        self.session_factory = async_session
+        self.processes: dict[int, asyncio.subprocess.Process] = {}  # job_id -> processus
+        self.outcomes: dict[str, int] = {}
+
+    @classmethod
+    def from_settings(cls) -> "ScrapePool":
+        settings = get_settings()
+        return cls(
+            size=settings.scrape_workers,
+            timeout=settings.scrape_job_timeout,
+            memory_mb=settings.scrape_job_memory_mb,
+            cpu_seconds=settings.scrape_job_cpu_seconds,
+        )
+
+    async def run(self, names: list[str], on_done: Callable[[ScrapeJob], Awaitable[None]]):
+        """Cree un job par tracker, les execute (`size` a la fois) et remet chaque job termine a `on_done`."""
+        job_ids = await self._enqueue(names)
+        semaphore = asyncio.Semaphore(self.size)
+
+        async def one(job_id: int):
+            async with semaphore:
+                job = await self._execute(job_id)
+            await on_done(job)
+
+        await asyncio.gather(*(one(job_id) for job_id in job_ids))
+
+    async def _enqueue(self, names: list[str]) -> list[int]:
+        async with self.session_factory() as db:
+            jobs = [ScrapeJob(tracker_name=name, status="queued") for name in names]
+            db.add_all(jobs)
+            await db.commit()
+            return [job.id for job in jobs]
+
+    async def _execute(self, job_id: int) -> ScrapeJob:
+        started = time.monotonic()
+        reason: Optional[str] = None
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *self.command, str(job_id), str(self.cpu_seconds),
+                cwd=BACKEND_DIR,
+                start_new_session=True,  # Groupe dedie : Chromium tue avec le worker
+            )
+        except OSError as e:
+            return await self._finalize(job_id, None, None, 0.0, error=f"Lancement du processus impossible: {e}")
+
+        self.processes[job_id] = proc
+        try:
+            reason = await self._watch(proc, started)
+        finally:
+            self.processes.pop(job_id, None)
+            self._kill_group(proc.pid)  # Restes eventuels (Chromium orphelin)
+        return await self._finalize(job_id, proc.returncode, reason, time.monotonic() - started)
+
+    async def _watch(self, proc: asyncio.subprocess.Process, started: float) -> Optional[str]:
+        """Attend la fin du processus ; le tue s'il depasse ses limites. Retourne la raison du kill."""
+        while True:
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=WATCH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                return "cpu" if proc.returncode == -signal.SIGXCPU else None
+
+            elapsed = time.monotonic() - started
+            if elapsed > self.timeout:
+                reason = f"timeout ({elapsed:.0f}s > {self.timeout:.0f}s)"
+            elif self.memory_mb and (rss := await asyncio.to_thread(group_rss_mb, proc.pid)) > self.memory_mb:
+                reason = f"memoire ({rss:.0f} Mo > {self.memory_mb} Mo)"
+            else:
+                continue
+            logger.warning("Job de scrape (pid %s) tue: %s", proc.pid, reason)
+            self._kill_group(proc.pid)
+            await proc.wait()
+            return reason
+
+    @staticmethod
+    def _kill_group(pgid: int):
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    async def _finalize(self, job_id: int, returncode: Optional[int], reason: Optional[str],
+                        elapsed: float, error: Optional[str] = None) -> ScrapeJob:
+        """Complete la ligne du job si le processus n'a pas pu le faire (tue, crash)."""
+        async with self.session_factory() as db:
+            job = await db.get(ScrapeJob, job_id)
+            if reason is not None:
+                job.status = "killed"
+                job.error = f"Processus de scrape arrete: {reason}"
+            elif job.status in ("queued", "running"):
+                job.status = "failed"
+                job.error = error or f"Processus de scrape termine sans resultat (code {returncode})"
+            if job.finished_at is None:
+                job.finished_at = datetime.now(timezone.utc)
+            if job.duration_ms is None:
+                job.duration_ms = round(elapsed * 1000, 1)
+            await db.commit()
+        self.outcomes[job.status] = self.outcomes.get(job.status, 0) + 1
+        SCRAPE_JOBS.inc(outcome=job.status)
+        return job
+
+    def stats(self) -> dict:
+        return {
+            "mode": get_settings().scrape_mode,
+            "size": self.size,
+            "running": len(self.processes),
+            "outcomes": dict(self.outcomes),
+        }
+
+
+# Instance globale
+scrape_pool = ScrapePool.from_settings()
+
+metrics.gauge("scrape_workers_busy", "Processus de scrape en cours", fn=lambda: len(scrape_pool.processes))
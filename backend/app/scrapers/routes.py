@@ -3,12 +3,13 @@ Routes API pour les scrapers.
 """
 import asyncio
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from datetime import datetime, timezone
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
 from sqlalchemy import select
 from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from playwright.async_api import async_playwright
@@ -16,8 +17,9 @@ from playwright.async_api import async_playwright
 logger = logging.getLogger("dashboard.scraper")
 
 from app.auth.jwt import get_current_user, TokenData
-from app.db.database import async_session
-from app.db.models import TrackerStats, ScraperState
+from app.config import get_settings
+from app.db.database import async_session, get_db
+from app.db.models import TrackerStats, ScraperState, ScrapeJob, ScrapeRun
 from app.scrapers.registry import (
     get_scrapers,
     get_scraper,
@@ -25,16 +27,26 @@ from app.scrapers.registry import (
     list_all_sites,
 )
 from app.scrapers.base import ScrapedStats
+from app.scrapers.leader import WORKER_ID, acquire_lease, lease_holder, release_lease
+from app.scrapers.pool import scrape_pool
+from app.scrapers.tracing import ScrapeTrace, resume_trace, span, start_trace, step_stats
+from app.metrics import SLOW_BUCKETS, metrics
 from app.notifications import (
     notify_scrape_failures, notify_scrape_recovery,
     notify_ratio_critical, notify_hit_and_run, notify_hit_and_run_critical,
     notify_parser_suspect,
 )
 
+SCRAPE_SECONDS = metrics.histogram(
+    "scrape_duration_seconds", "Duree totale d'un scrape (navigateur + DB)", ("tracker", "status"), SLOW_BUCKETS,
+)
+
 router = APIRouter()
 
-# Flag pour eviter les scrapes simultanees
-_scraping_in_progress = False
+# Bail partage "scraping en cours" : un seul scraping a la fois, tous workers confondus.
+# Le TTL ne sert qu'a liberer le bail d'un worker mort en plein scraping.
+SCRAPE_LEASE = "scraping"
+SCRAPE_LEASE_TTL = 3600
 
 
 @dataclass
@@ -46,12 +58,26 @@ class ScrapeResult:
     last_error: str | None = None
     consecutive_failures: int = 0
     last_known_active_warnings: int = 0  # Pour detecter les nouveaux avertissements actifs (H&R en cours)
-    parser_suspect: bool = False  # In-memory only : dedupe l'alerte Discord "parser casse"
+    parser_suspect: bool = False  # Dedupe l'alerte Discord "parser casse"
 
 
+# Copie de travail du worker qui scrape ; la reference partagee est la table scraper_state
 _scrape_results: dict[str, ScrapeResult] = {}
 
 
+def _result_from_row(row: ScraperState) -> ScrapeResult:
+    return ScrapeResult(
+        tracker_name=row.tracker_name,
+        status=row.status or "ok",
+        last_success_at=row.last_success_at,
+        last_attempt_at=row.last_attempt_at,
+        last_error=row.last_error,
+        consecutive_failures=row.consecutive_failures or 0,
+        last_known_active_warnings=row.last_known_active_warnings or 0,
+        parser_suspect=bool(row.parser_suspect),
+    )
+
+
 async def load_scraper_state_from_db() -> None:
     """
     Restaure _scrape_results depuis la DB au démarrage.
@@ -63,18 +89,26 @@ async def load_scraper_state_from_db() -> None:
         async with async_session() as db:
             result = await db.execute(select(ScraperState))
             for row in result.scalars().all():
-                _scrape_results[row.tracker_name] = ScrapeResult(
-                    tracker_name=row.tracker_name,
-                    status="ok",
-                    last_success_at=row.last_success_at,
-                    consecutive_failures=row.consecutive_failures or 0,
-                    last_known_active_warnings=row.last_known_active_warnings or 0,
-                )
+                _scrape_results[row.tracker_name] = _result_from_row(row)
         logger.info("Etat scraper restaure depuis la DB: %d tracker(s)", len(_scrape_results))
     except Exception as e:
         logger.warning("Impossible de restaurer l'etat scraper (premier run ?): %s", e)
 
 
+async def _refresh_scrape_result(name: str) -> None:
+    """
+    Recharge l'etat d'un tracker avant de le scraper : le scrape precedent a pu
+    tourner dans un autre worker (compteurs d'echecs, avertissements connus).
+    """
+    try:
+        async with async_session() as db:
+            row = await db.get(ScraperState, name)
+        if row is not None:
+            _scrape_results[name] = _result_from_row(row)
+    except Exception as e:
+        logger.warning("Etat scraper %s non recharge: %s", name, e)
+
+
 async def _persist_scraper_state(name: str) -> None:
     """Upsert l'état courant d'un tracker en DB. Appelé après chaque scrape."""
     sr = _scrape_results.get(name)
@@ -82,11 +116,16 @@ async def _persist_scraper_state(name: str) -> None:
         return
     try:
         async with async_session() as db:
-            stmt = pg_insert(ScraperState).values(
+            insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+            stmt = insert(ScraperState).values(
                 tracker_name=sr.tracker_name,
                 consecutive_failures=sr.consecutive_failures,
                 last_success_at=sr.last_success_at,
                 last_known_active_warnings=sr.last_known_active_warnings,
+                status=sr.status,
+                last_attempt_at=sr.last_attempt_at,
+                last_error=sr.last_error,
+                parser_suspect=sr.parser_suspect,
             )
             stmt = stmt.on_conflict_do_update(
                 index_elements=["tracker_name"],
@@ -94,6 +133,10 @@ async def _persist_scraper_state(name: str) -> None:
                     "consecutive_failures": stmt.excluded.consecutive_failures,
                     "last_success_at": stmt.excluded.last_success_at,
                     "last_known_active_warnings": stmt.excluded.last_known_active_warnings,
+                    "status": stmt.excluded.status,
+                    "last_attempt_at": stmt.excluded.last_attempt_at,
+                    "last_error": stmt.excluded.last_error,
+                    "parser_suspect": stmt.excluded.parser_suspect,
                     "updated_at": datetime.now(timezone.utc),
                 },
             )
@@ -103,6 +146,35 @@ async def _persist_scraper_state(name: str) -> None:
         logger.warning("Echec persist etat scraper %s: %s", name, e)
 
 
+async def read_scraper_states(db: AsyncSession) -> dict[str, dict]:
+    """Etat de chaque tracker tel que vu par tous les workers (table scraper_state)."""
+    rows = (await db.execute(select(ScraperState).order_by(ScraperState.tracker_name))).scalars().all()
+    return {
+        row.tracker_name: {
+            "status": row.status or "ok",
+            "last_success_at": row.last_success_at.isoformat() if row.last_success_at else None,
+            "last_attempt_at": row.last_attempt_at.isoformat() if row.last_attempt_at else None,
+            "last_error": row.last_error,
+            "consecutive_failures": row.consecutive_failures or 0,
+        }
+        for row in rows
+    }
+
+
+async def claim_scraping() -> bool:
+    """Prend le bail de scraping partage. False si un scraping tourne deja (ce worker ou un autre)."""
+    async with async_session() as db:
+        return await acquire_lease(db, SCRAPE_LEASE, WORKER_ID, SCRAPE_LEASE_TTL, renew=False)
+
+
+async def release_scraping() -> None:
+    try:
+        async with async_session() as db:
+            await release_lease(db, SCRAPE_LEASE, WORKER_ID)
+    except Exception as e:
+        logger.warning("Bail de scraping non libere (expire dans %ds): %s", SCRAPE_LEASE_TTL, e)
+
+
 class ScrapeStatus(BaseModel):
     """Status d'un scrape."""
     status: str
@@ -149,19 +221,17 @@ async def run_all_scrapers(
     Lance le scraping de tous les trackers configures.
     Le scraping s'execute en arriere-plan.
     """
-    global _scraping_in_progress
+    scrapers = get_scrapers()
+    if not scrapers:
+        raise HTTPException(status_code=500, detail="Aucun scraper configure")
 
-    if _scraping_in_progress:
+    if not await claim_scraping():
         return ScrapeStatus(
             status="busy",
             message="Un scraping est deja en cours. Reessayez dans quelques minutes."
         )
 
-    scrapers = get_scrapers()
-    if not scrapers:
-        raise HTTPException(status_code=500, detail="Aucun scraper configure")
-
-    # Lancer en arriere-plan
+    # Lancer en arriere-plan (le bail est libere a la fin de la tache)
     background_tasks.add_task(run_scraping_task)
 
     return ScrapeStatus(
@@ -177,18 +247,16 @@ async def run_single_scraper(
     user: TokenData = Depends(get_current_user),
 ):
     """Lance le scraping d'un tracker specifique."""
-    global _scraping_in_progress
+    scraper = get_scraper(tracker_name)
+    if not scraper:
+        raise HTTPException(status_code=404, detail=f"Tracker '{tracker_name}' non trouve ou non configure")
 
-    if _scraping_in_progress:
+    if not await claim_scraping():
         return ScrapeStatus(
             status="busy",
             message="Un scraping est deja en cours."
         )
 
-    scraper = get_scraper(tracker_name)
-    if not scraper:
-        raise HTTPException(status_code=404, detail=f"Tracker '{tracker_name}' non trouve ou non configure")
-
     background_tasks.add_task(run_scraping_task, tracker_name=tracker_name)
 
     return ScrapeStatus(
@@ -225,6 +293,31 @@ def _detect_parser_suspect(stats) -> tuple[bool, str]:
 async def _scrape_single(name: str, scraper, browser) -> None:
     """Scrape un tracker et sauvegarde en DB."""
     now = datetime.now(timezone.utc)
+    trace = start_trace(name)
+    stats, error = None, None
+    try:
+        logger.info("Demarrage: %s", name)
+        stats = await scraper.run(browser)
+    except Exception as e:
+        error = str(e)
+    await _record_scrape(name, now, stats, error, trace)
+
+
+async def _record_scrape_job(job: ScrapeJob) -> None:
+    """Enregistre le resultat d'un job execute par le pool de processus."""
+    stats, error = None, job.error
+    if job.status == "done" and isinstance(job.result, dict):
+        known = {f.name for f in fields(ScrapedStats)}
+        stats = ScrapedStats(**{k: v for k, v in job.result.items() if k in known})
+    trace = resume_trace(job.tracker_name, job.started_at or job.created_at, job.spans, job.duration_ms or 0.0)
+    await _record_scrape(job.tracker_name, job.started_at or job.created_at, stats, error, trace)
+
+
+async def _record_scrape(
+    name: str, now: datetime, stats: Optional[ScrapedStats], error: Optional[str], trace: ScrapeTrace,
+) -> None:
+    """Issue d'un scrape (ici ou dans un processus de scrape) : stats en DB, etat, notifications, trace."""
+    await _refresh_scrape_result(name)
 
     # Initialiser l'entree si elle n'existe pas encore
     if name not in _scrape_results:
@@ -233,10 +326,11 @@ async def _scrape_single(name: str, scraper, browser) -> None:
     _scrape_results[name].last_attempt_at = now
 
     try:
-        logger.info("Demarrage: %s", name)
-        stats = await scraper.run(browser)
-        async with async_session() as db:
-            saved = await save_stats_to_db(db, stats)
+        if stats is None:
+            raise RuntimeError(error or "scrape sans resultat")
+        with span("save_db"):
+            async with async_session() as db:
+                saved = await save_stats_to_db(db, stats)
 
         if saved:
             prev_failures = _scrape_results[name].consecutive_failures
@@ -299,37 +393,68 @@ async def _scrape_single(name: str, scraper, browser) -> None:
         logger.error("Erreur %s: %s", name, e)
         await notify_scrape_failures(name, _scrape_results[name].consecutive_failures, str(e))
 
+    SCRAPE_SECONDS.observe(trace.elapsed_ms / 1000, tracker=name, status=_scrape_results[name].status)
+    trace.finish()
+
     # Persister l'etat (compteurs) pour survivre aux restart du container.
     await _persist_scraper_state(name)
+    await _persist_scrape_run(trace, _scrape_results[name].status)
+
+
+async def _persist_scrape_run(trace: ScrapeTrace, status: str) -> None:
+    """Enregistre la chronologie du run (table scrape_runs)."""
+    try:
+        async with async_session() as db:
+            db.add(ScrapeRun(
+                tracker_name=trace.tracker,
+                started_at=trace.started_at,
+                duration_ms=round(trace.elapsed_ms, 1),
+                status=status,
+                spans=trace.spans,
+            ))
+            await db.commit()
+    except Exception as e:
+        logger.warning("Trace du scrape %s non enregistree: %s", trace.tracker, e)
 
 
 async def run_scraping_task(db: AsyncSession = None, tracker_name: Optional[str] = None):
     """
     Tache de scraping (executee en arriere-plan).
     Tous les trackers sont scrapes en parallele.
+    L'appelant a pris le bail de scraping (claim_scraping), libere ici.
     """
-    global _scraping_in_progress
-    _scraping_in_progress = True
-
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
+        scrapers = get_scrapers()
+        if tracker_name:
+            scrapers = {tracker_name: scrapers[tracker_name]}
+        await scrape_trackers(scrapers)
 
-            scrapers = get_scrapers()
-            if tracker_name:
-                scrapers = {tracker_name: scrapers[tracker_name]}
+    finally:
+        await release_scraping()
 
-            # Scraper tous les trackers en parallele
-            tasks = [
-                _scrape_single(name, scraper, browser)
-                for name, scraper in scrapers.items()
-            ]
-            await asyncio.gather(*tasks)
 
-            await browser.close()
+async def scrape_trackers(scrapers: dict) -> None:
+    """
+    Scrape les trackers en parallele, selon SCRAPE_MODE :
+    - inline : un Chromium partage, pilote depuis la boucle de l'API ;
+    - process : un processus de scrape par tracker (cf pool.py), l'API ne fait
+      qu'enregistrer les resultats.
+    """
+    if get_settings().scrape_mode == "process":
+        await scrape_pool.run(list(scrapers), _record_scrape_job)
+        return
 
-    finally:
-        _scraping_in_progress = False
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+
+        # Scraper tous les trackers en parallele
+        tasks = [
+            _scrape_single(name, scraper, browser)
+            for name, scraper in scrapers.items()
+        ]
+        await asyncio.gather(*tasks)
+
+        await browser.close()
 
 
 async def save_stats_to_db(db: AsyncSession, stats: ScrapedStats) -> bool:
@@ -385,20 +510,43 @@ async def save_stats_to_db(db: AsyncSession, stats: ScrapedStats) -> bool:
 
 
 @router.get("/status")
-async def get_scraper_status():
-    """Retourne le status du scraper."""
-    tracker_status = {}
-    for name, sr in _scrape_results.items():
-        tracker_status[name] = {
-            "status": sr.status,
-            "last_success_at": sr.last_success_at.isoformat() if sr.last_success_at else None,
-            "last_attempt_at": sr.last_attempt_at.isoformat() if sr.last_attempt_at else None,
-            "last_error": sr.last_error,
-            "consecutive_failures": sr.consecutive_failures,
-        }
-
+async def get_scraper_status(db: AsyncSession = Depends(get_db)):
+    """Retourne le status du scraper (identique quel que soit le worker interroge)."""
     return {
-        "scraping_in_progress": _scraping_in_progress,
+        "scraping_in_progress": await lease_holder(db, SCRAPE_LEASE) is not None,
         "configured_scrapers": list_available_scrapers(),
-        "tracker_status": tracker_status,
+        "tracker_status": await read_scraper_states(db),
     }
+
+
+@router.get("/runs")
+async def get_scrape_runs(
+    tracker: Optional[str] = Query(default=None, description="Filtrer sur un tracker"),
+    limit: int = Query(default=20, ge=1, le=200),
+    user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Derniers runs de scrape avec leur chronologie d'etapes."""
+    query = select(ScrapeRun).order_by(ScrapeRun.started_at.desc()).limit(limit)
+    if tracker:
+        query = query.where(ScrapeRun.tracker_name == tracker)
+    runs = (await db.execute(query)).scalars().all()
+    return {"runs": [run.to_dict() for run in runs]}
+
+
+@router.get("/runs/steps")
+async def get_scrape_step_stats(
+    tracker: Optional[str] = Query(default=None, description="Filtrer sur un tracker"),
+    runs: int = Query(default=50, ge=1, le=500, description="Nombre de runs recents analyses"),
+    user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Duree de chaque etape (p50/p95/max en ms) sur les runs recents.
+    Etapes triees par p95 decroissant : les plus lentes en tete.
+    """
+    query = select(ScrapeRun.spans).order_by(ScrapeRun.started_at.desc()).limit(runs)
+    if tracker:
+        query = query.where(ScrapeRun.tracker_name == tracker)
+    rows = (await db.execute(query)).scalars().all()
+    return {"tracker": tracker, "runs": len(rows), "steps": step_stats(list(rows))}
@@ -3,19 +3,24 @@ Planificateur de scraping automatique.
 - Scrapes reguliers : 8h, 14h, 20h (Europe/Paris)
 - Check bonus tiers : mercredi 3h00 (1x/semaine)
 - Nettoyage retention : tous les jours 4h00 (purge data > 365j)
+
+Avec plusieurs workers, seul le leader elu (cf leader.py) fait tourner ces boucles :
+main.py passe start_scheduler/stop_scheduler a l'election.
 """
 import asyncio
 import logging
 from datetime import datetime, timezone, timedelta, time as dt_time
 from zoneinfo import ZoneInfo
 
-from playwright.async_api import async_playwright
 from sqlalchemy import delete
 
+from app.db.counters import row_counters
 from app.db.database import async_session
-from app.db.models import TrackerStats, HardwareSnapshot
+from app.db.models import (
+    TrackerStats, HardwareSnapshot, HardwareDiskSample, HardwareDiskTemp, MediaWebhookDelivery, ScrapeJob, ScrapeRun,
+)
 from app.scrapers.registry import get_scrapers
-from app.scrapers.routes import _scrape_single
+from app.scrapers.routes import claim_scraping, release_scraping, scrape_trackers
 
 logger = logging.getLogger("dashboard.scheduler")
 
@@ -58,24 +63,20 @@ async def _run_scheduled_scrape():
         logger.warning("Aucun scraper configure, scraping automatique ignore")
         return
 
+    # Meme bail que les scrapes manuels : pas de chevauchement avec un /scrapers/run
+    if not await claim_scraping():
+        logger.warning("Scraping deja en cours, cycle automatique ignore")
+        return
+
     logger.info("Scraping automatique demarre pour %d tracker(s)", len(scrapers))
     start = datetime.now(timezone.utc)
 
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-
-            # Scraper tous les trackers en parallele
-            tasks = [
-                _scrape_single(name, scraper, browser)
-                for name, scraper in scrapers.items()
-            ]
-            await asyncio.gather(*tasks)
-
-            await browser.close()
-
+        await scrape_trackers(scrapers)
     except Exception as e:
         logger.error("Erreur globale scraping automatique: %s", e)
+    finally:
+        await release_scraping()
 
     elapsed = (datetime.now(timezone.utc) - start).total_seconds()
     logger.info("Scraping automatique termine en %.1fs", elapsed)
@@ -161,13 +162,27 @@ def _seconds_until_next_retention() -> float:
 
 
 async def _run_retention_cleanup() -> None:
-    """Supprime les lignes tracker_stats et hardware_snapshots plus vieilles que RETENTION_DAYS."""
+    """
+    Supprime les lignes tracker_stats, hardware_snapshots, scrape_runs et scrape_jobs plus vieilles
+    que RETENTION_DAYS, et les empreintes de webhooks media de plus d'un jour.
+    """
     cutoff = datetime.now(timezone.utc) - timedelta(days=RETENTION_DAYS)
     try:
         async with async_session() as db:
             r1 = await db.execute(delete(TrackerStats).where(TrackerStats.scraped_at < cutoff))
+            # Enfants d'abord (ON DELETE CASCADE pas garanti sous SQLite)
+            await db.execute(delete(HardwareDiskSample).where(HardwareDiskSample.recorded_at < cutoff))
+            await db.execute(delete(HardwareDiskTemp).where(HardwareDiskTemp.recorded_at < cutoff))
             r2 = await db.execute(delete(HardwareSnapshot).where(HardwareSnapshot.recorded_at < cutoff))
+            await db.execute(delete(ScrapeRun).where(ScrapeRun.started_at < cutoff))
+            await db.execute(delete(ScrapeJob).where(ScrapeJob.created_at < cutoff))
+            # Empreintes de webhooks : utiles seulement pendant la fenetre de dedup
+            await db.execute(delete(MediaWebhookDelivery).where(
+                MediaWebhookDelivery.received_at < datetime.now(timezone.utc) - timedelta(days=1)
+            ))
             await db.commit()
+            row_counters.purged("tracker_stats", r1.rowcount or 0)
+            row_counters.purged("hardware_snapshots", r2.rowcount or 0)
             logger.info(
                 "Retention %dj : purge %d tracker_stats + %d hardware_snapshots",
                 RETENTION_DAYS, r1.rowcount or 0, r2.rowcount or 0,
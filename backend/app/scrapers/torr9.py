@@ -18,6 +18,7 @@ import re
 from playwright.async_api import Page, Browser
 
 from app.scrapers.base import BaseScraper, ScraperConfig, ScrapedStats
+from app.scrapers.tracing import span
 
 logger = logging.getLogger("dashboard.scraper")
 
@@ -82,18 +83,23 @@ class Torr9Scraper(BaseScraper):
 
     async def run(self, browser: Browser) -> ScrapedStats:
         """Override : Torr9 n'a pas de page profil standard, on enchaine login + stats + tokens."""
-        context = await browser.new_context()
-        page = await context.new_page()
+        with self._step("context"):
+            context = await browser.new_context()
+            page = await context.new_page()
         page.set_default_timeout(60000)
 
         try:
             logger.info("[%s] Navigation vers %s", self.name, self.config.login_url)
-            await page.goto(self.config.login_url, timeout=90000)
+            with self._step("goto_login"):
+                await page.goto(self.config.login_url, timeout=90000)
 
-            if not await self.login(page):
+            with self._step("login"):
+                logged_in = await self.login(page)
+            if not logged_in:
                 return ScrapedStats(tracker_name=self.name, raw_data={"error": "login_failed"})
 
-            return await self._gather(page)
+            with self._step("parse"):
+                return await self._gather(page)
 
         except Exception as e:
             logger.error("[%s] Erreur: %s", self.name, e)
@@ -114,9 +120,11 @@ class Torr9Scraper(BaseScraper):
         # 1. /stats (peut etre en maintenance, on ne plante pas)
         try:
             logger.info("[%s] Navigation vers %s", self.name, STATS_URL)
-            await page.goto(STATS_URL, timeout=60000)
+            with span("goto_stats"):
+                await page.goto(STATS_URL, timeout=60000)
             try:
-                await page.wait_for_load_state('networkidle', timeout=10000)
+                with span("networkidle_stats"):
+                    await page.wait_for_load_state('networkidle', timeout=10000)
             except:
                 pass
 
@@ -124,7 +132,8 @@ class Torr9Scraper(BaseScraper):
                 logger.warning("[%s] /stats en maintenance, skip", self.name)
                 stats.raw_data["stats_status"] = "maintenance"
             else:
-                parsed = await self._scrape_stats(page)
+                with span("parse_stats"):
+                    parsed = await self._scrape_stats(page)
                 # Conserver le tracker_name et raw_data accumule
                 parsed.tracker_name = self.name
                 if parsed.raw_data is None:
@@ -140,16 +149,19 @@ class Torr9Scraper(BaseScraper):
         # 2. /tokens (independant, on essaye toujours)
         try:
             logger.info("[%s] Navigation vers %s", self.name, TOKENS_URL)
-            await page.goto(TOKENS_URL, timeout=60000)
+            with span("goto_tokens"):
+                await page.goto(TOKENS_URL, timeout=60000)
             try:
-                await page.wait_for_load_state('networkidle', timeout=15000)
+                with span("networkidle_tokens"):
+                    await page.wait_for_load_state('networkidle', timeout=15000)
             except:
                 pass
 
             if await self._is_maintenance(page):
                 logger.warning("[%s] /tokens en maintenance, skip", self.name)
             else:
-                tokens_value = await self._scrape_tokens(page)
+                with span("parse_tokens"):
+                    tokens_value = await self._scrape_tokens(page)
                 stats.points_bonus = tokens_value
         except Exception as e:
             logger.warning("[%s] Erreur scrape /tokens : %s", self.name, e)
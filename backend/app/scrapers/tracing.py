@@ -0,0 +1,139 @@
+"""
+Trace d'un scrape : chronologie des etapes (spans) d'un run.
+
+Une trace est ouverte par `_scrape_single` (une tache asyncio par tracker) et
+portee par un ContextVar : les scrapers posent des spans sans la recevoir en
+parametre, et les trackers scrapes en parallele ne se melangent pas.
+
+    with span("goto_profile"):
+        await page.goto(...)
+
+Hors trace (tests, appel direct d'un scraper), `span` ne fait rien.
+En SCRAPE_MODE=process, la trace est prise dans le processus de scrape puis
+reprise par le processus API (`resume_trace`) pour l'enregistrement.
+Les spans imbriques sont nommes par leur chemin ("cookies/parse/get_value:Ratio").
+Format compact stocke en DB (scrape_runs.spans) : [chemin, debut_ms, duree_ms, erreur 0/1].
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+# Garde-fou : un parser qui boucle ne doit pas produire une trace geante
+MAX_SPANS = 500
+
+_trace: ContextVar[Optional["ScrapeTrace"]] = ContextVar("scrape_trace", default=None)
+_path: ContextVar[tuple[str, ...]] = ContextVar("scrape_span_path", default=())
+
+
+class ScrapeTrace:
+    """Spans d'un run de scrape, en millisecondes depuis le debut du run."""
+
+    def __init__(self, tracker: str):
+        self.tracker = tracker
+        self.started_at = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        self.spans: list[list] = []
+        self._token = None
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._t0) * 1000
+
+    def record(self, path: str, start: float, end: float, error: bool):
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append([
+                path,
+                round((start - self._t0) * 1000, 1),
+                round((end - start) * 1000, 1),
+                int(error),
+            ])
+
+    def finish(self):
+        """Detache la trace du contexte courant."""
+        if self._token is not None:
+            _trace.reset(self._token)
+            self._token = None
+
+
+def start_trace(tracker: str) -> ScrapeTrace:
+    """Ouvre une trace pour la tache courante (a fermer avec `finish()`)."""
+    trace = ScrapeTrace(tracker)
+    trace._token = _trace.set(trace)
+    return trace
+
+
+def resume_trace(tracker: str, started_at: datetime, spans: list, elapsed_ms: float) -> ScrapeTrace:
+    """
+    Reprend une trace commencee dans un autre processus (processus de scrape) :
+    les spans poses ensuite (save_db...) se placent apres les siens.
+    """
+    trace = start_trace(tracker)
+    trace.started_at = started_at
+    trace.spans = list(spans or [])[:MAX_SPANS]
+    trace._t0 -= elapsed_ms / 1000
+    return trace
+
+
+def current_trace() -> Optional[ScrapeTrace]:
+    return _trace.get()
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Chronometre un bloc dans la trace courante (no-op hors trace)."""
+    trace = _trace.get()
+    if trace is None:
+        yield
+        return
+    path = _path.get() + (name,)
+    token = _path.set(path)
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        _path.reset(token)
+        trace.record("/".join(path), start, time.perf_counter(), error)
+
+
+def percentile(values: list[float], q: float) -> Optional[float]:
+    """Percentile par interpolation lineaire (q entre 0 et 1)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def step_stats(runs: list[list[list]]) -> list[dict]:
+    """
+    Duree par etape sur plusieurs runs (p50/p95/max en ms), etapes les plus lentes d'abord.
+    Une etape repetee dans un run (ex: get_value sur plusieurs labels) compte pour sa somme.
+    """
+    per_step: dict[str, list[float]] = {}
+    for spans in runs:
+        totals: dict[str, float] = {}
+        for path, _, duration, *_ in spans or []:
+            totals[path] = totals.get(path, 0.0) + duration
+        for path, total in totals.items():
+            per_step.setdefault(path, []).append(total)
+
+    result = [
+        {
+            "step": path,
+            "runs": len(durations),
+            "p50_ms": round(percentile(durations, 0.50), 1),
+            "p95_ms": round(percentile(durations, 0.95), 1),
+            "max_ms": round(max(durations), 1),
+        }
+        for path, durations in per_step.items()
+    ]
+    result.sort(key=lambda s: s["p95_ms"], reverse=True)
+    return result
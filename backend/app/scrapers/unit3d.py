@@ -7,6 +7,7 @@ from typing import Optional
 from playwright.async_api import Page
 
 from app.scrapers.base import BaseScraper, ScraperConfig, ScrapedStats
+from app.scrapers.tracing import span
 
 logger = logging.getLogger("dashboard.scraper")
 
@@ -53,7 +54,8 @@ class Unit3DScraper(BaseScraper):
                     xpath = f'//dt[contains(normalize-space(.), "{label}")]/following-sibling::dd'
 
                 element = page.locator(xpath).first
-                text = await element.inner_text(timeout=1000)
+                with span(f"get_value:{label}"):
+                    text = await element.inner_text(timeout=1000)
                 return self.clean_text(text)
             except:
                 return "0"
@@ -0,0 +1,107 @@
+"""
+Processus de scrape isole (SCRAPE_MODE=process) :
+
+    python -m app.scrapers.worker <job_id> [cpu_seconds]
+
+Lance par le pool (cf pool.py) avec ses limites de ressources. Lit le job dans
+scrape_jobs, pilote Chromium pour ce seul tracker et ecrit le resultat brut
+(ScrapedStats + trace) dans la ligne du job. Rien d'autre : l'enregistrement des
+stats, l'etat du tracker et les notifications restent au processus API.
+"""
+import asyncio
+import logging
+import os
+import resource
+import sys
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import AsyncContextManager, Callable, Optional
+
+from playwright.async_api import Browser, async_playwright
+
+from app.db.database import async_session
+from app.db.models import ScrapeJob
+from app.scrapers.base import BaseScraper
+from app.scrapers.registry import get_scraper
+from app.scrapers.tracing import start_trace
+
+logger = logging.getLogger("dashboard.scraper.worker")
+
+
+@asynccontextmanager
+async def _chromium():
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            yield browser
+        finally:
+            await browser.close()
+
+
+async def run_job(
+    job_id: int,
+    session_factory=async_session,
+    resolve: Callable[[str], Optional[BaseScraper]] = get_scraper,
+    launch: Callable[[], AsyncContextManager[Browser]] = _chromium,
+) -> Optional[str]:
+    """Execute un job et enregistre son resultat. Retourne le statut final."""
+    async with session_factory() as db:
+        job = await db.get(ScrapeJob, job_id)
+        if job is None or job.status != "queued":
+            logger.warning("Job %s introuvable ou deja pris", job_id)
+            return None
+        job.status = "running"
+        job.worker_pid = os.getpid()
+        job.started_at = datetime.now(timezone.utc)
+        await db.commit()
+        name = job.tracker_name
+
+    trace = start_trace(name)
+    result, error = None, None
+    try:
+        scraper = resolve(name)
+        if scraper is None:
+            raise LookupError(f"Tracker '{name}' non configure")
+        logger.info("Demarrage: %s (job %s)", name, job_id)
+        async with launch() as browser:
+            stats = await scraper.run(browser)
+        result = asdict(stats)
+    except Exception as e:
+        logger.error("Erreur %s: %s", name, e)
+        error = str(e)
+    trace.finish()
+
+    async with session_factory() as db:
+        job = await db.get(ScrapeJob, job_id)
+        job.status = "failed" if error else "done"
+        job.result = result
+        job.error = error
+        job.spans = trace.spans
+        job.duration_ms = round(trace.elapsed_ms, 1)
+        job.finished_at = datetime.now(timezone.utc)
+        await db.commit()
+    return job.status
+
+
+def limit_cpu(seconds: int):
+    """RLIMIT_CPU du processus, herite par Chromium (SIGXCPU puis SIGKILL 5 s apres)."""
+    if seconds > 0:
+        resource.setrlimit(resource.RLIMIT_CPU, (seconds, seconds + 5))
+
+
+def main() -> int:
+    from app.logging_config import setup_logging
+    setup_logging()
+    args = sys.argv[1:]
+    if len(args) not in (1, 2) or not all(arg.isdigit() for arg in args):
+        print("usage: python -m app.scrapers.worker <job_id> [cpu_seconds]", file=sys.stderr)
+        return 2
+    if len(args) == 2:
+        limit_cpu(int(args[1]))  # Avant le lancement de Chromium
+    status = asyncio.run(run_job(int(args[0])))
+    return 0 if status == "done" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,6 +24,8 @@ from app.db.database import Base, get_db  # noqa: E402
 from app.main import app  # noqa: E402
 from app.db.models import TrackerStats  # noqa: E402
 from app.auth.routes import _login_attempts  # noqa: E402
+from app.db.counters import row_counters  # noqa: E402
+from app import health as health_mod  # noqa: E402
 
 # Engine SQLite en memoire pour les tests
 test_engine = create_async_engine("sqlite+aiosqlite://", echo=False)
@@ -47,6 +49,8 @@ app.dependency_overrides[get_db] = override_get_db
 async def setup_db():
     """Cree et nettoie la base de test avant/apres chaque test."""
     _login_attempts.clear()
+    row_counters.reset()
+    health_mod._probe_cache.clear()
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     yield
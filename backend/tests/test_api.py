@@ -1,7 +1,13 @@
 """Tests pour les routes API (stats, history, summary)."""
+from datetime import datetime
+
 import pytest
 from httpx import AsyncClient
 
+from app.db.counters import row_counters
+from app.db.models import TrackerStats
+from tests.conftest import TestSession
+
 
 class TestHealthCheck:
     """Tests des endpoints de sante."""
@@ -149,3 +155,48 @@ class TestSummary:
         assert data["trackers_count"] == 3  # GF, SW, TOS
         assert data["total_records"] == 4  # 4 entrees dans le seed
         assert data["last_update"] is not None
+
+
+class TestRowCounters:
+    """Compteurs en memoire utilises par /api/summary et /health/full."""
+
+    async def test_commit_updates_counters_without_recount(self, seeded_db):
+        async with TestSession() as session:
+            tables = await row_counters.ensure(session, 3600)
+            assert tables["tracker_stats"].rows == 3
+            loaded_at = row_counters.loaded_at
+
+            session.add(TrackerStats(tracker_name="SW", ratio=1.1, scraped_at=datetime(2026, 2, 7, 9, 0, 0)))
+            await session.commit()
+
+            session.add(TrackerStats(tracker_name="ABN", ratio=1.0))
+            await session.flush()
+            await session.rollback()
+
+        counter = row_counters.tables["tracker_stats"]
+        assert row_counters.loaded_at == loaded_at
+        assert counter.rows == 4
+        assert sorted(counter.last_by_key) == ["GF-FREE", "SW", "TOS"]
+        assert counter.last_at.isoformat().startswith("2026-02-07T09:00")
+
+    async def test_load_latest_date_per_tracker(self):
+        async with TestSession() as session:
+            for name, day in (("TOS", 3), ("GF-FREE", 9), ("TOS", 12), ("SW", 1), ("GF-FREE", 2)):
+                session.add(TrackerStats(tracker_name=name, ratio=1.0, scraped_at=datetime(2026, 3, day, 8, 0, 0)))
+            await session.commit()
+            await row_counters.load(session)
+
+        counter = row_counters.tables["tracker_stats"]
+        assert {k: at.day for k, at in counter.last_by_key.items()} == {"GF-FREE": 9, "SW": 1, "TOS": 12}
+        assert all(at.tzinfo is not None for at in counter.last_by_key.values())
+        assert counter.rows == 5
+
+    async def test_summary_served_from_counters(self, client: AsyncClient, auth_headers: dict, seeded_db):
+        resp = await client.get("/api/summary", headers=auth_headers)
+        data = resp.json()
+        assert data["total_records"] == 3
+        assert data["trackers_count"] == 2
+
+        row_counters.purged("tracker_stats", 1)
+        data = (await client.get("/api/summary", headers=auth_headers)).json()
+        assert data["total_records"] == 2
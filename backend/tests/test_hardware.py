@@ -1,7 +1,24 @@
 """Tests pour le monitoring hardware."""
+import asyncio
+import base64
+import json
+import zlib
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select
+
+from app import notifications
+from app.config import get_settings
+from app.db.models import HardwareDiskSample, HardwareDiskTemp, HardwareSnapshot, HardwareInventory
+from app.hardware import manager as manager_mod
 from app.hardware.manager import HardwareManager, HardwareData
+from app.hardware.alerts import AlertEngine, extract_metric
+from app.hardware.bus import FrameBus
+from app.hardware.deadband import Deadband, expand_steps
+from app.hardware.stats import MetricWindow
+from tests.conftest import TestSession
 
 
 class TestHardwareManager:
@@ -42,6 +59,17 @@ class TestHardwareManager:
         assert data["os"] == "Windows 11"
         assert data["agent_connected"] is True
 
+    def test_snapshot_keeps_window_extremes(self):
+        """Resume de fenetre de l'agent : moyenne + extremes ; repli sur la valeur si absent."""
+        snap = HardwareManager._build_snapshot({
+            "cpu": {"usage": 20.5, "usage_min": 1.0, "usage_max": 100.0, "usage_last": 3.0},
+            "gpu": {"usage": 50.0, "temp": 61.0},
+        }, datetime.now(timezone.utc))
+        assert snap.cpu_usage == 20.5
+        assert (snap.cpu_usage_min, snap.cpu_usage_max) == (1.0, 100.0)
+        assert snap.gpu_usage_max == 50.0
+        assert snap.gpu_temp_max == 61.0
+
 
 class TestHardwareRoutes:
     """Tests des routes /hardware/*."""
@@ -66,6 +94,19 @@ class TestHardwareRoutes:
         data = resp.json()
         assert "agent_connected" in data
 
+    async def test_agent_diagnostics_in_health_full(
+        self, client: AsyncClient, auth_headers: dict, monkeypatch
+    ):
+        """Le cout de l'agent est expose par /health/full, pas diffuse aux clients."""
+        diagnostics = {"cpu_percent": 0.4, "rss_mb": 31.2, "collectors": {"gpu": {"avg_ms": 85.0}}}
+        monkeypatch.setattr(manager_mod.hardware_manager, "latest_data", HardwareData(diagnostics=diagnostics))
+        assert "diagnostics" not in manager_mod.hardware_manager.get_latest()
+
+        resp = await client.get("/health/full", headers=auth_headers)
+        assert resp.status_code == 200
+        agent = resp.json()["checks"]["hardware_agent"]
+        assert agent["diagnostics"] == diagnostics
+
 
 class TestHardwareData:
     """Tests du dataclass HardwareData."""
@@ -86,3 +127,581 @@ class TestHardwareData:
         )
         assert data.cpu["usage"] == 50
         assert data.agent_connected is True
+
+
+class TestWindowedStats:
+    """Tests des stats glissantes O(1)."""
+
+    def test_min_max_expire(self):
+        w = MetricWindow(window=10)
+        for ts, v in [(0, 50), (1, 80), (2, 60)]:
+            w.update(v, ts)
+        assert w.get("max") == 80
+        assert w.get("min") == 50
+        w.update(55, 12)  # 0 et 1 sortent de la fenetre
+        assert w.get("max") == 60
+        assert w.get("min") == 55
+
+    def test_avg_and_quantile(self):
+        w = MetricWindow(window=300)
+        for i in range(100):
+            w.update(float(i), i)
+        assert w.get("avg") == pytest.approx(49.5)
+        assert w.get("p95") == pytest.approx(94, abs=1)
+
+
+class TestSnapshotAggregation:
+    """La ligne persistee agrege toute la fenetre, pas un echantillon isole."""
+
+    async def test_window_mean_min_max_persisted(self, monkeypatch):
+        monkeypatch.setattr(manager_mod, "async_session", TestSession)
+        mgr = HardwareManager()
+        # Fenetre deja ouverte : pas d'ecriture immediate
+        mgr._last_persist = datetime.now(timezone.utc)
+        for usage, temp in ((10.0, 50.0), (20.0, 55.0)):
+            await mgr.receive_data({"cpu": {"usage": usage, "temp": temp}, "ram": {"used_percent": 40.0}})
+        await mgr.receive_data({"cpu": {"usage": 90.0, "usage_max": 100.0, "temp": 70.0}, "ram": {"used_percent": 60.0}})
+
+        mgr._last_persist -= timedelta(seconds=manager_mod.SNAPSHOT_INTERVAL + 1)
+        await mgr.receive_data({"cpu": {"usage": 40.0, "temp": 45.0}, "ram": {"used_percent": 40.0}})
+
+        async with TestSession() as session:
+            snapshot = (await session.execute(select(HardwareSnapshot))).scalars().unique().one()
+        assert snapshot.cpu_usage == 40.0
+        assert (snapshot.cpu_usage_min, snapshot.cpu_usage_max) == (10.0, 100.0)
+        assert snapshot.cpu_temp == 55.0
+        assert snapshot.cpu_temp_max == 70.0
+        assert snapshot.ram_used_percent_max == 60.0
+        assert mgr._window == {}
+
+
+class TestDeadband:
+    """Compression deadband des snapshots et reconstruction en escalier."""
+
+    T0 = datetime(2026, 2, 7, 10, 0, tzinfo=timezone.utc)
+
+    def test_only_moves_and_max_gap_are_written(self):
+        db = Deadband(max_gap=600)
+        disk = [{"device": "C:", "percent": 50.0}]
+        assert db.offer({"cpu_usage": 10.0, "cpu_temp": 45.0}, disk, self.T0) is True
+        # Dans la tolerance (cpu 5 %, temp 2 degres) : rien a ecrire
+        assert db.offer({"cpu_usage": 13.0, "cpu_temp": 46.0}, disk, self.T0 + timedelta(minutes=1)) is False
+        # Pic dans la fenetre : l'extreme sort de sa tolerance
+        assert db.offer({"cpu_usage": 13.0, "cpu_usage_max": 95.0, "cpu_temp": 46.0}, disk,
+                        self.T0 + timedelta(minutes=2)) is True
+        assert db.offer({"cpu_usage": 13.0, "cpu_usage_max": 95.0, "cpu_temp": 46.0},
+                        [{"device": "C:", "percent": 52.0}], self.T0 + timedelta(minutes=3)) is True
+        same = ({"cpu_usage": 13.0, "cpu_usage_max": 95.0, "cpu_temp": 46.0}, [{"device": "C:", "percent": 52.0}])
+        assert db.offer(*same, self.T0 + timedelta(minutes=4)) is False
+        assert db.offer(*same, self.T0 + timedelta(minutes=13)) is True  # max_gap ecoule
+
+    def test_expand_steps_rebuilds_regular_series(self):
+        rows = [
+            {"cpu": {"usage": 10.0}, "recorded_at": self.T0.isoformat()},
+            {"cpu": {"usage": 80.0}, "recorded_at": (self.T0 + timedelta(minutes=3)).isoformat()},
+        ]
+        points = expand_steps(rows, since=self.T0 + timedelta(minutes=1), until=self.T0 + timedelta(minutes=5),
+                              interval=60, max_gap=600)
+        assert [p["cpu"]["usage"] for p in points] == [10.0, 10.0, 80.0, 80.0]
+        assert points[0]["recorded_at"] == (self.T0 + timedelta(minutes=1)).isoformat()
+
+    def test_expand_steps_keeps_disconnection_gaps(self):
+        rows = [
+            {"cpu": {"usage": 10.0}, "recorded_at": self.T0.isoformat()},
+            {"cpu": {"usage": 20.0}, "recorded_at": (self.T0 + timedelta(minutes=30)).isoformat()},
+        ]
+        points = expand_steps(rows, since=self.T0, until=self.T0 + timedelta(minutes=30),
+                              interval=60, max_gap=300)
+        assert len(points) == 5 + 1
+
+    async def test_manager_skips_rows_inside_deadband(self, monkeypatch):
+        monkeypatch.setattr(manager_mod, "async_session", TestSession)
+        mgr = HardwareManager()
+        mgr.deadband = Deadband(max_gap=900)
+        frame = {"cpu": {"usage": 12.0, "temp": 40.0}, "ram": {"used_percent": 30.0}}
+        for _ in range(3):
+            mgr._last_persist = None
+            await mgr.receive_data(dict(frame))
+
+        async with TestSession() as session:
+            rows = (await session.execute(select(HardwareSnapshot))).scalars().unique().all()
+        assert len(rows) == 1
+
+
+class TestAlertEngine:
+    """Tests du moteur de regles d'alerte."""
+
+    def test_extract_metric_list(self):
+        data = {"storage": [{"device": "C:", "percent": 96}, {"device": "D:", "percent": 40}]}
+        assert extract_metric(data, "storage.percent") == {"C:": 96.0, "D:": 40.0}
+        assert extract_metric({"gpu": None}, "gpu.temp") == {}
+
+    def test_for_seconds_and_hysteresis(self):
+        engine = AlertEngine.from_config([
+            {"name": "cpu_temp", "metric": "cpu.temp", "threshold": 90, "for_seconds": 60, "clear": 85},
+        ])
+        assert engine.evaluate({"cpu": {"temp": 95}}, now=0) == []
+        assert engine.evaluate({"cpu": {"temp": 95}}, now=30) == []
+        events = engine.evaluate({"cpu": {"temp": 95}}, now=61)
+        assert len(events) == 1 and not events[0].resolved
+        # Sous le seuil mais au-dessus du clear : toujours en alerte, pas de spam
+        assert engine.evaluate({"cpu": {"temp": 88}}, now=62) == []
+        assert engine.evaluate({"cpu": {"temp": 95}}, now=63) == []
+        events = engine.evaluate({"cpu": {"temp": 80}}, now=64)
+        assert len(events) == 1 and events[0].resolved
+
+    def test_cooldown_dedupe(self):
+        engine = AlertEngine.from_config([
+            {"name": "disk", "metric": "storage.percent", "threshold": 95, "cooldown": 600},
+        ])
+        disk = lambda p: {"storage": [{"device": "C:", "percent": p}]}  # noqa: E731
+        assert len(engine.evaluate(disk(97), now=0)) == 1
+        assert len(engine.evaluate(disk(90), now=10)) == 1  # resolu
+        assert engine.evaluate(disk(97), now=20) == []  # cooldown
+        assert engine.evaluate(disk(90), now=30) == []  # episode non notifie
+        assert len(engine.evaluate(disk(97), now=700)) == 1
+
+    def test_invalid_rule_ignored(self):
+        engine = AlertEngine.from_config([
+            {"name": "bad", "metric": "cpu.temp", "threshold": 1, "stat": "median"},
+            {"name": "missing"},
+        ])
+        assert engine.rules == []
+
+    def test_quantile_bounds_per_metric(self):
+        engine = AlertEngine.from_config([
+            {"name": "dl_p95", "metric": "network.download_speed", "stat": "p95", "bounds": [0, 1000],
+             "threshold": 500},
+            # Pas de bornes connues pour cette metrique : refusee plutot que saturee a 150
+            {"name": "ul_p95", "metric": "network.upload_speed", "stat": "p95", "threshold": 500},
+            {"name": "gpu_p95", "metric": "gpu.temp", "stat": "p95", "threshold": 83},
+        ])
+        assert [r.name for r in engine.rules] == ["dl_p95", "gpu_p95"]
+        assert engine.rules[1].bounds == (0.0, 150.0)
+
+        events = engine.evaluate({"network": {"download_speed": 800}}, now=0)
+        assert len(events) == 1
+        assert events[0].value == pytest.approx(800, abs=2)
+
+    async def test_manager_enqueues_alert_before_returning(self, monkeypatch):
+        monkeypatch.setattr(manager_mod, "async_session", TestSession)
+        monkeypatch.setattr(get_settings(), "discord_webhook_url", "https://discord.test/api/webhooks/1/abc")
+        submitted = []
+        monkeypatch.setattr(notifications.dispatcher, "submit", lambda embed, ping_here=False: submitted.append(embed))
+        mgr = HardwareManager()
+        mgr.alerts = AlertEngine.from_config([{"name": "cpu_temp", "metric": "cpu.temp", "threshold": 90}])
+
+        await mgr.receive_data({"cpu": {"temp": 95}})
+        # Pas de tache detachee : l'alerte est en file au retour de receive_data
+        assert len(submitted) == 1
+        assert "cpu_temp" in json.dumps(submitted[0])
+
+
+class FakeWebSocket:
+    """WebSocket minimal qui enregistre les trames envoyees."""
+
+    def __init__(self):
+        self.sent: list[dict] = []
+        self.raw: list[str] = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        self.raw.append(text)
+        self.sent.append(json.loads(text))
+
+
+class TestClientSubscriptions:
+    """Tests des abonnements par client sur /hardware/ws/client."""
+
+    async def _manager_with_data(self) -> HardwareManager:
+        mgr = HardwareManager()
+        mgr.latest_data = HardwareData(
+            cpu={"usage": 10.0, "core_usage": [5.0, 15.0]},
+            ram={"used_percent": 50.0},
+            processes=[{"name": "python", "memory_mb": 100}],
+            timestamp="2026-02-07T10:00:00",
+            agent_connected=True,
+        )
+        return mgr
+
+    async def test_sections_filter(self):
+        mgr = await self._manager_with_data()
+        ws = FakeWebSocket()
+        await mgr.connect_client(ws, "c1")
+        assert "processes" in ws.sent[-1]
+
+        ack = await mgr.subscribe("c1", ["cpu", "ram", "bogus"])
+        assert ack == {"sections": ["cpu", "ram"], "min_interval": 0.0}
+        frame = ws.sent[-1]
+        assert "processes" not in frame and "storage" not in frame
+        assert "core_usage" not in frame["cpu"]
+        assert frame["ram"]["used_percent"] == 50.0
+        assert frame["agent_connected"] is True
+
+    async def test_throttled_client_coalesced(self):
+        mgr = await self._manager_with_data()
+        fast, slow = FakeWebSocket(), FakeWebSocket()
+        await mgr.connect_client(fast, "fast")
+        await mgr.connect_client(slow, "slow")
+        await mgr.subscribe("slow", None, min_interval=60)
+        sent_before = len(slow.sent)
+
+        for _ in range(3):
+            await mgr.broadcast()
+        assert len(fast.sent) == 1 + 3
+        assert len(slow.sent) == sent_before  # throttle : rien de plus
+        assert mgr.subscriptions["slow"].pending is True
+
+        await mgr.disconnect_client("slow")
+        assert "slow" not in mgr.subscriptions
+
+
+class TestBackfill:
+    """Tests du rejeu du tampon hors connexion de l'agent."""
+
+    @staticmethod
+    def _encode(samples: list) -> dict:
+        blob = zlib.compress(json.dumps(samples).encode())
+        return {"type": "backfill", "encoding": "zlib+base64", "data": base64.b64encode(blob).decode()}
+
+    async def test_backfill_persists_original_timestamps(self, monkeypatch):
+        monkeypatch.setattr(manager_mod, "async_session", TestSession)
+        mgr = HardwareManager()
+        ws = FakeWebSocket()
+        await mgr.connect_client(ws, "c1")
+
+        base = datetime(2026, 2, 7, 10, 0, tzinfo=timezone.utc)
+        samples = [
+            {"cpu": {"usage": float(i)}, "timestamp": (base + timedelta(seconds=30 * i)).isoformat()}
+            for i in range(4)
+        ]
+        count = await mgr.receive_backfill(self._encode(samples))
+        assert count == 4
+
+        async with TestSession() as session:
+            rows = (await session.execute(
+                select(HardwareSnapshot).order_by(HardwareSnapshot.recorded_at)
+            )).scalars().all()
+        # 1 snapshot par SNAPSHOT_INTERVAL (60s) : echantillons 0 et 2
+        assert [r.cpu_usage for r in rows] == [0.0, 2.0]
+        assert rows[0].recorded_at.replace(tzinfo=timezone.utc) == base
+        # Pas de diffusion live ni de mise a jour de latest_data
+        assert ws.sent == []
+        assert mgr.latest_data.timestamp is None
+
+    async def test_backfill_rejects_bad_payload(self):
+        mgr = HardwareManager()
+        assert await mgr.receive_backfill({"type": "backfill", "encoding": "gzip", "data": ""}) == 0
+        assert await mgr.receive_backfill({"type": "backfill", "encoding": "zlib+base64", "data": "!!"}) == 0
+
+
+class TestInventory:
+    """Tests de l'inventaire statique (handshake agent)."""
+
+    INVENTORY = {
+        "os": "Windows 11",
+        "hostname": "home-pc",
+        "cpu": {"name": "Ryzen 7 5800X", "cores": 16, "physical_cores": 8},
+        "ram": {"total_gb": 32.0},
+        "gpu": {"name": "RTX 3080", "memory_total": 10240},
+        "storage": [{"device": "C:", "name": "Samsung 980", "mountpoint": "C:\\", "total_gb": 931.5}],
+    }
+    TELEMETRY = {
+        "cpu": {"usage": 12.0, "temp": 48.0},
+        "ram": {"used_gb": 10.5, "used_percent": 32.8},
+        "gpu": {"usage": 5.0, "temp": 40.0, "memory_used": 900},
+        "storage": [{"device": "C:", "used_gb": 500.0, "percent": 53.7}],
+        "uptime": "1h 00min",
+    }
+
+    async def test_telemetry_merged_and_snapshot_references_inventory(self, monkeypatch):
+        monkeypatch.setattr(manager_mod, "async_session", TestSession)
+        mgr = HardwareManager()
+        await mgr.receive_inventory({"type": "inventory", "data": self.INVENTORY})
+        await mgr.receive_data(dict(self.TELEMETRY))
+
+        latest = mgr.get_latest()
+        assert latest["cpu"] == {"name": "Ryzen 7 5800X", "cores": 16, "physical_cores": 8, "usage": 12.0, "temp": 48.0}
+        assert latest["hostname"] == "home-pc"
+        assert latest["storage"][0]["name"] == "Samsung 980"
+        assert latest["storage"][0]["percent"] == 53.7
+
+        async with TestSession() as session:
+            inventories = (await session.execute(select(HardwareInventory))).scalars().all()
+            snapshot = (await session.execute(select(HardwareSnapshot))).scalars().unique().one()
+        assert len(inventories) == 1
+        assert snapshot.inventory_id == inventories[0].id
+        assert snapshot.cpu_name is None
+        assert snapshot.to_dict()["cpu"]["name"] == "Ryzen 7 5800X"
+        assert "hostname" not in snapshot.raw_data
+
+    async def test_static_fields_not_repeated_per_snapshot(self, monkeypatch):
+        monkeypatch.setattr(manager_mod, "async_session", TestSession)
+        mgr = HardwareManager()
+        await mgr.receive_inventory({"type": "inventory", "data": self.INVENTORY})
+        await mgr.receive_data({**self.TELEMETRY, "ram": {**self.TELEMETRY["ram"], "total_gb": 32.0}})
+
+        async with TestSession() as session:
+            snapshot = (await session.execute(select(HardwareSnapshot))).scalars().unique().one()
+        # Ligne : telemetrie seule
+        assert snapshot.ram_total_gb is None
+        assert snapshot.storage == [{"device": "C:", "used_gb": 500.0, "percent": 53.7}]
+        # Lecture : champs statiques resolus via l'inventaire
+        restored = snapshot.to_dict()
+        assert restored["ram"]["total_gb"] == 32.0
+        assert restored["storage"][0]["name"] == "Samsung 980"
+        assert restored["storage"][0]["total_gb"] == 931.5
+        assert restored["storage"][0]["percent"] == 53.7
+
+    async def test_agent_diagnostics_not_persisted(self, monkeypatch):
+        monkeypatch.setattr(manager_mod, "async_session", TestSession)
+        mgr = HardwareManager()
+        diagnostics = {"cpu_percent": 0.4, "collectors": {"gpu": {"avg_cpu_ms": 1.2}}}
+        await mgr.receive_data({**self.TELEMETRY, "diagnostics": diagnostics})
+
+        assert mgr.latest_data.diagnostics == diagnostics  # Toujours expose par /health/full
+        async with TestSession() as session:
+            snapshot = (await session.execute(select(HardwareSnapshot))).scalars().unique().one()
+        assert "diagnostics" not in snapshot.raw_data
+        assert snapshot.raw_data["uptime"] == "1h 00min"
+
+    async def test_same_inventory_stored_once(self, monkeypatch):
+        monkeypatch.setattr(manager_mod, "async_session", TestSession)
+        mgr = HardwareManager()
+        first = await mgr.receive_inventory({"type": "inventory", "data": self.INVENTORY})
+        second = await mgr.receive_inventory({"type": "inventory", "data": dict(self.INVENTORY)})
+        assert first == second
+
+        changed = {**self.INVENTORY, "gpu": {"name": "RTX 4090", "memory_total": 24576}}
+        assert await mgr.receive_inventory({"type": "inventory", "data": changed}) != first
+
+        async with TestSession() as session:
+            rows = (await session.execute(select(HardwareInventory))).scalars().all()
+        assert sorted(r.gpu_name for r in rows) == ["RTX 3080", "RTX 4090"]
+
+    async def test_legacy_full_frame_still_persisted(self, monkeypatch):
+        """Un agent sans handshake envoie des trames completes : inventaire deduit."""
+        monkeypatch.setattr(manager_mod, "async_session", TestSession)
+        mgr = HardwareManager()
+        full = {**self.TELEMETRY, "os": "Windows 11", "hostname": "home-pc",
+                "cpu": {**self.TELEMETRY["cpu"], "name": "Ryzen 7 5800X"}}
+        await mgr.receive_data(full)
+        assert mgr.get_latest()["cpu"]["name"] == "Ryzen 7 5800X"
+
+        async with TestSession() as session:
+            snapshot = (await session.execute(select(HardwareSnapshot))).scalars().unique().one()
+        assert snapshot.inventory.cpu_name == "Ryzen 7 5800X"
+
+
+class TestTypedHistory:
+    """Tables typees par disque / colonnes reseau, et endpoints d'historique associes."""
+
+    FRAME = {
+        "cpu": {"usage": 10.0},
+        "network": {"download_speed": 12.5, "download_speed_max": 80.0, "upload_speed": 1.5},
+        "storage": [
+            {"device": "C:", "used_gb": 400.0, "total_gb": 931.5, "percent": 42.9},
+            {"device": "D:", "used_gb": 1500.0, "total_gb": 1863.0, "percent": 80.5},
+        ],
+        "disk_temps": [{"name": "Samsung 980", "temp": 41.0}],
+    }
+
+    async def test_ingest_fills_child_tables(self, client: AsyncClient, auth_headers: dict, monkeypatch):
+        monkeypatch.setattr(manager_mod, "async_session", TestSession)
+        mgr = HardwareManager()
+        await mgr.receive_data(json.loads(json.dumps(self.FRAME)))
+
+        resp = await client.get("/hardware/history/disks", params={"device": "D:"}, headers=auth_headers)
+        assert resp.status_code == 200
+        rows = resp.json()
+        assert len(rows) == 1
+        assert rows[0]["device"] == "D:" and rows[0]["percent"] == 80.5
+
+        resp = await client.get("/hardware/history/disk-temps", headers=auth_headers)
+        assert [r["temp"] for r in resp.json()] == [41.0]
+
+        resp = await client.get("/hardware/history/network", headers=auth_headers)
+        net = resp.json()
+        assert net[0]["download_speed"] == 12.5
+        assert net[0]["download_speed_max"] == 80.0
+        assert net[0]["upload_speed_max"] == 1.5
+
+        resp = await client.get("/hardware/history/devices", headers=auth_headers)
+        assert resp.json() == {"disks": ["C:", "D:"], "disk_temps": ["Samsung 980"]}
+
+    async def test_child_histories_expanded_in_deadband_mode(self, client: AsyncClient, auth_headers: dict,
+                                                              monkeypatch):
+        settings = get_settings()
+        monkeypatch.setattr(settings, "hw_deadband", True)
+        monkeypatch.setattr(settings, "hw_deadband_max_gap", 900)
+        now = datetime.now(timezone.utc)
+        early, late = now - timedelta(seconds=570), now - timedelta(seconds=210)
+        async with TestSession() as db:
+            # Lignes compressees : C: et le reseau bougent a `late`, D: et la sonde non
+            for at, c_percent in ((early, 40.0), (late, 41.5)):
+                snapshot = HardwareSnapshot(recorded_at=at, net_download=at.minute)
+                db.add(snapshot)
+                await db.flush()
+                db.add(HardwareDiskSample(snapshot_id=snapshot.id, device="C:", percent=c_percent, recorded_at=at))
+                if at == early:
+                    db.add(HardwareDiskSample(snapshot_id=snapshot.id, device="D:", percent=80.0, recorded_at=at))
+                    db.add(HardwareDiskTemp(snapshot_id=snapshot.id, name="Samsung 980", temp=41.0, recorded_at=at))
+            await db.commit()
+
+        # Un point par minute (SNAPSHOT_INTERVAL) et par serie, comme /history
+        rows = (await client.get("/hardware/history/disks", headers=auth_headers)).json()
+        assert [r["percent"] for r in rows if r["device"] == "C:"] == [40.0] * 6 + [41.5] * 4
+        assert [r["percent"] for r in rows if r["device"] == "D:"] == [80.0] * 10
+        assert [r["recorded_at"] for r in rows] == sorted(r["recorded_at"] for r in rows)
+
+        rows = (await client.get("/hardware/history/disks", params={"device": "D:"}, headers=auth_headers)).json()
+        assert len(rows) == 10
+
+        rows = (await client.get("/hardware/history/disk-temps", headers=auth_headers)).json()
+        assert [r["temp"] for r in rows] == [41.0] * 10
+
+        rows = (await client.get("/hardware/history/network", headers=auth_headers)).json()
+        assert [r["download_speed"] for r in rows] == [early.minute] * 6 + [late.minute] * 4
+
+        rows = (await client.get("/hardware/history/disks", params={"limit": 3}, headers=auth_headers)).json()
+        assert len(rows) == 3
+
+    async def test_history_summary_from_counters(self, client: AsyncClient, auth_headers: dict):
+        now = datetime.now(timezone.utc)
+        async with TestSession() as db:
+            db.add(HardwareSnapshot(recorded_at=now - timedelta(hours=2)))
+            await db.commit()
+        data = (await client.get("/hardware/history/summary", headers=auth_headers)).json()
+        assert data["total_snapshots"] == 1
+
+        # Insertion ORM : compteur mis a jour au commit, sans recompter
+        async with TestSession() as db:
+            db.add(HardwareSnapshot(recorded_at=now))
+            await db.commit()
+        data = (await client.get("/hardware/history/summary", headers=auth_headers)).json()
+        assert data["total_snapshots"] == 2
+        assert data["newest_at"].startswith(now.isoformat()[:19])
+        assert data["oldest_at"].startswith((now - timedelta(hours=2)).isoformat()[:19])
+
+
+async def _wait_for(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition jamais remplie"
+        await asyncio.sleep(0.01)
+
+
+class TestFrameBus:
+    """Tests du bus de trames hardware entre workers."""
+
+    @staticmethod
+    async def _start(path: str) -> tuple[FrameBus, list]:
+        bus, received = FrameBus(), []
+
+        async def handler(payload: bytes):
+            received.append(payload)
+
+        await bus.start(path, handler)
+        await _wait_for(lambda: bus.role is not None)
+        return bus, received
+
+    async def test_frames_relayed_to_every_other_worker(self, tmp_path):
+        path = str(tmp_path / "hw.sock")
+        hub, hub_rx = await self._start(path)
+        peer1, rx1 = await self._start(path)
+        peer2, rx2 = await self._start(path)
+        assert (hub.role, peer1.role, peer2.role) == ("hub", "peer", "peer")
+        await _wait_for(lambda: hub.stats()["peers"] == 2)
+
+        peer1.publish(b"from-peer1")
+        hub.publish(b"from-hub")
+        await _wait_for(lambda: len(rx2) == 2)
+        assert sorted(rx2) == [b"from-hub", b"from-peer1"]
+        assert hub_rx == [b"from-peer1"]
+        assert rx1 == [b"from-hub"]  # Jamais sa propre trame
+
+        for bus in (peer1, peer2, hub):
+            await bus.stop()
+
+    async def test_peer_takes_over_dead_hub(self, tmp_path):
+        path = str(tmp_path / "hw.sock")
+        hub, _ = await self._start(path)
+        peer, _ = await self._start(path)
+        await hub.stop()
+        await _wait_for(lambda: peer.role == "hub")
+
+        late, late_rx = await self._start(path)
+        assert late.role == "peer"
+        await _wait_for(lambda: peer.stats()["peers"] == 1)
+        peer.publish(b"ok")
+        await _wait_for(lambda: late_rx == [b"ok"])
+        await late.stop()
+        await peer.stop()
+
+    async def test_agent_frames_reach_clients_of_other_worker(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(manager_mod, "async_session", TestSession)
+        path = str(tmp_path / "hw.sock")
+        agent_worker, client_worker = HardwareManager(), HardwareManager()
+        agent_bus, client_bus = FrameBus(), FrameBus()
+        await agent_bus.start(path, agent_worker.receive_remote)
+        await _wait_for(lambda: agent_bus.role == "hub")
+        await client_bus.start(path, client_worker.receive_remote)
+        await _wait_for(lambda: agent_bus.stats()["peers"] == 1)
+        agent_worker.bus = agent_bus
+
+        ws = FakeWebSocket()
+        await client_worker.connect_client(ws, "c1")
+        agent_worker.agent_ws = FakeWebSocket()
+        await agent_worker.receive_data({"cpu": {"usage": 42.0}, "hostname": "pc"})
+
+        await _wait_for(lambda: ws.sent)
+        assert ws.sent[-1]["cpu"]["usage"] == 42.0
+        assert ws.sent[-1]["agent_connected"] is True
+        assert client_worker.is_agent_connected
+        await client_bus.stop()
+        await agent_bus.stop()
+
+    async def test_remote_frame_forwarded_without_reencoding(self, monkeypatch):
+        """La trame du bus part telle quelle ; seuls les abonnements partiels sont re-encodes."""
+        monkeypatch.setattr(manager_mod, "async_session", TestSession)
+        agent_worker, client_worker = HardwareManager(), HardwareManager()
+        published = []
+        agent_worker.bus = type("Bus", (), {"publish": lambda self, payload: published.append(payload)})()
+        agent_worker.agent_ws = FakeWebSocket()
+        await agent_worker.receive_data({"cpu": {"usage": 42.0}, "diagnostics": {"cpu_percent": 0.3}})
+        frame, _, extras = published[-1].decode().partition("\n")
+        assert "diagnostics" not in json.loads(frame)
+
+        full, partial = FakeWebSocket(), FakeWebSocket()
+        await client_worker.connect_client(full, "full")
+        await client_worker.connect_client(partial, "partial")
+        await client_worker.subscribe("partial", ["ram"])
+        encoded = []
+        real_dumps = json.dumps
+        monkeypatch.setattr(manager_mod.json, "dumps", lambda obj, **kw: encoded.append(obj) or real_dumps(obj, **kw))
+        await client_worker.receive_remote(published[-1])
+
+        assert full.raw[-1] == frame
+        assert len(encoded) == 1 and "cpu" not in encoded[0]  # Trame {ram} seulement
+        assert partial.sent[-1]["ram"] == {}
+        assert client_worker.latest_data.diagnostics == {"cpu_percent": 0.3}
+
+    async def test_silent_remote_agent_expires(self, monkeypatch):
+        monkeypatch.setattr(manager_mod, "REMOTE_AGENT_TIMEOUT", 0.15)
+        worker = HardwareManager()
+        ws = FakeWebSocket()
+        await worker.connect_client(ws, "c1")
+        frame = json.dumps({"cpu": {"usage": 42.0}, "agent_connected": True}).encode()
+
+        await worker.receive_remote(frame)
+        await asyncio.sleep(0.1)
+        await worker.receive_remote(frame)  # Trame reguliere : reste connecte
+        await asyncio.sleep(0.1)
+        assert worker.is_agent_connected
+
+        # Worker de l'agent mort sans trame de deconnexion
+        await _wait_for(lambda: not worker.is_agent_connected)
+        assert worker.get_latest()["cpu"] == {}
+        assert ws.sent[-1]["agent_connected"] is False
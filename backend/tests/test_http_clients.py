@@ -0,0 +1,41 @@
+"""Tests pour les clients HTTP partages."""
+import httpx
+
+from app.http_clients import HttpClientPool
+
+
+def _pool() -> HttpClientPool:
+    pool = HttpClientPool()
+    pool.transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"ok": True}))
+    return pool
+
+
+class TestHttpClientPool:
+    """Un client par hote, compteurs par hote, fermeture au shutdown."""
+
+    async def test_one_client_per_origin(self):
+        pool = _pool()
+        a = pool.client_for("http://radarr.local:7878/api/v3/movie")
+        b = pool.client_for("http://RADARR.local:7878/api/v3/queue")
+        c = pool.client_for("http://sonarr.local:8989/api/v3/series")
+        assert a is b
+        assert a is not c
+        await pool.aclose()
+
+    async def test_requests_counted_per_host(self):
+        pool = _pool()
+        for _ in range(3):
+            resp = await pool.client_for("http://radarr.local").get("http://radarr.local/api/v3/queue")
+            assert resp.status_code == 200
+        stats = pool.stats()["hosts"]
+        assert stats["http://radarr.local"]["requests"] == 3
+        await pool.aclose()
+
+    async def test_closed_client_is_recreated(self):
+        pool = _pool()
+        pool.warm(["http://plex.local:32400", None])
+        first = pool.client_for("http://plex.local:32400")
+        await pool.aclose()
+        assert first.is_closed
+        assert pool.client_for("http://plex.local:32400") is not first
+        await pool.aclose()
@@ -0,0 +1,54 @@
+"""Tests pour la surveillance de la boucle asyncio et les I/O hors boucle."""
+import asyncio
+import logging
+import time
+
+from app.loop_monitor import LOOP_BLOCKED, LOOP_LAG_SECONDS, LoopLagMonitor
+from app.scrapers.base import _read_json, _write_json
+
+
+def blocking_callback():
+    time.sleep(0.3)
+
+
+class TestLoopLagMonitor:
+
+    async def test_idle_loop_has_no_block(self):
+        monitor = LoopLagMonitor(interval=0.02, threshold=0.1)
+        _, _, before = LOOP_LAG_SECONDS.snapshot() or ([], 0.0, 0)
+        monitor.start()
+        await asyncio.sleep(0.15)
+        await monitor.stop()
+
+        _, _, after = LOOP_LAG_SECONDS.snapshot()
+        assert after - before >= 3
+        assert monitor.blocked == 0
+        assert not monitor.running
+
+    async def test_blocking_callback_logged_with_stack(self, caplog):
+        monitor = LoopLagMonitor(interval=0.02, threshold=0.1)
+        blocked_before = LOOP_BLOCKED.value()
+        monitor.start()
+        await asyncio.sleep(0.05)
+        with caplog.at_level(logging.WARNING, logger="dashboard.loop_monitor"):
+            blocking_callback()
+            await asyncio.sleep(0.05)
+        await monitor.stop()
+
+        # Un seul rapport pour un blocage, pile pointant sur le callback fautif
+        assert monitor.blocked == 1
+        assert LOOP_BLOCKED.value() == blocked_before + 1
+        assert monitor.max_lag >= 0.2
+        assert "blocking_callback" in caplog.text
+        assert monitor.stats()["max_lag_ms"] >= 200
+
+
+class TestCookieFiles:
+
+    def test_read_missing_returns_none(self, tmp_path):
+        assert _read_json(tmp_path / "absent.json") is None
+
+    def test_write_creates_directory(self, tmp_path):
+        path = tmp_path / "cookies" / "tos.json"
+        _write_json(path, {"cookies": [{"name": "session"}]})
+        assert _read_json(path) == {"cookies": [{"name": "session"}]}
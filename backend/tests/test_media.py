@@ -0,0 +1,375 @@
+"""Tests pour les services media (cache, overview)."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, update
+
+from app.config import get_settings
+from app.db.models import MediaWebhookDelivery
+from app.media import routes as media_routes
+from app.media.cache import SWRCache
+from app.http_clients import HttpClientPool
+from app.media.sync import CatalogSync, _radarr_summary, _sonarr_summary
+from tests.conftest import TestSession
+
+
+class TestSWRCache:
+    """Tests du cache stale-while-revalidate."""
+
+    async def test_cold_load_is_single_flight(self):
+        cache = SWRCache()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"v": calls}
+
+        results = await asyncio.gather(*(cache.get("k", 60, loader) for _ in range(5)))
+        assert calls == 1
+        assert results == [{"v": 1}] * 5
+
+    async def test_stale_served_while_refreshing(self):
+        cache = SWRCache()
+        release = asyncio.Event()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            if calls > 1:
+                await release.wait()
+            return calls
+
+        assert await cache.get("k", 0, loader) == 1
+        # TTL ecoulee : valeur perimee servie tout de suite, un seul rafraichissement
+        assert await cache.get("k", 0, loader) == 1
+        assert await cache.get("k", 0, loader) == 1
+        await asyncio.sleep(0)
+        assert calls == 2
+        release.set()
+        await cache._entries["k"].task
+        assert await cache.get("k", 60, loader) == 2
+
+    async def test_failure_keeps_previous_value(self):
+        cache = SWRCache()
+        await cache.get("k", 0, lambda: asyncio.sleep(0, result="ok"))
+
+        async def failing():
+            raise RuntimeError("upstream down")
+
+        assert await cache.get("k", 0, failing) == "ok"
+        await cache._entries["k"].task
+        assert await cache.get("k", 60, failing) == "ok"
+
+    async def test_cold_failure_cached_briefly(self, monkeypatch):
+        cache = SWRCache(negative_ttl=30)
+        calls = 0
+
+        async def failing():
+            nonlocal calls
+            calls += 1
+            raise RuntimeError("upstream down")
+
+        assert await cache.get("k", 60, failing) is None
+        # Echec memorise : pas de nouvel appel amont, reponse immediate
+        assert await cache.get("k", 60, failing) is None
+        assert calls == 1
+        assert cache.stats()["k"]["error"] == "upstream down"
+
+        # Apres la TTL negative : reponse toujours immediate, nouvel essai en fond
+        cache._entries["k"].failed_at -= 30
+        assert await cache.get("k", 60, lambda: asyncio.sleep(0, result="ok")) is None
+        await cache._entries["k"].task
+        assert await cache.get("k", 60, failing) == "ok"
+        assert cache.stats()["k"]["error"] is None
+
+    async def test_failed_refresh_of_stale_value_backs_off(self):
+        cache = SWRCache(negative_ttl=30)
+        calls = 0
+
+        async def failing():
+            nonlocal calls
+            calls += 1
+            raise RuntimeError("upstream down")
+
+        await cache.get("k", 60, lambda: asyncio.sleep(0, result="old"))
+        cache.invalidate("k")
+        assert await cache.get("k", 60, failing) == "old"
+        await cache._entries["k"].task
+        assert calls == 1
+
+        # Valeur perimee + echec recent : servie sans relancer le service a chaque lecture
+        for _ in range(5):
+            assert await cache.get("k", 60, failing) == "old"
+        assert calls == 1
+
+        cache._entries["k"].failed_at -= 30
+        assert await cache.get("k", 60, lambda: asyncio.sleep(0, result="new")) == "old"
+        await cache._entries["k"].task
+        assert await cache.get("k", 60, failing) == "new"
+
+    async def test_invalidate_and_set(self):
+        cache = SWRCache()
+        await cache.get("k", 60, lambda: asyncio.sleep(0, result=1))
+        cache.set("k", 5)
+        assert await cache.get("k", 60, lambda: asyncio.sleep(0, result=9)) == 5
+        cache.invalidate("k")
+        assert await cache.get("k", 60, lambda: asyncio.sleep(0, result=9)) == 5
+        await cache._entries["k"].task
+        assert await cache.get("k", 60, lambda: asyncio.sleep(0, result=10)) == 9
+
+
+class TestMediaOverview:
+    """Tests du endpoint /media/overview."""
+
+    @pytest.fixture(autouse=True)
+    def _fresh_cache(self, monkeypatch):
+        monkeypatch.setattr(media_routes, "media_cache", SWRCache())
+        settings = get_settings()
+        monkeypatch.setattr(settings, "media_radarr_url", "http://radarr.local")
+        monkeypatch.setattr(settings, "media_radarr_api_key", "key")
+
+    async def test_requires_auth(self, client: AsyncClient):
+        resp = await client.get("/media/overview")
+        assert resp.status_code in (401, 403)
+
+    async def test_overview_shape_and_cache(self, client: AsyncClient, auth_headers: dict, monkeypatch):
+        calls: list[str] = []
+
+        async def fake_load(piece, url, secret):
+            calls.append(piece)
+            if piece == "radarr.catalog":
+                return {"total_movies": 3, "monitored": 2}
+            return None  # activite en erreur
+
+        monkeypatch.setattr(media_routes, "_load_piece", fake_load)
+
+        resp = await client.get("/media/overview", headers=auth_headers)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["plex"] is None
+        assert data["radarr"]["total_movies"] == 3
+        assert data["radarr"]["queue_count"] == 0  # Piece absente : valeur neutre
+        assert sorted(calls) == ["radarr.activity", "radarr.catalog"]
+
+        calls.clear()
+        await client.get("/media/overview", headers=auth_headers)
+        # Catalogue frais, echec de l'activite memorise (TTL negative) : aucun appel amont
+        assert calls == []
+
+
+class TestCatalogSync:
+    """Tests de la synchro incrementale des catalogues *arr."""
+
+    @staticmethod
+    def _client(series: dict[int, dict], history: list[dict], calls: list[str]) -> httpx.AsyncClient:
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            calls.append(path)
+            if path == "/api/v3/series":
+                return httpx.Response(200, json=list(series.values()))
+            if path == "/api/v3/history/since":
+                return httpx.Response(200, json=history)
+            item_id = int(path.rsplit("/", 1)[1])
+            if item_id not in series:
+                return httpx.Response(404)
+            return httpx.Response(200, json=series[item_id])
+
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    @staticmethod
+    def _series(item_id: int, monitored: bool, files: int) -> dict:
+        return {"id": item_id, "monitored": monitored, "statistics": {"episodeFileCount": files}}
+
+    def _sync(self) -> CatalogSync:
+        return CatalogSync(
+            "sonarr", "series", "seriesId", "total_series", ("monitored", "total_episodes"), _sonarr_summary,
+        )
+
+    async def test_incremental_fetches_only_changed_items(self):
+        series = {1: self._series(1, True, 10), 2: self._series(2, False, 4), 3: self._series(3, True, 1)}
+        history: list[dict] = []
+        calls: list[str] = []
+        sync = self._sync()
+        async with self._client(series, history, calls) as client:
+            first = await sync.refresh(client, "http://sonarr", "key", 3600)
+            assert first == {"total_series": 3, "monitored": 2, "total_episodes": 15}
+
+            series[2] = self._series(2, True, 6)
+            del series[3]
+            history.extend([{"seriesId": 2}, {"seriesId": 2}, {"seriesId": 3}])
+            calls.clear()
+            second = await sync.refresh(client, "http://sonarr", "key", 3600)
+
+        assert second == {"total_series": 2, "monitored": 2, "total_episodes": 16}
+        assert "/api/v3/series" not in calls
+        assert sorted(calls) == ["/api/v3/history/since", "/api/v3/series/2", "/api/v3/series/3"]
+        assert sync.stats()["full_syncs"] == 1
+
+    async def test_incremental_digest_matches_full_listing(self):
+        series = {1: self._series(1, True, 10), 2: self._series(2, False, 4)}
+        history: list[dict] = []
+        sync = self._sync()
+        async with self._client(series, history, []) as client:
+            await sync.refresh(client, "http://sonarr", "key", 3600)
+            series[2] = self._series(2, True, 5)
+            series[7] = self._series(7, False, 0)
+            del series[1]
+            history.extend([{"seriesId": 1}, {"seriesId": 2}, {"seriesId": 7}])
+            await sync.refresh(client, "http://sonarr", "key", 3600)
+
+            fresh = self._sync()
+            await fresh.refresh(client, "http://sonarr", "key", 3600)
+        assert sync.stats()["full_syncs"] == 1
+        assert sync.digest == fresh.digest
+
+    async def test_reconcile_catches_changes_outside_history(self):
+        series = {1: self._series(1, True, 2)}
+        calls: list[str] = []
+        sync = self._sync()
+        async with self._client(series, [], calls) as client:
+            await sync.refresh(client, "http://sonarr", "key", 0)
+            series[4] = self._series(4, True, 0)  # Ajout sans evenement d'historique
+            result = await sync.refresh(client, "http://sonarr", "key", 0)
+        assert result["total_series"] == 2
+        assert sync.stats()["full_syncs"] == 2
+
+
+class FakeRadarr:
+    """Serveur Radarr de substitution (httpx.MockTransport)."""
+
+    def __init__(self):
+        self.movies = {1: {"id": 1, "monitored": True}, 2: {"id": 2, "monitored": False}}
+        self.queue = 0
+        self.calls: list[str] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.calls.append(path)
+        if path == "/api/v3/movie":
+            return httpx.Response(200, json=list(self.movies.values()))
+        if path.startswith("/api/v3/movie/"):
+            movie = self.movies.get(int(path.rsplit("/", 1)[1]))
+            return httpx.Response(200, json=movie) if movie else httpx.Response(404)
+        if path == "/api/v3/history/since":
+            return httpx.Response(200, json=[])
+        if path == "/api/v3/queue":
+            return httpx.Response(200, json={"totalRecords": self.queue})
+        return httpx.Response(200, json=[])
+
+
+class TestMediaWebhooks:
+    """Tests des webhooks /media/webhooks/{service}."""
+
+    TOKEN = "webhook-secret"
+
+    @pytest.fixture(autouse=True)
+    def _setup(self, monkeypatch):
+        self.radarr = FakeRadarr()
+        pool = HttpClientPool()
+        pool.transport = httpx.MockTransport(self.radarr.handler)
+        sync = CatalogSync("radarr", "movie", "movieId", "total_movies", ("monitored",), _radarr_summary)
+        monkeypatch.setattr(media_routes, "http_pool", pool)
+        monkeypatch.setattr(media_routes, "media_cache", SWRCache())
+        monkeypatch.setattr(media_routes, "radarr_sync", sync)
+        monkeypatch.setattr(media_routes, "CATALOG_SYNCS", {"radarr": sync})
+        monkeypatch.setattr(media_routes, "webhook_seen", {})
+        settings = get_settings()
+        monkeypatch.setattr(settings, "media_radarr_url", "http://radarr.local")
+        monkeypatch.setattr(settings, "media_radarr_api_key", "key")
+        monkeypatch.setattr(settings, "media_webhook_token", self.TOKEN)
+
+    async def _settle(self, piece: str):
+        task = media_routes.media_cache._entries[piece].task
+        if task is not None:
+            await task
+
+    async def test_rejects_bad_token(self, client: AsyncClient):
+        resp = await client.post("/media/webhooks/radarr?token=nope", json={"eventType": "Grab"})
+        assert resp.status_code == 401
+
+    async def test_rejects_non_ascii_token(self, client: AsyncClient):
+        resp = await client.post("/media/webhooks/radarr?token=caf%C3%A9", json={"eventType": "Grab"})
+        assert resp.status_code == 401
+
+    async def test_disabled_without_token(self, client: AsyncClient, monkeypatch):
+        monkeypatch.setattr(get_settings(), "media_webhook_token", None)
+        resp = await client.post(f"/media/webhooks/radarr?token={self.TOKEN}", json={"eventType": "Grab"})
+        assert resp.status_code == 404
+
+    async def test_grab_refreshes_activity_only(self, client: AsyncClient, auth_headers: dict):
+        data = (await client.get("/media/overview", headers=auth_headers)).json()
+        assert data["radarr"]["queue_count"] == 0
+        assert data["radarr"]["total_movies"] == 2
+
+        self.radarr.queue = 3
+        self.radarr.calls.clear()
+        resp = await client.post(f"/media/webhooks/radarr?token={self.TOKEN}", json={"eventType": "Grab"})
+        assert resp.json() == {"event": "Grab", "refreshed": ["radarr.activity"]}
+        await self._settle("radarr.activity")
+
+        assert "/api/v3/movie" not in self.radarr.calls
+        data = (await client.get("/media/overview", headers=auth_headers)).json()
+        assert data["radarr"]["queue_count"] == 3
+
+    async def test_movie_added_is_fetched_without_full_listing(self, client: AsyncClient, auth_headers: dict):
+        await client.get("/media/overview", headers=auth_headers)
+        self.radarr.movies[7] = {"id": 7, "monitored": True}
+        self.radarr.calls.clear()
+
+        resp = await client.post(
+            f"/media/webhooks/radarr?token={self.TOKEN}",
+            json={"eventType": "MovieAdded", "movie": {"id": 7, "title": "Nouveau"}},
+        )
+        assert resp.json()["refreshed"] == ["radarr.catalog"]
+        await self._settle("radarr.catalog")
+
+        assert "/api/v3/movie" not in self.radarr.calls
+        assert "/api/v3/movie/7" in self.radarr.calls
+        data = (await client.get("/media/overview", headers=auth_headers)).json()
+        assert data["radarr"]["total_movies"] == 3
+        assert data["radarr"]["monitored"] == 2
+
+    async def test_redelivery_not_processed_twice(self, client: AsyncClient):
+        """Relivraison (retry du service, autre worker, redemarrage) : dedup en DB."""
+        url = f"/media/webhooks/radarr?token={self.TOKEN}"
+        body = {"eventType": "Grab", "movie": {"id": 1}}
+        assert (await client.post(url, json=body)).json()["refreshed"] == ["radarr.activity"]
+        await self._settle("radarr.activity")
+
+        resp = await client.post(url, json=body)
+        assert resp.json() == {"event": "Grab", "refreshed": [], "duplicate": True}
+        async with TestSession() as session:
+            rows = (await session.execute(select(MediaWebhookDelivery))).scalars().all()
+        assert [r.service for r in rows] == ["radarr"]
+
+        # Autre corps : traite
+        other = await client.post(url, json={"eventType": "Grab", "movie": {"id": 2}})
+        assert other.json()["refreshed"] == ["radarr.activity"]
+
+    async def test_identical_event_after_window_processed(self, client: AsyncClient):
+        url = f"/media/webhooks/radarr?token={self.TOKEN}"
+        await client.post(url, json={"eventType": "Grab"})
+        await self._settle("radarr.activity")
+        async with TestSession() as session:
+            await session.execute(update(MediaWebhookDelivery).values(
+                received_at=datetime.now(timezone.utc) - timedelta(seconds=get_settings().media_webhook_dedupe_window + 1)
+            ))
+            await session.commit()
+
+        resp = await client.post(url, json={"eventType": "Grab"})
+        assert resp.json() == {"event": "Grab", "refreshed": ["radarr.activity"]}
+
+    async def test_plex_multipart_payload(self, client: AsyncClient):
+        resp = await client.post(
+            f"/media/webhooks/plex?token={self.TOKEN}",
+            files={"payload": (None, '{"event": "media.play"}')},
+        )
+        assert resp.status_code == 200
+        # Plex non configure dans ce test : evenement reconnu, rien a rafraichir
+        assert resp.json() == {"event": "media.play", "refreshed": []}
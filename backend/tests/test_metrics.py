@@ -0,0 +1,77 @@
+"""Tests pour les metriques Prometheus (/metrics)."""
+import pytest
+from httpx import AsyncClient
+
+from app.config import get_settings
+from app.metrics import Registry
+
+
+class TestRegistry:
+    """Collecteurs et format d'exposition."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry(prefix="t_")
+        hist = registry.histogram("latency_seconds", "Latence", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            hist.observe(value, route="/a")
+
+        text = registry.render()
+        assert '# TYPE t_latency_seconds histogram' in text
+        assert 't_latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+        assert 't_latency_seconds_bucket{route="/a",le="1"} 3' in text
+        assert 't_latency_seconds_bucket{route="/a",le="+Inf"} 4' in text
+        assert 't_latency_seconds_count{route="/a"} 4' in text
+
+    def test_counter_gauge_and_labels(self):
+        registry = Registry(prefix="t_")
+        counter = registry.counter("events_total", "Evenements", ("kind",))
+        counter.inc(kind="a")
+        counter.inc(2, kind="a")
+        registry.gauge("depth", "Profondeur", fn=lambda: 7)
+
+        text = registry.render()
+        assert 't_events_total{kind="a"} 3' in text
+        assert "t_depth 7" in text
+        with pytest.raises(ValueError):
+            counter.inc(other="x")
+
+    def test_same_name_returns_same_metric(self):
+        registry = Registry()
+        assert registry.counter("x_total", "x") is registry.counter("x_total", "x")
+
+
+class TestMetricsEndpoint:
+    """Endpoint /metrics."""
+
+    TOKEN = "metrics-secret"
+
+    async def test_disabled_without_token(self, client: AsyncClient, monkeypatch):
+        monkeypatch.setattr(get_settings(), "metrics_token", None)
+        resp = await client.get("/metrics")
+        assert resp.status_code == 404
+
+    async def test_requires_token(self, client: AsyncClient, monkeypatch):
+        monkeypatch.setattr(get_settings(), "metrics_token", self.TOKEN)
+        resp = await client.get("/metrics", headers={"Authorization": "Bearer nope"})
+        assert resp.status_code == 401
+        resp = await client.get("/metrics", headers={"Authorization": "Bearer caf\xe9".encode("latin-1")})
+        assert resp.status_code == 401
+
+    async def test_query_token_rejected(self, client: AsyncClient, monkeypatch):
+        """Le token en query finirait dans les logs d'acces : seul l'en-tete est accepte."""
+        monkeypatch.setattr(get_settings(), "metrics_token", self.TOKEN)
+        resp = await client.get(f"/metrics?token={self.TOKEN}")
+        assert resp.status_code == 401
+
+    async def test_exposes_hot_path_metrics(self, client: AsyncClient, auth_headers: dict, monkeypatch):
+        monkeypatch.setattr(get_settings(), "metrics_token", self.TOKEN)
+        await client.get("/api/summary", headers=auth_headers)  # Requetes DB
+
+        resp = await client.get("/metrics", headers={"Authorization": f"Bearer {self.TOKEN}"})
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain")
+        body = resp.text
+        assert 'trackboard_db_query_seconds_count{operation="select"}' in body
+        assert "trackboard_ws_clients 0" in body
+        assert "# TYPE trackboard_scrape_duration_seconds histogram" in body
+        assert "trackboard_notification_queue_depth 0" in body
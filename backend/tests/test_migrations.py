@@ -0,0 +1,97 @@
+"""
+Tests des revisions Alembic (alembic/versions/).
+Chaque test lance `alembic` dans un sous-processus sur une base SQLite fichier :
+env.py lit DATABASE_URL via get_settings(), deja fige pour la session de test.
+"""
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.db.database import Base
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Schema d'avant les revisions, tel que cree par create_all sur une base deployee
+LEGACY_SCHEMA = """
+CREATE TABLE hardware_snapshots (
+    id INTEGER NOT NULL PRIMARY KEY, cpu_usage FLOAT, cpu_temp FLOAT, cpu_name VARCHAR(200),
+    ram_used_percent FLOAT, ram_used_gb FLOAT, ram_total_gb FLOAT, gpu_usage FLOAT, gpu_temp FLOAT,
+    gpu_name VARCHAR(200), gpu_vram_used FLOAT, storage JSON, raw_data JSON, recorded_at DATETIME NOT NULL
+);
+CREATE INDEX ix_hardware_snapshots_recorded_at ON hardware_snapshots (recorded_at);
+INSERT INTO hardware_snapshots (cpu_usage, recorded_at) VALUES (12.5, '2026-01-01 00:00:00');
+CREATE TABLE scraper_state (
+    tracker_name VARCHAR(100) NOT NULL PRIMARY KEY, consecutive_failures INTEGER NOT NULL,
+    last_success_at DATETIME, last_known_active_warnings INTEGER NOT NULL, updated_at DATETIME NOT NULL
+);
+INSERT INTO scraper_state VALUES ('t1', 2, NULL, 0, '2026-01-01 00:00:00');
+"""
+
+
+def alembic(db_path: Path, *args: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{db_path}"}
+    return subprocess.run(
+        [sys.executable, "-m", "alembic", *args],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60,
+    )
+
+
+def columns(db_path: Path, table: str) -> set[str]:
+    with sqlite3.connect(db_path) as db:
+        return {row[1] for row in db.execute(f"PRAGMA table_info({table})")}
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as db:
+        db.executescript(LEGACY_SCHEMA)
+    return path
+
+
+class TestMigrations:
+    """Les revisions doivent passer sur une base ancienne comme sur une base create_all."""
+
+    def test_upgrade_adds_missing_columns(self, legacy_db):
+        result = alembic(legacy_db, "upgrade", "head")
+        assert result.returncode == 0, result.stderr
+
+        snapshot_columns = columns(legacy_db, "hardware_snapshots")
+        assert "inventory_id" in snapshot_columns
+        assert {"cpu_usage_min", "cpu_usage_max", "gpu_usage_max", "gpu_temp_max"} <= snapshot_columns
+        assert {"cpu_temp_max", "ram_used_percent_max"} <= snapshot_columns
+        assert {"net_download", "net_download_max", "net_upload", "net_upload_max"} <= snapshot_columns
+        assert {"device", "percent", "recorded_at"} <= columns(legacy_db, "hardware_disk_samples")
+        assert {"name", "temp", "recorded_at"} <= columns(legacy_db, "hardware_disk_temps")
+        assert "id" in columns(legacy_db, "hardware_inventory")
+        assert {"holder", "expires_at"} <= columns(legacy_db, "leader_leases")
+        assert {"fingerprint", "received_at"} <= columns(legacy_db, "media_webhook_deliveries")
+        with sqlite3.connect(legacy_db) as db:
+            assert db.execute("SELECT cpu_usage, inventory_id FROM hardware_snapshots").fetchall() == [(12.5, None)]
+            # Colonnes NOT NULL remplies par le defaut serveur sur les lignes existantes
+            assert db.execute(
+                "SELECT consecutive_failures, status, parser_suspect, last_error FROM scraper_state"
+            ).fetchall() == [(2, "ok", 0, None)]
+
+    def test_upgrade_on_create_all_schema(self, tmp_path):
+        """Base neuve : init_db() a deja tout cree, upgrade ne fait que noter la revision."""
+        path = tmp_path / "fresh.db"
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        engine.dispose()
+
+        result = alembic(path, "upgrade", "head")
+        assert result.returncode == 0, result.stderr
+        assert alembic(path, "current").stdout.strip().endswith("(head)")
+
+    def test_downgrade_roundtrip(self, legacy_db):
+        assert alembic(legacy_db, "upgrade", "head").returncode == 0
+        result = alembic(legacy_db, "downgrade", "base")
+        assert result.returncode == 0, result.stderr
+        assert "inventory_id" not in columns(legacy_db, "hardware_snapshots")
+        assert alembic(legacy_db, "upgrade", "head").returncode == 0
@@ -0,0 +1,97 @@
+"""Tests pour la file d'envoi des notifications Discord."""
+import json
+
+import httpx
+import pytest
+
+from app import notifications
+from app.config import get_settings
+from app.http_clients import HttpClientPool
+from app.notifications import NotificationDispatcher
+
+WEBHOOK = "https://discord.test/api/webhooks/1/abc"
+
+
+class FakeDiscord:
+    """Webhook Discord de substitution : enregistre les messages, 429 a la demande."""
+
+    def __init__(self, rate_limit_first: int = 0, reject_first: int = 0):
+        self.messages: list[dict] = []
+        self.rate_limit_first = rate_limit_first
+        self.reject_first = reject_first
+        self.attempts = 0
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.attempts += 1
+        if self.attempts <= self.reject_first:
+            return httpx.Response(400, json={"message": "Invalid Form Body"})
+        if self.attempts <= self.rate_limit_first:
+            return httpx.Response(429, json={"retry_after": 0.01, "global": False})
+        self.messages.append(json.loads(request.content))
+        return httpx.Response(204)
+
+
+def _embed(i: int) -> dict:
+    return {"title": f"Alerte {i}", "description": "x", "timestamp": f"2026-01-01T00:00:{i:02d}"}
+
+
+class TestNotificationDispatcher:
+
+    @pytest.fixture(autouse=True)
+    def _webhook(self, monkeypatch):
+        settings = get_settings()
+        monkeypatch.setattr(settings, "discord_webhook_url", WEBHOOK)
+        monkeypatch.setattr(settings, "discord_dedupe_window", 600)
+        monkeypatch.setattr(notifications, "BATCH_WINDOW", 0.05)
+
+    def _dispatcher(self, discord: FakeDiscord) -> NotificationDispatcher:
+        pool = HttpClientPool()
+        pool.transport = httpx.MockTransport(discord.handler)
+        return NotificationDispatcher(pool=pool)
+
+    async def test_burst_is_batched_by_ten(self):
+        discord = FakeDiscord()
+        dispatcher = self._dispatcher(discord)
+        for i in range(15):
+            dispatcher.submit(_embed(i), ping_here=(i == 12))
+        await dispatcher.stop()
+
+        assert [len(m["embeds"]) for m in discord.messages] == [10, 5]
+        assert "content" not in discord.messages[0]
+        assert discord.messages[1]["content"] == "@here"
+        assert dispatcher.stats()["sent"] == 15
+
+    async def test_rate_limit_is_retried(self):
+        discord = FakeDiscord(rate_limit_first=2)
+        dispatcher = self._dispatcher(discord)
+        dispatcher.submit(_embed(1))
+        await dispatcher.stop()
+
+        assert len(discord.messages) == 1
+        assert dispatcher.stats()["rate_limited"] == 2
+
+    async def test_identical_alerts_are_deduped(self):
+        discord = FakeDiscord()
+        dispatcher = self._dispatcher(discord)
+        # Meme alerte, horodatage different
+        dispatcher.submit({**_embed(1), "timestamp": "a"})
+        dispatcher.submit({**_embed(1), "timestamp": "b"})
+        dispatcher.submit(_embed(2))
+        await dispatcher.stop()
+
+        assert [e["title"] for e in discord.messages[0]["embeds"]] == ["Alerte 1", "Alerte 2"]
+        assert dispatcher.stats()["deduped"] == 1
+
+    async def test_failed_alert_not_deduped(self):
+        discord = FakeDiscord(reject_first=1)
+        dispatcher = self._dispatcher(discord)
+        dispatcher.submit(_embed(1))
+        await dispatcher.queue.join()
+        assert discord.messages == []
+
+        # Lot refuse : la meme alerte peut repartir
+        dispatcher.submit({**_embed(1), "timestamp": "b"})
+        await dispatcher.stop()
+        assert [e["title"] for e in discord.messages[0]["embeds"]] == ["Alerte 1"]
+        assert dispatcher.stats()["failed"] == 1
+        assert dispatcher.stats()["deduped"] == 0
@@ -0,0 +1,60 @@
+"""Tests pour le profileur echantillonneur (/admin/profile)."""
+import asyncio
+import time
+
+from httpx import AsyncClient
+
+from app.profiler import SamplingProfiler
+
+
+def _busy(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(200))
+
+
+async def busy_task():
+    _busy(0.2)
+
+
+class TestSamplingProfiler:
+
+    async def test_samples_attributed_to_task(self):
+        profiler = SamplingProfiler(interval=0.002, loop=asyncio.get_running_loop())
+        profiler.start()
+        await asyncio.create_task(busy_task())
+        profiler.stop()
+
+        output = profiler.collapsed()
+        assert profiler.samples > 10
+        busy = [line for line in output.splitlines() if "test_profiler.py:_busy" in line]
+        assert busy
+        assert all(line.startswith("task:busy_task;") for line in busy)
+        name, own, total = profiler.functions()[0]
+        assert own > 0 and total >= own
+
+    async def test_html_report(self):
+        profiler = SamplingProfiler(interval=0.002, loop=asyncio.get_running_loop())
+        profiler.start()
+        _busy(0.05)
+        profiler.stop()
+        assert "<table>" in profiler.html()
+
+
+class TestProfileEndpoint:
+
+    async def test_requires_auth(self, client: AsyncClient):
+        resp = await client.get("/admin/profile?seconds=0.1")
+        assert resp.status_code in (401, 403)
+
+    async def test_rejects_long_profiles(self, client: AsyncClient, auth_headers: dict):
+        resp = await client.get("/admin/profile?seconds=600", headers=auth_headers)
+        assert resp.status_code == 422
+
+    async def test_collapsed_output(self, client: AsyncClient, auth_headers: dict):
+        resp = await client.get("/admin/profile?seconds=0.1&interval_ms=2", headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain")
+        for line in resp.text.splitlines():
+            stack, count = line.rsplit(" ", 1)
+            assert int(count) > 0 and stack
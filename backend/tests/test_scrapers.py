@@ -1,8 +1,21 @@
 """Tests pour les scrapers et leur registry."""
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+
 import pytest
 from httpx import AsyncClient
+from app.scrapers import leader as leader_mod
+from app.scrapers import routes as scraper_routes
 from app.scrapers.registry import SITES_CONFIG, get_credentials_from_env
 from app.scrapers.base import BaseScraper, ScrapedStats
+from app.db.models import ScrapeJob, TrackerStats
+from app.scrapers.leader import LeaderElection, acquire_lease, lease_holder, release_lease
+from app.scrapers.pool import ScrapePool
+from app.scrapers.worker import run_job
+from app.scrapers.tracing import span, start_trace, step_stats
+from sqlalchemy import select
+from tests.conftest import TestSession
 
 
 class TestScraperRegistry:
@@ -112,3 +125,239 @@ class TestBaseScraperUtils:
     def test_format_duration_none(self):
         assert BaseScraper.format_duration(None) == "0"
         assert BaseScraper.format_duration("0") == "0"
+
+
+class TestScrapeTracing:
+    """Tests des traces de scrape (spans, table scrape_runs, p50/p95)."""
+
+    def test_span_outside_trace_is_noop(self):
+        with span("goto"):
+            pass
+
+    async def test_nested_spans_and_task_isolation(self):
+        async def run(name: str, delay: float):
+            trace = start_trace(name)
+            with span("cookies"):
+                with span("goto_profile"):
+                    await asyncio.sleep(delay)
+            trace.finish()
+            return trace
+
+        a, b = await asyncio.gather(run("A", 0.01), run("B", 0))
+        assert [s[0] for s in a.spans] == ["cookies/goto_profile", "cookies"]
+        assert [s[0] for s in b.spans] == ["cookies/goto_profile", "cookies"]
+        assert a.spans[0][2] >= 10
+
+    def test_step_stats_sums_repeated_steps(self):
+        runs = [
+            [["login", 0, 100.0, 0], ["parse/get_value:Ratio", 0, 5.0, 0], ["parse/get_value:Ratio", 0, 5.0, 0]],
+            [["login", 0, 300.0, 0], ["parse/get_value:Ratio", 0, 20.0, 0]],
+        ]
+        steps = {s["step"]: s for s in step_stats(runs)}
+        assert steps["login"]["p50_ms"] == 200.0
+        assert steps["login"]["max_ms"] == 300.0
+        assert steps["parse/get_value:Ratio"]["p50_ms"] == 15.0
+        assert step_stats(runs)[0]["step"] == "login"  # Plus lent en tete
+
+    async def test_scrape_run_persisted_and_exposed(self, client: AsyncClient, auth_headers: dict, monkeypatch):
+        monkeypatch.setattr(scraper_routes, "async_session", TestSession)
+
+        class FakeScraper:
+            async def run(self, browser):
+                with span("login"):
+                    await asyncio.sleep(0)
+                return ScrapedStats(tracker_name="Fake", raw_data={"error": "login_failed"})
+
+        await scraper_routes._scrape_single("Fake", FakeScraper(), browser=None)
+        scraper_routes._scrape_results.pop("Fake", None)
+
+        resp = await client.get("/scrapers/runs?tracker=Fake", headers=auth_headers)
+        run = resp.json()["runs"][0]
+        assert run["status"] == "skipped"
+        assert [s["step"] for s in run["spans"]] == ["login", "save_db"]
+
+        resp = await client.get("/scrapers/runs/steps?tracker=Fake", headers=auth_headers)
+        data = resp.json()
+        assert data["runs"] == 1
+        assert {s["step"] for s in data["steps"]} == {"login", "save_db"}
+
+
+class TestLeaderElection:
+    """Election du planificateur et etat partage entre workers."""
+
+    async def test_lease_exclusive_until_expired(self):
+        async with TestSession() as db:
+            assert await acquire_lease(db, "job", "w1", ttl=60)
+            assert not await acquire_lease(db, "job", "w2", ttl=60)
+            assert await acquire_lease(db, "job", "w1", ttl=-1)  # Renouvellement (ici deja expire)
+            assert await lease_holder(db, "job") is None
+            assert await acquire_lease(db, "job", "w2", ttl=60)  # Reprise d'un bail expire
+            assert await lease_holder(db, "job") == "w2"
+            await release_lease(db, "job", "w1")  # Pas le detenteur : sans effet
+            assert await lease_holder(db, "job") == "w2"
+            await release_lease(db, "job", "w2")
+            assert await lease_holder(db, "job") is None
+
+    async def test_single_leader_and_failover(self, monkeypatch):
+        monkeypatch.setattr(leader_mod, "async_session", TestSession)
+        events = []
+        first = LeaderElection("scheduler", ttl=0.3, worker_id="w1")
+        second = LeaderElection("scheduler", ttl=0.3, worker_id="w2")
+        first.start(lambda: events.append("w1+"), lambda: events.append("w1-"))
+        await asyncio.sleep(0.05)
+        second.start(lambda: events.append("w2+"), lambda: events.append("w2-"))
+        await asyncio.sleep(0.25)
+        assert first.is_leader and not second.is_leader
+        assert events == ["w1+"]
+
+        await first.stop()  # Bail libere : l'autre worker prend la main au tour suivant
+        await asyncio.sleep(0.25)
+        await second.stop()
+        assert events == ["w1+", "w1-", "w2+", "w2-"]
+        assert second.stats()["backend"] == "lease"
+
+    async def test_status_shared_through_db(self, client: AsyncClient, monkeypatch):
+        monkeypatch.setattr(scraper_routes, "async_session", TestSession)
+
+        class FailingScraper:
+            async def run(self, browser):
+                raise RuntimeError("timeout")
+
+        await scraper_routes._scrape_single("Fake", FailingScraper(), browser=None)
+        scraper_routes._scrape_results.clear()  # Un autre worker n'a rien en memoire
+
+        # Les compteurs repartent de la DB
+        await scraper_routes._scrape_single("Fake", FailingScraper(), browser=None)
+        scraper_routes._scrape_results.clear()
+
+        assert await scraper_routes.claim_scraping()
+        resp = await client.get("/scrapers/status")
+        data = resp.json()
+        assert data["scraping_in_progress"] is True
+        fake = data["tracker_status"]["Fake"]
+        assert fake["status"] == "error"
+        assert fake["consecutive_failures"] == 2
+        assert fake["last_error"] == "timeout"
+
+        await scraper_routes.release_scraping()
+        resp = await client.get("/scrapers/status")
+        assert resp.json()["scraping_in_progress"] is False
+
+    async def test_claim_not_reentrant(self, monkeypatch):
+        monkeypatch.setattr(scraper_routes, "async_session", TestSession)
+        assert await scraper_routes.claim_scraping()
+        # Double clic ou cycle planifie pendant un scrape du meme worker : refuse
+        assert not await scraper_routes.claim_scraping()
+        await scraper_routes.release_scraping()
+        assert await scraper_routes.claim_scraping()
+        await scraper_routes.release_scraping()
+
+    async def test_claim_busy_across_workers(self, monkeypatch):
+        monkeypatch.setattr(scraper_routes, "async_session", TestSession)
+        async with TestSession() as db:
+            assert await acquire_lease(db, scraper_routes.SCRAPE_LEASE, "other-worker", ttl=60)
+        assert not await scraper_routes.claim_scraping()
+
+
+@asynccontextmanager
+async def no_browser():
+    yield None
+
+
+async def queue_job(name: str) -> int:
+    async with TestSession() as db:
+        job = ScrapeJob(tracker_name=name, status="queued")
+        db.add(job)
+        await db.commit()
+        return job.id
+
+
+class TestScrapeJobs:
+    """SCRAPE_MODE=process : jobs scrape_jobs et pool de processus limites."""
+
+    async def test_worker_records_result_and_trace(self):
+        class FakeScraper:
+            async def run(self, browser):
+                with span("login"):
+                    await asyncio.sleep(0)
+                return ScrapedStats(tracker_name="Fake", ratio="2.5")
+
+        job_id = await queue_job("Fake")
+        status = await run_job(job_id, TestSession, resolve=lambda name: FakeScraper(), launch=no_browser)
+        assert status == "done"
+        # Deja pris : pas de second passage
+        assert await run_job(job_id, TestSession, resolve=lambda name: FakeScraper(), launch=no_browser) is None
+
+        async with TestSession() as db:
+            job = await db.get(ScrapeJob, job_id)
+        assert job.result["ratio"] == "2.5"
+        assert [s[0] for s in job.spans] == ["login"]
+        assert job.worker_pid and job.finished_at and job.duration_ms is not None
+
+    async def test_worker_unknown_tracker_fails(self):
+        job_id = await queue_job("Absent")
+        assert await run_job(job_id, TestSession, resolve=lambda name: None, launch=no_browser) == "failed"
+        async with TestSession() as db:
+            job = await db.get(ScrapeJob, job_id)
+        assert "non configure" in job.error
+
+    async def run_pool(self, code: str, **limits) -> ScrapeJob:
+        pool = ScrapePool(size=1, command=[sys.executable, "-c", code], **limits)
+        pool.session_factory = TestSession
+        done = []
+
+        async def on_done(job):
+            done.append(job)
+
+        await pool.run(["Fake"], on_done)
+        assert not pool.processes
+        return done[0]
+
+    async def test_pool_kills_on_timeout(self):
+        job = await self.run_pool("import time; time.sleep(30)", timeout=0.5)
+        assert job.status == "killed"
+        assert "timeout" in job.error
+
+    async def test_pool_kills_on_memory(self):
+        job = await self.run_pool("import time; data = b'x' * 150_000_000; time.sleep(30)", memory_mb=50)
+        assert job.status == "killed"
+        assert "memoire" in job.error
+
+    async def test_worker_cpu_limit_kills(self):
+        # Meme appel que worker.main() : la limite passe en argv, posee dans le fils
+        code = "import sys\nfrom app.scrapers.worker import limit_cpu\nlimit_cpu(int(sys.argv[2]))\nwhile True: pass"
+        job = await self.run_pool(code, cpu_seconds=1)
+        assert job.status == "killed"
+        assert "cpu" in job.error
+
+    async def test_pool_crash_marks_failed(self):
+        job = await self.run_pool("import sys; sys.exit(3)")
+        assert job.status == "failed"
+        assert "code 3" in job.error
+        assert job.finished_at is not None
+
+    async def test_job_result_recorded_by_api(self, client: AsyncClient, auth_headers: dict, monkeypatch):
+        monkeypatch.setattr(scraper_routes, "async_session", TestSession)
+
+        class FakeScraper:
+            async def run(self, browser):
+                with span("login"):
+                    await asyncio.sleep(0)
+                return ScrapedStats(tracker_name="Fake", ratio="2.5")
+
+        job_id = await queue_job("Fake")
+        await run_job(job_id, TestSession, resolve=lambda name: FakeScraper(), launch=no_browser)
+        async with TestSession() as db:
+            job = await db.get(ScrapeJob, job_id)
+        await scraper_routes._record_scrape_job(job)
+        scraper_routes._scrape_results.clear()
+
+        async with TestSession() as db:
+            saved = (await db.execute(select(TrackerStats).where(TrackerStats.tracker_name == "Fake"))).scalar()
+        assert saved.ratio == 2.5
+
+        resp = await client.get("/scrapers/status")
+        assert resp.json()["tracker_status"]["Fake"]["status"] == "ok"
+        resp = await client.get("/scrapers/runs?tracker=Fake", headers=auth_headers)
+        run = resp.json()["runs"][0]
+        assert [s["step"] for s in run["spans"]] == ["login", "save_db"]
@@ -6,6 +6,7 @@ export interface ProcessData {
   name: string;
   id: number;
   memoryUsedMb: number;
+  cpuPercent?: number;
 }
 
 export interface GpuData {
@@ -58,6 +59,15 @@ export interface HardwareStats {
   timestamp: string;
 }
 
+// Abonnement WebSocket : tout a la cadence de l'agent quand l'onglet est visible,
+// le strict minimum toutes les 30s en arriere-plan (cout quasi nul cote serveur).
+const VISIBLE_SUBSCRIPTION = { type: 'subscribe', min_interval: 0 };
+const HIDDEN_SUBSCRIPTION = { type: 'subscribe', sections: ['cpu', 'ram'], min_interval: 30 };
+
+function currentSubscription() {
+  return document.visibilityState === 'hidden' ? HIDDEN_SUBSCRIPTION : VISIBLE_SUBSCRIPTION;
+}
+
 interface UseHardwareStatsOptions {
   interval?: number;
   historyLength?: number;
@@ -95,6 +105,7 @@ function transformAgentData(data: any): HardwareStats {
       name: p.name || 'Unknown',
       id: p.id || 0,
       memoryUsedMb: p.memory_mb || 0,
+      cpuPercent: p.cpu_percent ?? 0,
     })),
     ramUsed: ram.used_gb || 0,
     ramTotal: ram.total_gb || 0,
@@ -213,11 +224,16 @@ export function useHardwareStats(options: UseHardwareStatsOptions = {}) {
         console.log('[HW Stats] WebSocket connected');
         setError(null);
         setLoading(false);
+        if (document.visibilityState === 'hidden') {
+          ws.send(JSON.stringify(HIDDEN_SUBSCRIPTION));
+        }
       };
 
       ws.onmessage = (event) => {
         try {
           const rawData = JSON.parse(event.data);
+          // Messages de controle (ex: ack "subscribed") : pas des stats
+          if (rawData.type) return;
           const data = transformAgentData(rawData);
 
           latestStatsRef.current = data;
@@ -258,11 +274,20 @@ export function useHardwareStats(options: UseHardwareStatsOptions = {}) {
       };
     };
 
+    const onVisibilityChange = () => {
+      const ws = wsRef.current;
+      if (ws && ws.readyState === WebSocket.OPEN) {
+        ws.send(JSON.stringify(currentSubscription()));
+      }
+    };
+
     if (isPolling && !IS_DEMO) {
       connect();
+      document.addEventListener('visibilitychange', onVisibilityChange);
     }
 
     return () => {
+      document.removeEventListener('visibilitychange', onVisibilityChange);
       if (wsRef.current) {
         wsRef.current.close();
         wsRef.current = null;
@@ -7,10 +7,22 @@ Fonctionnalités:
 - RAM: usage, détails
 - GPU: NVIDIA via nvidia-smi
 - Disques: noms via WMI, usage, températures via LHM WMI
+- Linux: capteurs natifs hwmon/thermal/NVMe via sysfs (cf sensors_linux.py)
 - Réseau: vitesse up/down
-- Processus: top 5 par RAM
+- Processus: top 5 par RAM et par CPU (table incrémentale)
 - Système: OS, uptime
 
+Chaque collecteur a son propre intervalle et tourne dans un pool de threads
+(cf SamplingPipeline). La boucle d'envoi lit un etat fusionne en cache et ne
+bloque jamais la boucle asyncio (keepalive websockets preserve).
+
+Les champs statiques (nom CPU, coeurs, RAM totale, GPU, disques, OS, hostname)
+partent dans un message "inventory" a la connexion et a chaque changement ;
+les trames periodiques ne portent que les valeurs dynamiques.
+
+CPU, reseau et GPU sont en plus echantillonnes a FAST_INTERVAL (FastSampler) :
+chaque trame porte la moyenne de la fenetre et ses _min/_max/_last.
+
 Configuration via .env:
     WS_URL=wss://api.dashboard.example.com/hardware/ws/agent
     HW_AGENT_TOKEN=your-secret-token
@@ -19,10 +31,19 @@ import os
 import sys
 import json
 import asyncio
+import base64
+import hashlib
+import heapq
+import zlib
+from operator import itemgetter
 import platform
+import shutil
+import subprocess
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable
 
 os.environ['PYTHONUNBUFFERED'] = '1'
 
@@ -37,13 +58,134 @@ WS_URL = os.getenv("WS_URL", "ws://localhost:8000/hardware/ws/agent")
 HW_AGENT_TOKEN = os.getenv("HW_AGENT_TOKEN", "")
 INTERVAL = int(os.getenv("INTERVAL", "2"))
 
+IS_LINUX = sys.platform.startswith("linux")
+
+# Intervalles par collecteur (secondes). Les collecteurs rapides suivent INTERVAL.
+# Sous Linux les capteurs sont de simples pread sysfs : meme cadence que le CPU.
+GPU_INTERVAL = float(os.getenv("GPU_INTERVAL", "5"))
+PROCESS_INTERVAL = float(os.getenv("PROCESS_INTERVAL", "5"))
+# Releve complet de tous les processus un tick processus sur N ; entre deux, seuls
+# les candidats au top N (et les nouveaux PID) sont relus.
+PROCESS_FULL_SCAN_EVERY = int(os.getenv("PROCESS_FULL_SCAN_EVERY", "6"))
+SENSORS_INTERVAL = float(os.getenv("SENSORS_INTERVAL", str(INTERVAL) if IS_LINUX else "30"))
+STORAGE_INTERVAL = float(os.getenv("STORAGE_INTERVAL", "30"))
+COLLECTOR_THREADS = int(os.getenv("COLLECTOR_THREADS", "4"))
+# Echantillonnage rapide CPU/reseau/GPU (secondes, 0 = desactive). Chaque trame
+# porte min/moy/max/dernier de la fenetre ecoulee depuis l'envoi precedent.
+FAST_INTERVAL = float(os.getenv("FAST_INTERVAL", "0.25"))
+# Budget CPU de l'agent (% de la machine entiere, 0 = pas de limite)
+CPU_BUDGET = float(os.getenv("CPU_BUDGET", "2"))
+BUDGET_CHECK_INTERVAL = float(os.getenv("BUDGET_CHECK_INTERVAL", "30"))
+# Etirement maximal d'un intervalle de collecteur (x base)
+MAX_INTERVAL_STRETCH = 8
+
+# Tampon hors connexion : un echantillon toutes les OFFLINE_INTERVAL secondes
+# (cadence de persistance cote serveur), rejoue en lots compresses a la reconnexion.
+OFFLINE_BUFFER_PATH = os.getenv(
+    "OFFLINE_BUFFER_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "offline_buffer.bin"),
+)
+OFFLINE_BUFFER_RECORDS = int(os.getenv("OFFLINE_BUFFER_RECORDS", "1440"))  # 24h a 60s
+OFFLINE_INTERVAL = float(os.getenv("OFFLINE_INTERVAL", "60"))
+BACKFILL_BATCH = 60
+
 # Cache pour calcul des vitesses réseau
 _last_net_io = None
 _last_net_time = None
 
+# Backend capteurs Linux (descripteurs sysfs ouverts une fois)
+_linux_sensors = None
+
+
+def get_linux_sensors():
+    """Instance unique de LinuxSensors (découverte au premier appel)."""
+    global _linux_sensors
+    if _linux_sensors is None:
+        from sensors_linux import LinuxSensors
+        _linux_sensors = LinuxSensors()
+    return _linux_sensors
+
+
+class ChildCpu:
+    """
+    CPU consomme par les sous-processus ponctuels de l'agent (PowerShell, nvidia-smi).
+    psutil ne le remonte pas sous Windows (children_user/children_system = 0) :
+    run_command() le mesure a la fin de chaque fils et l'ajoute ici, au total de
+    l'agent et au compteur du thread appelant (cout du collecteur).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.total = 0.0
+
+    def add(self, seconds: float):
+        with self._lock:
+            self.total += seconds
+        self._local.seconds = self.thread_seconds() + seconds
+
+    def thread_seconds(self) -> float:
+        """Cumul des fils lances depuis le thread courant."""
+        return getattr(self._local, "seconds", 0.0)
+
+
+# Instance globale
+child_cpu = ChildCpu()
+
+
+def _windows_process_cpu(handle) -> float:
+    """Temps CPU (user + kernel) d'un processus Windows termine, via son handle encore ouvert."""
+    import ctypes
+    from ctypes import wintypes
+
+    times = [wintypes.FILETIME() for _ in range(4)]  # creation, exit, kernel, user
+    if not ctypes.windll.kernel32.GetProcessTimes(wintypes.HANDLE(int(handle)), *map(ctypes.byref, times)):
+        return 0.0
+    return sum((t.dwHighDateTime << 32 | t.dwLowDateTime) for t in times[2:]) / 1e7
+
+
+def run_command(args: List[str], timeout: float) -> subprocess.CompletedProcess:
+    """
+    subprocess.run(capture_output=True, text=True, timeout=...) qui mesure le CPU du fils.
+    Le CPU est lu a la fin du fils, avant liberation de son statut : os.wait4 (POSIX)
+    ou GetProcessTimes sur le handle que Popen garde ouvert (Windows).
+    """
+    proc = subprocess.Popen(
+        args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+    )
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        proc.kill()
+
+    killer = threading.Timer(timeout, kill)
+    killer.start()
+    try:
+        stdout = proc.stdout.read()
+        proc.stdout.close()
+        if os.name == "nt":
+            proc.wait()
+            seconds = _windows_process_cpu(proc._handle)
+        else:
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            seconds = usage.ru_utime + usage.ru_stime
+    finally:
+        killer.cancel()
+    child_cpu.add(seconds)
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(args, timeout, output=stdout)
+    return subprocess.CompletedProcess(args, proc.returncode, stdout, None)
+
 
 def get_wmi_cpu_name() -> str:
-    """Récupère le vrai nom du CPU via WMI (Windows only)."""
+    """Récupère le vrai nom du CPU via WMI (Windows) ou /proc/cpuinfo (Linux)."""
+    if IS_LINUX:
+        from sensors_linux import cpu_model_name
+        return cpu_model_name() or platform.processor() or "Unknown CPU"
+
     try:
         import wmi
         c = wmi.WMI()
@@ -69,7 +211,11 @@ def get_wmi_cpu_name() -> str:
 
 
 def get_disk_names() -> Dict[str, str]:
-    """Récupère les noms/labels des disques via WMI."""
+    """Récupère les noms/labels des disques via WMI (Windows) ou sysfs (Linux)."""
+    if IS_LINUX:
+        from sensors_linux import block_device_models
+        return block_device_models()
+
     disk_names = {}
     try:
         import wmi
@@ -99,8 +245,12 @@ def get_disk_names() -> Dict[str, str]:
     return disk_names
 
 
-def get_os_info() -> Dict[str, str]:
-    """Récupère les infos OS détaillées."""
+def get_os_name() -> str:
+    """Récupère le nom détaillé de l'OS (wmic : à n'appeler qu'une fois)."""
+    if IS_LINUX:
+        from sensors_linux import os_pretty_name
+        return os_pretty_name() or f"Linux {platform.release()}"
+
     os_name = f"Windows {platform.release()}"
 
     try:
@@ -115,7 +265,11 @@ def get_os_info() -> Dict[str, str]:
     except Exception:
         pass
 
-    # Uptime en jours/heures/minutes
+    return os_name
+
+
+def get_uptime() -> str:
+    """Uptime en jours/heures/minutes (psutil, sans sous-processus)."""
     boot_time = datetime.fromtimestamp(psutil.boot_time())
     uptime_delta = datetime.now() - boot_time
     total_seconds = int(uptime_delta.total_seconds())
@@ -123,31 +277,30 @@ def get_os_info() -> Dict[str, str]:
     hours, remainder = divmod(remainder, 3600)
     minutes, _ = divmod(remainder, 60)
     if days > 0:
-        uptime_str = f"{days}j {hours}h {minutes}min"
-    else:
-        uptime_str = f"{hours}h {minutes}min"
+        return f"{days}j {hours}h {minutes}min"
+    return f"{hours}h {minutes}min"
+
 
+def get_inventory() -> Dict[str, Any]:
+    """Infos statiques, collectées une seule fois au démarrage."""
     return {
-        "name": os_name,
-        "uptime": uptime_str,
+        "os": get_os_name(),
         "hostname": platform.node(),
+        "cpu_name": get_wmi_cpu_name(),
     }
 
 
 def get_cpu_stats() -> Dict[str, Any]:
     """Collecte les stats CPU complètes."""
-    # Usage global et par core
-    cpu_percent = psutil.cpu_percent(interval=0.1)
-    cpu_percent_per_core = psutil.cpu_percent(interval=0, percpu=True)
+    # Usage global et par core, non bloquant : delta depuis l'appel précédent
+    # (le premier appel est amorcé par SamplingPipeline.prime()).
+    cpu_percent = psutil.cpu_percent(interval=None)
+    cpu_percent_per_core = psutil.cpu_percent(interval=None, percpu=True)
 
     cpu_freq = psutil.cpu_freq()
     cpu_count = psutil.cpu_count()
     cpu_count_physical = psutil.cpu_count(logical=False)
 
-    # Nom propre du CPU (cache après premier appel)
-    if not hasattr(get_cpu_stats, '_cpu_name'):
-        get_cpu_stats._cpu_name = get_wmi_cpu_name()
-
     return {
         "usage": cpu_percent,
         "core_usage": cpu_percent_per_core,
@@ -158,7 +311,6 @@ def get_cpu_stats() -> Dict[str, Any]:
         "frequency_max": cpu_freq.max if cpu_freq else None,
         "cores": cpu_count,
         "physical_cores": cpu_count_physical,
-        "name": get_cpu_stats._cpu_name,
     }
 
 
@@ -176,14 +328,13 @@ def get_ram_stats() -> Dict[str, Any]:
 def get_gpu_stats() -> Optional[Dict[str, Any]]:
     """Collecte les stats GPU NVIDIA via nvidia-smi."""
     try:
-        import subprocess
-        result = subprocess.run(
+        result = run_command(
             [
                 'nvidia-smi',
                 '--query-gpu=name,temperature.gpu,utilization.gpu,memory.used,memory.total,fan.speed,power.draw',
                 '--format=csv,noheader,nounits',
             ],
-            capture_output=True, text=True, timeout=5,
+            timeout=5,
         )
         if result.returncode != 0:
             return None
@@ -279,25 +430,103 @@ def get_network_stats() -> Dict[str, Any]:
     }
 
 
-def get_top_processes(n: int = 5) -> List[Dict[str, Any]]:
-    """Récupère les N processus utilisant le plus de RAM."""
-    processes = []
+class ProcessTable:
+    """
+    Table de processus persistante entre deux ticks.
+
+    Les objets psutil.Process sont gardés en cache : à chaque tick on ne traite
+    que les PID apparus/disparus (diff sur psutil.pids()). Les mesures RAM/CPU
+    de chaque processus sont gardées aussi : un tick sur `full_scan_every` relit
+    tout, les autres ne relisent que les candidats (2N premiers par RAM et par
+    CPU au tick précédent) et les nouveaux PID. Le CPU % vient du delta mis en
+    cache par psutil depuis la dernière lecture du processus.
+    La sélection du top N se fait par heapq.nlargest (pas de tri complet).
+    """
+
+    def __init__(self, full_scan_every: int = PROCESS_FULL_SCAN_EVERY):
+        self._procs: Dict[int, psutil.Process] = {}
+        self._names: Dict[int, str] = {}
+        self._samples: Dict[int, tuple] = {}  # pid -> (rss, cpu)
+        self._cpu_count = psutil.cpu_count() or 1
+        self._full_scan_every = max(1, full_scan_every)
+        self._ticks = 0
+
+    def _forget(self, pid: int):
+        self._procs.pop(pid, None)
+        self._names.pop(pid, None)
+        self._samples.pop(pid, None)
+
+    def _sync_pids(self) -> set:
+        """Applique le diff des PID ; retourne les PID apparus."""
+        current = set(psutil.pids())
+        known = self._procs.keys()
+        for pid in known - current:
+            self._forget(pid)
+        added = set()
+        for pid in current - known:
+            try:
+                proc = psutil.Process(pid)
+                proc.cpu_percent(None)  # Amorce le delta CPU
+                self._names[pid] = proc.name()
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            self._procs[pid] = proc
+            added.add(pid)
+        return added
+
+    def _candidates(self, n: int) -> set:
+        """PID en tete (2N, marge pour les remontees) par RAM et par CPU au tick precedent."""
+        samples = self._samples.items()
+        by_memory = heapq.nlargest(2 * n, samples, key=lambda item: item[1][0])
+        by_cpu = heapq.nlargest(2 * n, samples, key=lambda item: item[1][1])
+        return {pid for pid, _ in by_memory} | {pid for pid, _ in by_cpu}
+
+    def top(self, n: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+        """Top N par RAM et top N par CPU (CPU % normalisé sur tous les coeurs)."""
+        added = self._sync_pids()
+        full = self._ticks % self._full_scan_every == 0
+        self._ticks += 1
+        pids = list(self._procs) if full else (self._candidates(n) | added) & self._procs.keys()
+
+        for pid in pids:
+            proc = self._procs[pid]
+            try:
+                with proc.oneshot():
+                    rss = proc.memory_info().rss
+                    cpu = proc.cpu_percent(None) / self._cpu_count
+            except psutil.NoSuchProcess:
+                self._forget(pid)
+                continue
+            except (psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+            self._samples[pid] = (rss, cpu)
 
-    for proc in psutil.process_iter(['pid', 'name', 'memory_info']):
-        try:
-            mem_info = proc.info['memory_info']
-            if mem_info:
-                processes.append({
-                    "id": proc.info['pid'],
-                    "name": proc.info['name'],
-                    "memory_mb": round(mem_info.rss / (1024 * 1024), 1),
-                })
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
+        rows = [(rss, cpu, pid) for pid, (rss, cpu) in self._samples.items()]
+
+        def fmt(row):
+            rss, cpu, pid = row
+            return {
+                "id": pid,
+                "name": self._names.get(pid, "?"),
+                "memory_mb": round(rss / (1024 * 1024), 1),
+                "cpu_percent": round(cpu, 1),
+            }
+
+        return {
+            "by_memory": [fmt(r) for r in heapq.nlargest(n, rows, key=itemgetter(0))],
+            "by_cpu": [fmt(r) for r in heapq.nlargest(n, rows, key=itemgetter(1))],
+        }
 
-    # Trier par mémoire et prendre les top N
-    processes.sort(key=lambda x: x['memory_mb'], reverse=True)
-    return processes[:n]
+
+_process_table: Optional[ProcessTable] = None
+
+
+def get_top_processes(n: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+    """Top N processus par RAM et par CPU (table incrémentale partagée)."""
+    global _process_table
+    if _process_table is None:
+        _process_table = ProcessTable()
+    return _process_table.top(n)
 
 
 def get_lhm_sensors() -> Dict[str, Any]:
@@ -310,7 +539,6 @@ def get_lhm_sensors() -> Dict[str, Any]:
     }
 
     try:
-        import subprocess
         # Requête PowerShell unique pour tous les capteurs utiles
         ps_script = (
             "Get-CimInstance -Namespace root/LibreHardwareMonitor -ClassName Sensor "
@@ -318,10 +546,7 @@ def get_lhm_sensors() -> Dict[str, Any]:
             "| Select-Object Name, Value, SensorType, Parent, Identifier "
             "| ConvertTo-Json -Compress"
         )
-        proc = subprocess.run(
-            ['powershell', '-NoProfile', '-Command', ps_script],
-            capture_output=True, text=True, timeout=10,
-        )
+        proc = run_command(['powershell', '-NoProfile', '-Command', ps_script], timeout=10)
         if proc.returncode != 0 or not proc.stdout.strip():
             return result
 
@@ -366,40 +591,6 @@ def get_lhm_sensors() -> Dict[str, Any]:
     return result
 
 
-def collect_all_stats() -> Dict[str, Any]:
-    """Collecte toutes les stats hardware."""
-    os_info = get_os_info()
-    cpu = get_cpu_stats()
-    gpu = get_gpu_stats()
-    storage = get_storage_stats()
-
-    # LHM WMI pour temp/power/fan CPU + HDD temps
-    lhm = get_lhm_sensors()
-    if lhm["cpu_temp"] is not None:
-        cpu["temp"] = lhm["cpu_temp"]
-    if lhm["cpu_power"] is not None:
-        cpu["power"] = lhm["cpu_power"]
-    if lhm["cpu_fan"] is not None:
-        cpu["fan_speed"] = lhm["cpu_fan"]
-
-    # Températures HDD/NVMe
-    disk_temps = _get_disk_temps(lhm["hdd_temps"])
-
-    return {
-        "cpu": cpu,
-        "ram": get_ram_stats(),
-        "gpu": gpu,
-        "storage": storage,
-        "network": get_network_stats(),
-        "processes": get_top_processes(5),
-        "disk_temps": disk_temps,
-        "os": os_info["name"],
-        "uptime": os_info["uptime"],
-        "hostname": os_info["hostname"],
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-    }
-
-
 def _get_disk_temps(hdd_temps: Dict[str, float]) -> List[Dict[str, Any]]:
     """Construit la liste des températures disques avec noms LHM."""
     if not hdd_temps:
@@ -408,17 +599,13 @@ def _get_disk_temps(hdd_temps: Dict[str, float]) -> List[Dict[str, Any]]:
     # Récupérer les noms des disques physiques LHM (cache)
     if not hasattr(_get_disk_temps, '_hw_map'):
         try:
-            import subprocess
             ps = (
                 "Get-CimInstance -Namespace root/LibreHardwareMonitor -ClassName Hardware "
                 "| Where-Object HardwareType -in 'Storage' "
                 "| Select-Object Name, Identifier "
                 "| ConvertTo-Json -Compress"
             )
-            proc = subprocess.run(
-                ['powershell', '-NoProfile', '-Command', ps],
-                capture_output=True, text=True, timeout=5,
-            )
+            proc = run_command(['powershell', '-NoProfile', '-Command', ps], timeout=5)
             hw_list = json.loads(proc.stdout) if proc.stdout.strip() else []
             if isinstance(hw_list, dict):
                 hw_list = [hw_list]
@@ -435,6 +622,535 @@ def _get_disk_temps(hdd_temps: Dict[str, float]) -> List[Dict[str, Any]]:
     return result
 
 
+def get_sensor_stats() -> Dict[str, Any]:
+    """Capteurs (temp/power/fan CPU) + températures HDD/NVMe nommées.
+    Linux : sysfs natif. Windows : LibreHardwareMonitor via PowerShell."""
+    if IS_LINUX:
+        return get_linux_sensors().read()
+
+    lhm = get_lhm_sensors()
+    return {
+        "cpu_temp": lhm["cpu_temp"],
+        "cpu_power": lhm["cpu_power"],
+        "cpu_fan": lhm["cpu_fan"],
+        "disk_temps": _get_disk_temps(lhm["hdd_temps"]),
+    }
+
+
+class Collector:
+    """Une source de stats avec son propre intervalle (0 = une seule fois)."""
+
+    def __init__(self, name: str, func: Callable[[], Any], interval: float):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.base_interval = interval
+        self.next_due = 0.0
+        self.running = False
+        self.runs = 0
+        self.errors = 0
+        # Cout moyen (EWMA) : duree murale et CPU (thread + sous-processus), en ms
+        self.avg_ms: Optional[float] = None
+        self.avg_cpu_ms: Optional[float] = None
+
+    @property
+    def once(self) -> bool:
+        return self.interval <= 0
+
+    @property
+    def cost(self) -> float:
+        """
+        CPU consomme par seconde (ms/s), base du budget CPU : celui du thread et
+        celui des sous-processus lances (PowerShell, nvidia-smi, cf run_command).
+        Le temps mural n'y entre pas : une attente d'E/S ne coute rien.
+        """
+        if self.once or self.avg_cpu_ms is None:
+            return 0.0
+        return self.avg_cpu_ms / self.interval
+
+    def record(self, wall_s: float, cpu_s: float):
+        wall_ms, cpu_ms = wall_s * 1000, cpu_s * 1000
+        if self.avg_ms is None:
+            self.avg_ms, self.avg_cpu_ms = wall_ms, cpu_ms
+        else:
+            self.avg_ms += 0.2 * (wall_ms - self.avg_ms)
+            self.avg_cpu_ms += 0.2 * (cpu_ms - self.avg_cpu_ms)
+
+
+class SelfMonitor:
+    """
+    CPU et RAM de l'agent lui-meme.
+    Le CPU inclut les sous-processus : ceux termines via child_cpu (mesure
+    portable, children_user/children_system valant 0 sous Windows) et ceux
+    encore vivants (nvidia-smi persistant du FastSampler) via psutil.
+    """
+
+    def __init__(self):
+        self._proc = psutil.Process()
+        self._cpu_count = psutil.cpu_count() or 1
+        self._last: Optional[tuple] = None  # (secondes CPU, monotonic)
+        self.cpu_percent: Optional[float] = None
+        self.rss_mb: Optional[float] = None
+
+    def _cpu_seconds(self) -> float:
+        t = self._proc.cpu_times()
+        seconds = t.user + t.system + child_cpu.total
+        try:
+            children = self._proc.children()
+        except psutil.Error:
+            children = []
+        for child in children:
+            try:
+                ct = child.cpu_times()
+            except psutil.Error:
+                continue
+            seconds += ct.user + ct.system
+        return seconds
+
+    def sample(self) -> Optional[float]:
+        """Met a jour les mesures ; CPU % (machine entiere) depuis le dernier appel."""
+        now = time.monotonic()
+        cpu = self._cpu_seconds()
+        if self._last is not None and now > self._last[1]:
+            usage = (cpu - self._last[0]) / (now - self._last[1]) / self._cpu_count * 100
+            self.cpu_percent = round(usage, 2)
+        self._last = (cpu, now)
+        self.rss_mb = round(self._proc.memory_info().rss / (1024 * 1024), 1)
+        return self.cpu_percent
+
+
+class WindowAgg:
+    """min/somme/max/dernier d'une metrique sur la fenetre d'envoi en cours."""
+
+    __slots__ = ("min", "max", "sum", "count", "last")
+
+    def __init__(self):
+        self.last: Optional[float] = None
+        self.reset()
+
+    def reset(self):
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.sum = 0.0
+        self.count = 0
+
+    def add(self, x: float):
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        self.sum += x
+        self.count += 1
+        self.last = x
+
+    def drain(self) -> Optional[Dict[str, float]]:
+        """Resume de la fenetre puis remise a zero (fenetre vide = dernier point connu)."""
+        if self.count == 0:
+            if self.last is None:
+                return None
+            v = round(self.last, 2)
+            return {"min": v, "avg": v, "max": v, "last": v}
+        summary = {
+            "min": round(self.min, 2),
+            "avg": round(self.sum / self.count, 2),
+            "max": round(self.max, 2),
+            "last": round(self.last, 2),
+        }
+        self.reset()
+        return summary
+
+
+def _cpu_busy_total(t) -> tuple:
+    """(temps total, temps actif) a partir de psutil.cpu_times() (meme calcul que psutil)."""
+    total = sum(t)
+    # Linux : guest/guest_nice sont deja comptes dans user/nice
+    total -= getattr(t, "guest", 0.0) + getattr(t, "guest_nice", 0.0)
+    idle = t.idle + getattr(t, "iowait", 0.0)
+    return total, total - idle
+
+
+class FastSampler:
+    """
+    Echantillonne les metriques rapides a haute frequence dans des threads dedies.
+
+    - CPU et reseau : deltas de compteurs psutil (cpu_times, net_io_counters),
+      sans toucher a l'etat global de psutil.cpu_percent utilise par le collecteur CPU.
+    - GPU : un seul nvidia-smi persistant en mode boucle (-lms), lu ligne a ligne.
+
+    `drain()` rend le resume min/avg/max/last de chaque metrique depuis l'appel
+    precedent : la cadence d'envoi ne change pas, les pics restent visibles.
+    """
+
+    GPU_QUERY = "utilization.gpu,temperature.gpu,power.draw"
+    GPU_FIELDS = ("gpu.usage", "gpu.temp", "gpu.power")
+
+    def __init__(self, interval: float = FAST_INTERVAL):
+        self.interval = interval
+        self._aggs: Dict[str, WindowAgg] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._gpu_proc: Optional[subprocess.Popen] = None
+        self._started = False
+
+    def _add(self, key: str, value: float):
+        with self._lock:
+            agg = self._aggs.get(key)
+            if agg is None:
+                agg = self._aggs[key] = WindowAgg()
+            agg.add(value)
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        threading.Thread(target=self._run_host, name="fast-sampler", daemon=True).start()
+        if shutil.which("nvidia-smi"):
+            threading.Thread(target=self._run_gpu, name="fast-sampler-gpu", daemon=True).start()
+
+    def _run_host(self):
+        last_cpu = _cpu_busy_total(psutil.cpu_times())
+        last_net = psutil.net_io_counters()
+        last_ts = time.monotonic()
+        while not self._stop.wait(self.interval):
+            try:
+                cpu = _cpu_busy_total(psutil.cpu_times())
+                net = psutil.net_io_counters()
+            except Exception as e:
+                print(f"[Fast] Erreur: {e}")
+                continue
+            now = time.monotonic()
+
+            d_total = cpu[0] - last_cpu[0]
+            if d_total > 0:
+                self._add("cpu.usage", min(max((cpu[1] - last_cpu[1]) / d_total * 100, 0.0), 100.0))
+            dt = now - last_ts
+            if dt > 0 and net.bytes_recv >= last_net.bytes_recv and net.bytes_sent >= last_net.bytes_sent:
+                self._add("network.download_speed", (net.bytes_recv - last_net.bytes_recv) / dt * 8 / 1_000_000)
+                self._add("network.upload_speed", (net.bytes_sent - last_net.bytes_sent) / dt * 8 / 1_000_000)
+            last_cpu, last_net, last_ts = cpu, net, now
+
+    def _run_gpu(self):
+        cmd = [
+            "nvidia-smi", "--id=0",
+            f"--query-gpu={self.GPU_QUERY}",
+            "--format=csv,noheader,nounits",
+            f"-lms={max(int(self.interval * 1000), 100)}",
+        ]
+        flags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        while not self._stop.is_set():
+            try:
+                self._gpu_proc = subprocess.Popen(
+                    cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                    text=True, creationflags=flags,
+                )
+                for line in self._gpu_proc.stdout:
+                    if self._stop.is_set():
+                        break
+                    parts = [p.strip() for p in line.split(",")]
+                    for key, raw in zip(self.GPU_FIELDS, parts):
+                        try:
+                            self._add(key, float(raw))
+                        except ValueError:
+                            pass  # "[N/A]" sur certaines cartes
+            except OSError as e:
+                print(f"[Fast] nvidia-smi indisponible: {e}")
+                return
+            finally:
+                if self._gpu_proc is not None and self._gpu_proc.poll() is None:
+                    self._gpu_proc.terminate()
+            # Flux interrompu (pilote redemarre...) : on relance apres une pause
+            self._stop.wait(5)
+
+    def drain(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {key: summary for key, agg in self._aggs.items() if (summary := agg.drain())}
+
+    def stop(self):
+        self._stop.set()
+        if self._gpu_proc is not None and self._gpu_proc.poll() is None:
+            self._gpu_proc.terminate()
+
+
+class SamplingPipeline:
+    """
+    Planifie les collecteurs dans un pool de threads et maintient un état fusionné.
+
+    - Chaque collecteur tourne à son rythme, jamais deux fois en parallèle.
+    - Les appels bloquants (nvidia-smi, PowerShell, WMI) restent hors de la boucle asyncio.
+    - `snapshot()` ne fait que fusionner des dicts en cache : lecture non bloquante.
+    - Au-dela de `cpu_budget`, l'intervalle du collecteur le plus couteux est
+      double (jusqu'a MAX_INTERVAL_STRETCH x) ; sous la moitie du budget, on
+      revient progressivement vers les intervalles de base.
+    """
+
+    def __init__(self, collectors: List[Collector], max_workers: int = COLLECTOR_THREADS,
+                 cpu_budget: float = CPU_BUDGET, fast: Optional[FastSampler] = None):
+        self.collectors = collectors
+        self.fast = fast
+        self.cpu_budget = cpu_budget
+        self.monitor = SelfMonitor()
+        self._state: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="collector")
+
+    def prime(self):
+        """Amorce les compteurs delta (CPU %) pour que le premier échantillon ait un sens."""
+        psutil.cpu_percent(interval=None)
+        psutil.cpu_percent(interval=None, percpu=True)
+
+    def _run_collector(self, collector: Collector):
+        start, cpu_start = time.perf_counter(), time.thread_time() + child_cpu.thread_seconds()
+        try:
+            value = collector.func()
+            with self._lock:
+                self._state[collector.name] = value
+            collector.runs += 1
+        except Exception as e:
+            collector.errors += 1
+            print(f"[{collector.name}] Erreur: {e}")
+        finally:
+            cpu_end = time.thread_time() + child_cpu.thread_seconds()
+            collector.record(time.perf_counter() - start, cpu_end - cpu_start)
+            collector.running = False
+
+    def enforce_budget(self):
+        """Mesure le cout de l'agent et ajuste les intervalles selon le budget CPU."""
+        usage = self.monitor.sample()
+        if usage is None or self.cpu_budget <= 0:
+            return
+
+        if usage > self.cpu_budget:
+            candidates = [
+                c for c in self.collectors
+                if c.cost > 0 and c.interval < c.base_interval * MAX_INTERVAL_STRETCH
+            ]
+            if candidates:
+                worst = max(candidates, key=lambda c: c.cost)
+                worst.interval = min(worst.interval * 2, worst.base_interval * MAX_INTERVAL_STRETCH)
+                print(f"[Budget] CPU agent {usage:.1f}% > {self.cpu_budget}% : "
+                      f"{worst.name} passe a {worst.interval:g}s")
+        elif usage < self.cpu_budget / 2:
+            stretched = [c for c in self.collectors if not c.once and c.interval > c.base_interval]
+            if stretched:
+                cheapest = min(stretched, key=lambda c: c.cost)
+                cheapest.interval = max(cheapest.interval / 2, cheapest.base_interval)
+                print(f"[Budget] CPU agent {usage:.1f}% : {cheapest.name} revient a {cheapest.interval:g}s")
+
+    def diagnostics(self) -> Dict[str, Any]:
+        """Cout de l'agent : CPU/RAM du processus et temps par collecteur."""
+        return {
+            "cpu_percent": self.monitor.cpu_percent,
+            "rss_mb": self.monitor.rss_mb,
+            "cpu_budget": self.cpu_budget,
+            "collectors": {
+                c.name: {
+                    "avg_ms": round(c.avg_ms, 1) if c.avg_ms is not None else None,
+                    "avg_cpu_ms": round(c.avg_cpu_ms, 1) if c.avg_cpu_ms is not None else None,
+                    "interval": c.interval,
+                    "base_interval": c.base_interval,
+                    "runs": c.runs,
+                    "errors": c.errors,
+                }
+                for c in self.collectors
+            },
+        }
+
+    def collect_once(self):
+        """Exécute tous les collecteurs une fois, en parallèle, et attend la fin."""
+        self.prime()
+        time.sleep(0.1)  # Fenêtre de mesure du CPU % pour ce passage synchrone
+        futures = []
+        for c in self.collectors:
+            c.running = True
+            futures.append(self._executor.submit(self._run_collector, c))
+        for f in futures:
+            f.result()
+        now = time.monotonic()
+        for c in self.collectors:
+            c.next_due = float("inf") if c.once else now + c.interval
+
+    async def run(self):
+        """Boucle de planification : soumet les collecteurs échus au pool."""
+        loop = asyncio.get_running_loop()
+        self.prime()
+        self.monitor.sample()
+        if self.fast is not None:
+            self.fast.start()
+        next_budget_check = time.monotonic() + BUDGET_CHECK_INTERVAL
+        while True:
+            now = time.monotonic()
+            if now >= next_budget_check:
+                self.enforce_budget()
+                next_budget_check = now + BUDGET_CHECK_INTERVAL
+            for c in self.collectors:
+                if c.running or now < c.next_due:
+                    continue
+                c.running = True
+                c.next_due = float("inf") if c.once else now + c.interval
+                loop.run_in_executor(self._executor, self._run_collector, c)
+            next_due = min((c.next_due for c in self.collectors), default=now + 1)
+            await asyncio.sleep(min(max(next_due - time.monotonic(), 0.05), 1.0))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Payload complet à partir du dernier résultat de chaque collecteur."""
+        with self._lock:
+            state = dict(self._state)
+
+        inventory = state.get("inventory") or {}
+        cpu = dict(state.get("cpu") or {})
+        cpu["name"] = inventory.get("cpu_name", "Unknown CPU")
+        sensors = state.get("sensors") or {}
+        if sensors.get("cpu_temp") is not None:
+            cpu["temp"] = sensors["cpu_temp"]
+        if sensors.get("cpu_power") is not None:
+            cpu["power"] = sensors["cpu_power"]
+        if sensors.get("cpu_fan") is not None:
+            cpu["fan_speed"] = sensors["cpu_fan"]
+
+        gpu = dict(state["gpu"]) if state.get("gpu") else None
+        network = dict(state.get("network") or {"download_speed": 0, "upload_speed": 0})
+        if self.fast is not None:
+            # Resume de la fenetre : valeur = moyenne, + _min/_max/_last
+            sections = {"cpu": cpu, "gpu": gpu, "network": network}
+            for key, summary in self.fast.drain().items():
+                section, name = key.split(".", 1)
+                target = sections.get(section)
+                if target is None:
+                    continue
+                target[name] = summary["avg"]
+                target[f"{name}_min"] = summary["min"]
+                target[f"{name}_max"] = summary["max"]
+                target[f"{name}_last"] = summary["last"]
+
+        return {
+            "cpu": cpu,
+            "ram": state.get("ram") or {},
+            "gpu": gpu,
+            "storage": state.get("storage") or [],
+            "network": network,
+            "processes": (state.get("processes") or {}).get("by_memory", []),
+            "processes_by_cpu": (state.get("processes") or {}).get("by_cpu", []),
+            "disk_temps": sensors.get("disk_temps") or [],
+            "os": inventory.get("os", ""),
+            "uptime": get_uptime(),
+            "hostname": inventory.get("hostname", ""),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "diagnostics": self.diagnostics(),
+        }
+
+    def shutdown(self):
+        if self.fast is not None:
+            self.fast.stop()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def build_pipeline() -> SamplingPipeline:
+    """Collecteurs par défaut : rapides à INTERVAL, GPU 5s, capteurs/disques 30s, inventaire 1x."""
+    return SamplingPipeline([
+        Collector("inventory", get_inventory, 0),
+        Collector("cpu", get_cpu_stats, INTERVAL),
+        Collector("ram", get_ram_stats, INTERVAL),
+        Collector("network", get_network_stats, INTERVAL),
+        Collector("processes", lambda: get_top_processes(5), PROCESS_INTERVAL),
+        Collector("gpu", get_gpu_stats, GPU_INTERVAL),
+        Collector("sensors", get_sensor_stats, SENSORS_INTERVAL),
+        Collector("storage", get_storage_stats, STORAGE_INTERVAL),
+    ], fast=FastSampler(FAST_INTERVAL) if FAST_INTERVAL > 0 else None)
+
+
+def collect_all_stats(pipeline: Optional[SamplingPipeline] = None) -> Dict[str, Any]:
+    """Collecte toutes les stats hardware en une passe (test initial)."""
+    pipeline = pipeline or build_pipeline()
+    pipeline.collect_once()
+    return pipeline.snapshot()
+
+
+# Champs statiques envoyes une fois dans le message "inventory" (aligne avec
+# backend/app/hardware/inventory.py). Le reste = telemetrie a chaque trame.
+STATIC_FIELDS = {
+    "cpu": ("name", "cores", "physical_cores", "frequency_max"),
+    "ram": ("total_gb",),
+    "gpu": ("name", "memory_total"),
+}
+STATIC_TOP = ("os", "hostname")
+STORAGE_STATIC = ("name", "mountpoint", "fstype", "total_gb")
+
+
+def split_inventory(stats: Dict[str, Any]) -> tuple:
+    """Separe une trame complete en (inventaire statique, telemetrie dynamique)."""
+    inventory: Dict[str, Any] = {k: stats[k] for k in STATIC_TOP if stats.get(k) is not None}
+    telemetry = {k: v for k, v in stats.items() if k not in STATIC_TOP}
+
+    for section, fields in STATIC_FIELDS.items():
+        data = stats.get(section)
+        if not isinstance(data, dict):
+            continue
+        static = {k: data[k] for k in fields if k in data}
+        if static:
+            inventory[section] = static
+        telemetry[section] = {k: v for k, v in data.items() if k not in fields}
+
+    storage_inv, storage_tel = [], []
+    for disk in stats.get("storage") or []:
+        storage_inv.append({"device": disk.get("device"), **{k: disk[k] for k in STORAGE_STATIC if k in disk}})
+        storage_tel.append({k: v for k, v in disk.items() if k not in STORAGE_STATIC})
+    inventory["storage"] = storage_inv
+    telemetry["storage"] = storage_tel
+    return inventory, telemetry
+
+
+def inventory_hash(inventory: Dict[str, Any]) -> str:
+    canonical = json.dumps(inventory, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+
+def open_offline_buffer():
+    """Ouvre le tampon hors connexion. None si le chemin n'est pas inscriptible."""
+    if OFFLINE_BUFFER_RECORDS <= 0:
+        return None
+    try:
+        from offline_buffer import OfflineRing
+        ring = OfflineRing(OFFLINE_BUFFER_PATH, capacity=OFFLINE_BUFFER_RECORDS)
+        if len(ring):
+            print(f"[Offline] {len(ring)} echantillon(s) en attente de rejeu")
+        return ring
+    except OSError as e:
+        print(f"[Offline] Tampon desactive ({OFFLINE_BUFFER_PATH}): {e}")
+        return None
+
+
+async def buffer_while_offline(pipeline: SamplingPipeline, ring, link: Dict[str, bool]):
+    """Tant que le WebSocket est coupe, archive un echantillon toutes les OFFLINE_INTERVAL s."""
+    while True:
+        await asyncio.sleep(OFFLINE_INTERVAL)
+        if not link["connected"]:
+            if not ring.append(pipeline.snapshot()):
+                print("[Offline] Echantillon trop gros pour un slot, ignore")
+
+
+async def replay_backlog(ws, ring):
+    """Rejoue le tampon en lots compresses ; retire chaque lot apres accuse du serveur."""
+    total = 0
+    while len(ring):
+        batch = ring.peek(BACKFILL_BATCH)
+        samples = [s for s in batch if s]
+        if samples:
+            blob = zlib.compress(json.dumps(samples, separators=(",", ":")).encode(), 9)
+            await ws.send(json.dumps({
+                "type": "backfill",
+                "encoding": "zlib+base64",
+                "count": len(samples),
+                "data": base64.b64encode(blob).decode(),
+            }))
+            reply = json.loads(await asyncio.wait_for(ws.recv(), timeout=30))
+            if reply.get("type") != "backfill_ack":
+                raise RuntimeError(f"Reponse backfill inattendue: {reply}")
+        ring.pop(len(batch))
+        total += len(samples)
+    if total:
+        print(f"[Offline] {total} echantillon(s) rejoue(s)")
+
+
 async def run_agent():
     """Boucle principale de l'agent."""
     if not HW_AGENT_TOKEN:
@@ -449,6 +1165,15 @@ async def run_agent():
 
     reconnect_delay = 5
 
+    # Le pipeline tourne en continu, connecte ou non : l'etat reste chaud entre deux reconnexions
+    pipeline = build_pipeline()
+    sampler = asyncio.create_task(pipeline.run())
+
+    ring = open_offline_buffer()
+    link = {"connected": False}
+    if ring is not None:
+        offline_task = asyncio.create_task(buffer_while_offline(pipeline, ring, link))
+
     while True:
         try:
             print(f"[Agent] Connexion...")
@@ -456,21 +1181,31 @@ async def run_agent():
             async with websockets.connect(ws_url, ping_interval=30, ping_timeout=10) as ws:
                 print("[Agent] Connecte!")
                 reconnect_delay = 5
+                link["connected"] = True
+
+                if ring is not None:
+                    await replay_backlog(ws, ring)
 
+                sent_inventory = None  # Renvoye a chaque nouvelle session
                 while True:
                     try:
-                        stats = collect_all_stats()
-                        await ws.send(json.dumps(stats))
+                        stats = pipeline.snapshot()
+                        inventory, telemetry = split_inventory(stats)
+                        digest = inventory_hash(inventory)
+                        if digest != sent_inventory:
+                            await ws.send(json.dumps({"type": "inventory", "hash": digest, "data": inventory}))
+                            sent_inventory = digest
+                        await ws.send(json.dumps(telemetry))
 
                         cpu = stats["cpu"]
                         ram = stats["ram"]
                         net = stats["network"]
-                        temp_str = f"{cpu['temp']:.0f}°C" if cpu['temp'] else "N/A"
+                        temp_str = f"{cpu['temp']:.0f}°C" if cpu.get('temp') else "N/A"
 
                         print(
                             f"[{datetime.now().strftime('%H:%M:%S')}] "
-                            f"CPU: {cpu['usage']:.0f}% ({temp_str}) | "
-                            f"RAM: {ram['used_percent']:.0f}% | "
+                            f"CPU: {cpu.get('usage', 0):.0f}% ({temp_str}) | "
+                            f"RAM: {ram.get('used_percent', 0):.0f}% | "
                             f"Net: D:{net['download_speed']:.1f} U:{net['upload_speed']:.1f} Mbps"
                         )
 
@@ -482,6 +1217,8 @@ async def run_agent():
 
         except Exception as e:
             print(f"[Agent] Erreur: {e}, retry dans {reconnect_delay}s...")
+        finally:
+            link["connected"] = False
 
         await asyncio.sleep(reconnect_delay)
         reconnect_delay = min(reconnect_delay * 2, 60)
@@ -0,0 +1,98 @@
+"""
+Tampon circulaire sur disque pour les echantillons pris hors connexion.
+
+Fichier memory-mappe de taille fixe : un en-tete puis `capacity` slots de
+`record_size` octets. Chaque slot contient la longueur puis le JSON compresse
+(zlib) d'un echantillon. Plein = on ecrase le plus ancien. L'etat (tete, nombre)
+vit dans l'en-tete : le tampon survit a un redemarrage de l'agent.
+"""
+import json
+import mmap
+import os
+import struct
+import zlib
+from typing import Any, Dict, List
+
+MAGIC = b"HWRB"
+VERSION = 1
+# magic, version, record_size, capacity, head (plus ancien), count
+HEADER = struct.Struct("<4sHIIII")
+LENGTH = struct.Struct("<I")
+
+
+class OfflineRing:
+    """Ring buffer mmap d'echantillons JSON compresses, taille d'enregistrement fixe."""
+
+    def __init__(self, path: str, capacity: int = 1440, record_size: int = 4096):
+        self.path = path
+        self.capacity = capacity
+        self.record_size = record_size
+        size = HEADER.size + capacity * record_size
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        magic, version, rsize, cap, head, count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or rsize != record_size or cap != capacity:
+            # Fichier neuf ou geometrie changee : on repart a vide
+            self._head, self._count = 0, 0
+            self._write_header()
+        else:
+            self._head, self._count = head, count
+
+    def _write_header(self):
+        HEADER.pack_into(self._mm, 0, MAGIC, VERSION, self.record_size, self.capacity, self._head, self._count)
+
+    def _offset(self, slot: int) -> int:
+        return HEADER.size + slot * self.record_size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, sample: Dict[str, Any]) -> bool:
+        """Ajoute un echantillon. False s'il ne tient pas dans un slot (ignore)."""
+        blob = zlib.compress(json.dumps(sample, separators=(",", ":")).encode(), 6)
+        if LENGTH.size + len(blob) > self.record_size:
+            return False
+
+        slot = (self._head + self._count) % self.capacity
+        off = self._offset(slot)
+        LENGTH.pack_into(self._mm, off, len(blob))
+        self._mm[off + LENGTH.size:off + LENGTH.size + len(blob)] = blob
+
+        if self._count < self.capacity:
+            self._count += 1
+        else:
+            self._head = (self._head + 1) % self.capacity  # Ecrase le plus ancien
+        self._write_header()
+        return True
+
+    def peek(self, n: int) -> List[Dict[str, Any]]:
+        """Retourne les n plus anciens echantillons sans les retirer."""
+        samples = []
+        for i in range(min(n, self._count)):
+            off = self._offset((self._head + i) % self.capacity)
+            (length,) = LENGTH.unpack_from(self._mm, off)
+            try:
+                raw = zlib.decompress(self._mm[off + LENGTH.size:off + LENGTH.size + length])
+                samples.append(json.loads(raw))
+            except (zlib.error, ValueError):
+                samples.append(None)  # Slot corrompu : compte pour le pop mais ignore
+        return samples
+
+    def pop(self, n: int):
+        """Retire les n plus anciens (apres accuse de reception du serveur)."""
+        n = min(n, self._count)
+        self._head = (self._head + n) % self.capacity
+        self._count -= n
+        self._write_header()
+
+    def close(self):
+        self._mm.flush()
+        self._mm.close()
@@ -0,0 +1,236 @@
+"""
+Capteurs Linux natifs via sysfs/procfs (hwmon, thermal zones, NVMe, RAPL).
+
+Les fichiers capteurs sont decouverts une seule fois, leurs descripteurs
+restent ouverts et sont relus avec os.pread a chaque tick : ni sous-processus,
+ni parcours de repertoires en regime permanent.
+
+`root` permet de pointer vers une fausse arborescence sysfs (tests).
+"""
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Noms de drivers hwmon qui exposent la temperature du package CPU
+CPU_HWMON_DRIVERS = ("coretemp", "k10temp", "zenpower", "cpu_thermal", "soc_thermal")
+# Labels preferes (par ordre) pour la temperature CPU
+CPU_TEMP_LABELS = ("Package id 0", "Tctl", "Tdie", "CPU")
+# Types de thermal zones utilisables en repli
+CPU_THERMAL_ZONES = ("x86_pkg_temp", "cpu-thermal", "cpu_thermal", "soc-thermal")
+DISK_HWMON_DRIVERS = ("nvme", "drivetemp")
+
+
+class SensorFile:
+    """Fichier sysfs garde ouvert, relu par pread."""
+
+    __slots__ = ("path", "fd", "scale")
+
+    def __init__(self, path: str, scale: float = 1.0):
+        self.path = path
+        self.scale = scale
+        self.fd = os.open(path, os.O_RDONLY)
+
+    def read(self) -> Optional[float]:
+        try:
+            raw = os.pread(self.fd, 32, 0)
+            return int(raw.strip()) * self.scale
+        except (OSError, ValueError):
+            return None
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+def _read_text(path: str) -> str:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _open(path: str, scale: float = 1.0) -> Optional[SensorFile]:
+    try:
+        return SensorFile(path, scale)
+    except OSError:
+        return None
+
+
+def _natural_key(name: str) -> Tuple:
+    return tuple(int(p) if p.isdigit() else p for p in re.split(r"(\d+)", name))
+
+
+def _listdir(path: str) -> List[str]:
+    try:
+        return sorted(os.listdir(path), key=_natural_key)
+    except OSError:
+        return []
+
+
+class LinuxSensors:
+    """Decouverte unique des capteurs + lecture par pread."""
+
+    def __init__(self, root: str = "/"):
+        self.root = root
+        self.cpu_temp: Optional[SensorFile] = None
+        self.cpu_fan: Optional[SensorFile] = None
+        self.disk_temps: List[Tuple[str, SensorFile]] = []
+        self._rapl: Optional[SensorFile] = None
+        self._rapl_last: Optional[Tuple[float, float]] = None  # (energie uJ, monotonic)
+        self._discover()
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.root, *parts)
+
+    # === DECOUVERTE ===
+
+    def _discover(self):
+        hwmon_root = self._path("sys", "class", "hwmon")
+        cpu_candidates: List[Tuple[int, str]] = []
+        fans: List[Tuple[bool, str]] = []
+
+        for entry in _listdir(hwmon_root):
+            hw_dir = os.path.join(hwmon_root, entry)
+            driver = _read_text(os.path.join(hw_dir, "name"))
+            files = _listdir(hw_dir)
+
+            if driver in CPU_HWMON_DRIVERS:
+                for fname in files:
+                    m = re.fullmatch(r"temp(\d+)_input", fname)
+                    if not m:
+                        continue
+                    label = _read_text(os.path.join(hw_dir, f"temp{m.group(1)}_label"))
+                    rank = CPU_TEMP_LABELS.index(label) if label in CPU_TEMP_LABELS else len(CPU_TEMP_LABELS)
+                    cpu_candidates.append((rank, os.path.join(hw_dir, fname)))
+
+            elif driver in DISK_HWMON_DRIVERS:
+                # temp1 = "Composite" pour NVMe, unique capteur pour drivetemp
+                path = os.path.join(hw_dir, "temp1_input")
+                sensor = _open(path, scale=0.001)
+                if sensor:
+                    self.disk_temps.append((self._disk_name(hw_dir, entry), sensor))
+
+            for fname in files:
+                m = re.fullmatch(r"fan(\d+)_input", fname)
+                if m:
+                    label = _read_text(os.path.join(hw_dir, f"fan{m.group(1)}_label")).lower()
+                    fans.append(("pump" in label, os.path.join(hw_dir, fname)))
+
+        if cpu_candidates:
+            cpu_candidates.sort()
+            self.cpu_temp = _open(cpu_candidates[0][1], scale=0.001)
+        if self.cpu_temp is None:
+            self.cpu_temp = self._thermal_zone_cpu()
+
+        # Pompe AIO en priorite, sinon premier ventilateur qui tourne
+        fans.sort(key=lambda f: not f[0])
+        for _, path in fans:
+            sensor = _open(path)
+            if sensor is None:
+                continue
+            value = sensor.read()
+            if value and value > 0:
+                self.cpu_fan = sensor
+                break
+            sensor.close()
+
+        # Energie package CPU (RAPL). Souvent root-only : ignore si illisible.
+        self._rapl = _open(self._path("sys", "class", "powercap", "intel-rapl:0", "energy_uj"))
+        if self._rapl is not None and self._rapl.read() is None:
+            self._rapl.close()
+            self._rapl = None
+
+    def _thermal_zone_cpu(self) -> Optional[SensorFile]:
+        zones_root = self._path("sys", "class", "thermal")
+        for entry in _listdir(zones_root):
+            if not entry.startswith("thermal_zone"):
+                continue
+            zone_dir = os.path.join(zones_root, entry)
+            if _read_text(os.path.join(zone_dir, "type")) in CPU_THERMAL_ZONES:
+                sensor = _open(os.path.join(zone_dir, "temp"), scale=0.001)
+                if sensor:
+                    return sensor
+        return None
+
+    def _disk_name(self, hw_dir: str, fallback: str) -> str:
+        """Modele du disque via le lien `device` du hwmon (NVMe : device/model)."""
+        for rel in ("device/model", "device/device/model"):
+            model = _read_text(os.path.join(hw_dir, rel))
+            if model:
+                return model
+        device = os.path.realpath(os.path.join(hw_dir, "device"))
+        return os.path.basename(device) or fallback
+
+    # === LECTURE ===
+
+    def _cpu_power(self) -> Optional[float]:
+        if self._rapl is None:
+            return None
+        energy = self._rapl.read()
+        now = time.monotonic()
+        if energy is None:
+            return None
+        last, self._rapl_last = self._rapl_last, (energy, now)
+        if last is None or now <= last[1] or energy < last[0]:
+            return None  # Premier point ou compteur reboucle
+        return round((energy - last[0]) / 1e6 / (now - last[1]), 1)
+
+    def read(self) -> Dict[str, Any]:
+        """Meme forme que get_sensor_stats() cote Windows."""
+        cpu_temp = self.cpu_temp.read() if self.cpu_temp else None
+        cpu_fan = self.cpu_fan.read() if self.cpu_fan else None
+        disk_temps = []
+        for name, sensor in self.disk_temps:
+            value = sensor.read()
+            if value is not None:
+                disk_temps.append({"name": name, "temp": round(value, 1)})
+        return {
+            "cpu_temp": round(cpu_temp, 1) if cpu_temp is not None else None,
+            "cpu_power": self._cpu_power(),
+            "cpu_fan": int(cpu_fan) if cpu_fan else None,
+            "disk_temps": disk_temps,
+        }
+
+    def close(self):
+        for sensor in [self.cpu_temp, self.cpu_fan, self._rapl] + [s for _, s in self.disk_temps]:
+            if sensor is not None:
+                sensor.close()
+
+
+# === PROCFS / INVENTAIRE ===
+
+def cpu_model_name(root: str = "/") -> Optional[str]:
+    """Nom du CPU depuis /proc/cpuinfo."""
+    for line in _read_text(os.path.join(root, "proc", "cpuinfo")).splitlines():
+        key, _, value = line.partition(":")
+        if key.strip() in ("model name", "Model", "Hardware") and value.strip():
+            return value.strip()
+    return None
+
+
+def os_pretty_name(root: str = "/") -> Optional[str]:
+    """PRETTY_NAME de /etc/os-release."""
+    for line in _read_text(os.path.join(root, "etc", "os-release")).splitlines():
+        if line.startswith("PRETTY_NAME="):
+            return line.split("=", 1)[1].strip().strip('"') or None
+    return None
+
+
+def block_device_models(root: str = "/") -> Dict[str, str]:
+    """{'/dev/sda1': 'Samsung SSD 870', ...} depuis /sys/block/*/device/model."""
+    names: Dict[str, str] = {}
+    block_root = os.path.join(root, "sys", "block")
+    for disk in _listdir(block_root):
+        disk_dir = os.path.join(block_root, disk)
+        model = _read_text(os.path.join(disk_dir, "device", "model"))
+        if not model:
+            continue
+        names[f"/dev/{disk}"] = model
+        for part in _listdir(disk_dir):
+            if part.startswith(disk):
+                names[f"/dev/{part}"] = model
+    return names
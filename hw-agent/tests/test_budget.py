@@ -0,0 +1,91 @@
+"""Tests du budget CPU des collecteurs."""
+import subprocess
+import sys
+import time
+
+import pytest
+
+from agent import Collector, SamplingPipeline, child_cpu, run_command
+
+# Fils qui brule ~0.3 s de CPU puis ecrit sur stdout
+BURN = [sys.executable, "-c", "import time\nend = time.process_time() + 0.3\nwhile time.process_time() < end: pass\nprint('ok')"]
+
+
+class FakeMonitor:
+
+    def __init__(self, usage: float):
+        self.usage = usage
+        self.cpu_percent = usage
+        self.rss_mb = 40.0
+
+    def sample(self) -> float:
+        return self.usage
+
+
+def pipeline(usage: float, *collectors: Collector) -> SamplingPipeline:
+    p = SamplingPipeline(list(collectors), max_workers=1, cpu_budget=2.0)
+    p.monitor = FakeMonitor(usage)
+    return p
+
+
+class TestCpuBudget:
+
+    def test_cost_is_cpu_not_wall_time(self):
+        waiting = Collector("gpu", lambda: None, 5)
+        waiting.record(wall_s=0.8, cpu_s=0.002)  # Attente d'E/S, sans sous-processus
+        busy = Collector("processes", lambda: None, 5)
+        busy.record(wall_s=0.1, cpu_s=0.09)
+        assert busy.cost > waiting.cost
+        assert waiting.cost == 0.4
+
+    def test_over_budget_stretches_cpu_heaviest(self):
+        waiting = Collector("gpu", lambda: None, 5)
+        waiting.record(wall_s=0.8, cpu_s=0.002)
+        busy = Collector("processes", lambda: None, 5)
+        busy.record(wall_s=0.1, cpu_s=0.09)
+        p = pipeline(5.0, waiting, busy)
+        p.enforce_budget()
+        assert busy.interval == 10 and waiting.interval == 5
+        p._executor.shutdown()
+
+    def test_under_budget_restores_intervals(self):
+        busy = Collector("processes", lambda: None, 5)
+        busy.record(wall_s=0.1, cpu_s=0.09)
+        busy.interval = 20
+        p = pipeline(0.5, busy)
+        p.enforce_budget()
+        assert busy.interval == 10
+        p._executor.shutdown()
+
+
+def busy_thread(seconds: float):
+    end = time.thread_time() + seconds
+    while time.thread_time() < end:
+        pass
+
+
+class TestChildProcessCpu:
+
+    def test_run_command_measures_child_cpu(self):
+        before = child_cpu.thread_seconds()
+        result = run_command(BURN, timeout=10)
+        assert result.returncode == 0 and result.stdout.strip() == "ok"
+        assert child_cpu.thread_seconds() - before >= 0.2
+
+    def test_run_command_timeout(self):
+        with pytest.raises(subprocess.TimeoutExpired):
+            run_command([sys.executable, "-c", "import time; time.sleep(5)"], timeout=0.2)
+
+    def test_subprocess_collector_is_stretched(self):
+        """Le CPU du fils (PowerShell, nvidia-smi) compte dans le cout du collecteur qui le lance."""
+        sensors = Collector("sensors", lambda: run_command(BURN, timeout=10).stdout, 5)
+        processes = Collector("processes", lambda: busy_thread(0.05), 5)
+        p = pipeline(5.0, sensors, processes)
+        p._run_collector(sensors)
+        p._run_collector(processes)
+
+        assert sensors.avg_cpu_ms >= 200
+        assert sensors.cost > processes.cost
+        p.enforce_budget()
+        assert sensors.interval == 10 and processes.interval == 5
+        p._executor.shutdown()
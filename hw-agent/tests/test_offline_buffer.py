@@ -0,0 +1,122 @@
+"""Tests du tampon hors connexion (ring mmap) et de son rejeu."""
+import base64
+import json
+import os
+import zlib
+
+import pytest
+
+import agent
+from offline_buffer import OfflineRing
+
+
+@pytest.fixture
+def ring_path(tmp_path):
+    return str(tmp_path / "buffer" / "offline.ring")
+
+
+class TestOfflineRing:
+
+    def test_fifo_order(self, ring_path):
+        ring = OfflineRing(ring_path, capacity=4, record_size=256)
+        for i in range(3):
+            assert ring.append({"i": i})
+        assert len(ring) == 3
+        assert ring.peek(10) == [{"i": 0}, {"i": 1}, {"i": 2}]
+        ring.close()
+
+    def test_wraparound_overwrites_oldest(self, ring_path):
+        ring = OfflineRing(ring_path, capacity=3, record_size=256)
+        for i in range(5):
+            ring.append({"i": i})
+        assert len(ring) == 3
+        assert ring.peek(3) == [{"i": 2}, {"i": 3}, {"i": 4}]
+        ring.close()
+
+    def test_pop_after_ack(self, ring_path):
+        ring = OfflineRing(ring_path, capacity=3, record_size=256)
+        for i in range(4):
+            ring.append({"i": i})
+        ring.pop(2)
+        assert ring.peek(3) == [{"i": 3}]
+        ring.append({"i": 4})
+        ring.append({"i": 5})
+        assert ring.peek(3) == [{"i": 3}, {"i": 4}, {"i": 5}]
+        ring.pop(10)  # Borne au contenu
+        assert len(ring) == 0
+        assert ring.peek(1) == []
+        ring.close()
+
+    def test_survives_reopen(self, ring_path):
+        ring = OfflineRing(ring_path, capacity=3, record_size=256)
+        for i in range(4):
+            ring.append({"i": i})
+        ring.pop(1)
+        ring.close()
+
+        ring = OfflineRing(ring_path, capacity=3, record_size=256)
+        assert len(ring) == 2
+        assert ring.peek(2) == [{"i": 2}, {"i": 3}]
+        ring.close()
+
+    def test_geometry_change_resets(self, ring_path):
+        ring = OfflineRing(ring_path, capacity=3, record_size=256)
+        ring.append({"i": 0})
+        ring.close()
+
+        ring = OfflineRing(ring_path, capacity=5, record_size=256)
+        assert len(ring) == 0
+        assert os.path.getsize(ring_path) > 5 * 256
+        ring.close()
+
+    def test_oversize_sample_skipped(self, ring_path):
+        ring = OfflineRing(ring_path, capacity=3, record_size=64)
+        assert not ring.append({"blob": os.urandom(128).hex()})  # Incompressible
+        assert ring.append({"i": 0})
+        assert ring.peek(3) == [{"i": 0}]
+        ring.close()
+
+
+class FakeWebSocket:
+
+    def __init__(self, reply_type: str = "backfill_ack"):
+        self.reply_type = reply_type
+        self.sent = []
+
+    async def send(self, message: str):
+        self.sent.append(json.loads(message))
+
+    async def recv(self) -> str:
+        return json.dumps({"type": self.reply_type})
+
+    def batches(self):
+        return [json.loads(zlib.decompress(base64.b64decode(m["data"]))) for m in self.sent]
+
+
+class TestReplayBacklog:
+
+    async def test_replays_in_acked_batches(self, ring_path, monkeypatch):
+        monkeypatch.setattr(agent, "BACKFILL_BATCH", 2)
+        ring = OfflineRing(ring_path, capacity=8, record_size=256)
+        for i in range(5):
+            ring.append({"i": i})
+
+        ws = FakeWebSocket()
+        await agent.replay_backlog(ws, ring)
+
+        assert [m["count"] for m in ws.sent] == [2, 2, 1]
+        assert ws.batches() == [[{"i": 0}, {"i": 1}], [{"i": 2}, {"i": 3}], [{"i": 4}]]
+        assert len(ring) == 0
+        ring.close()
+
+    async def test_unacked_batch_kept(self, ring_path, monkeypatch):
+        monkeypatch.setattr(agent, "BACKFILL_BATCH", 2)
+        ring = OfflineRing(ring_path, capacity=8, record_size=256)
+        for i in range(3):
+            ring.append({"i": i})
+
+        with pytest.raises(RuntimeError):
+            await agent.replay_backlog(FakeWebSocket(reply_type="error"), ring)
+        # Rien retire : rejoue a la prochaine connexion
+        assert ring.peek(3) == [{"i": 0}, {"i": 1}, {"i": 2}]
+        ring.close()
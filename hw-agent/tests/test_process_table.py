@@ -0,0 +1,127 @@
+"""Tests de la table de processus incrementale (top N par RAM et par CPU)."""
+from contextlib import nullcontext
+from types import SimpleNamespace
+
+import psutil
+import pytest
+
+from agent import ProcessTable
+
+MB = 1024 * 1024
+
+
+class FakeProcess:
+    """psutil.Process minimal, alimente par la fausse table `system`."""
+
+    def __init__(self, system: "FakeSystem", pid: int):
+        if pid not in system.procs:
+            raise psutil.NoSuchProcess(pid)
+        self.system = system
+        self.pid = pid
+
+    def _state(self) -> dict:
+        if self.pid not in self.system.procs:
+            raise psutil.NoSuchProcess(self.pid)
+        return self.system.procs[self.pid]
+
+    def oneshot(self):
+        return nullcontext()
+
+    def name(self) -> str:
+        return self._state()["name"]
+
+    def memory_info(self):
+        self.system.reads.append(self.pid)
+        return SimpleNamespace(rss=self._state()["rss"])
+
+    def cpu_percent(self, interval=None) -> float:
+        return self._state()["cpu"]
+
+
+class FakeSystem:
+
+    def __init__(self):
+        self.procs: dict = {}
+        self.exited: set = set()  # Encore listes par pids(), deja morts
+        self.reads: list = []
+
+    def pids(self) -> list:
+        return list(self.procs) + list(self.exited)
+
+    def spawn(self, pid: int, name: str, rss_mb: float = 10, cpu: float = 0.0):
+        self.procs[pid] = {"name": name, "rss": int(rss_mb * MB), "cpu": cpu}
+
+
+@pytest.fixture
+def system(monkeypatch):
+    fake = FakeSystem()
+    monkeypatch.setattr(psutil, "pids", fake.pids)
+    monkeypatch.setattr(psutil, "Process", lambda pid: FakeProcess(fake, pid))
+    monkeypatch.setattr(psutil, "cpu_count", lambda *args, **kwargs: 1)
+    return fake
+
+
+def names(rows: list) -> list:
+    return [row["name"] for row in rows]
+
+
+class TestProcessTable:
+
+    def test_top_by_memory_and_cpu(self, system):
+        system.spawn(1, "init", rss_mb=5, cpu=0.1)
+        system.spawn(2, "chrome", rss_mb=900, cpu=12.0)
+        system.spawn(3, "ffmpeg", rss_mb=200, cpu=85.0)
+        system.spawn(4, "plex", rss_mb=400, cpu=3.0)
+
+        top = ProcessTable().top(2)
+        assert names(top["by_memory"]) == ["chrome", "plex"]
+        assert names(top["by_cpu"]) == ["ffmpeg", "chrome"]
+        assert top["by_memory"][0] == {"id": 2, "name": "chrome", "memory_mb": 900.0, "cpu_percent": 12.0}
+
+    def test_added_and_removed_pids(self, system):
+        system.spawn(1, "init", rss_mb=5)
+        system.spawn(2, "chrome", rss_mb=900)
+        table = ProcessTable()
+        table.top(2)
+
+        del system.procs[2]
+        system.spawn(3, "ffmpeg", rss_mb=300, cpu=50.0)
+        top = table.top(2)
+        assert names(top["by_memory"]) == ["ffmpeg", "init"]
+        assert set(table._procs) == set(table._samples) == {1, 3}
+        assert 2 not in table._names
+
+    def test_process_gone_between_pids_and_read(self, system):
+        system.spawn(1, "init", rss_mb=5)
+        system.spawn(2, "short", rss_mb=50)
+        table = ProcessTable(full_scan_every=1)
+        table.top(2)
+
+        # Encore liste par pids() mais deja mort a la lecture
+        system.procs.pop(2)
+        system.exited.add(2)
+        top = table.top(2)
+        assert names(top["by_memory"]) == ["init"]
+        assert 2 not in table._procs
+
+    def test_partial_pass_reads_only_candidates(self, system):
+        for pid in range(1, 21):
+            system.spawn(pid, f"p{pid}", rss_mb=pid, cpu=pid / 10)
+        table = ProcessTable(full_scan_every=3)
+        table.top(2)
+        assert len(system.reads) == 20  # Releve complet
+
+        system.reads.clear()
+        system.spawn(99, "new", rss_mb=1, cpu=0.0)
+        table.top(2)
+        # 2N premiers par RAM et par CPU (memes PID ici) + le nouveau
+        assert sorted(system.reads) == [17, 18, 19, 20, 99]
+
+        system.reads.clear()
+        system.procs[5]["cpu"] = 99.0  # Remontee d'un processus hors candidats
+        assert names(table.top(2)["by_cpu"]) == ["p20", "p19"]  # Pas encore vu
+
+        system.reads.clear()
+        top = table.top(2)  # Tick complet
+        assert len(system.reads) == 21
+        assert names(top["by_cpu"]) == ["p5", "p20"]
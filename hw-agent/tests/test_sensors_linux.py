@@ -0,0 +1,162 @@
+"""Tests des capteurs Linux sur une fausse arborescence sysfs/procfs."""
+import os
+
+import pytest
+
+import sensors_linux
+from sensors_linux import LinuxSensors, block_device_models, cpu_model_name, os_pretty_name
+
+
+def write(root, rel: str, content) -> str:
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"{content}\n")
+    return str(path)
+
+
+def hwmon(root, index: int, driver: str, **files) -> str:
+    base = f"sys/class/hwmon/hwmon{index}"
+    write(root, f"{base}/name", driver)
+    for name, value in files.items():
+        write(root, f"{base}/{name}", value)
+    return str(root / base)
+
+
+@pytest.fixture
+def open_sensors():
+    opened = []
+
+    def factory(root):
+        sensors = LinuxSensors(root=str(root))
+        opened.append(sensors)
+        return sensors
+
+    yield factory
+    for sensors in opened:
+        sensors.close()
+
+
+class TestCpuTemperature:
+
+    def test_coretemp_prefers_package_label(self, tmp_path, open_sensors):
+        hwmon(tmp_path, 0, "coretemp",
+              temp2_input=61000, temp2_label="Core 0",
+              temp1_input=55000, temp1_label="Package id 0")
+        assert open_sensors(tmp_path).read()["cpu_temp"] == 55.0
+
+    def test_k10temp_ranks_tctl_over_tccd(self, tmp_path, open_sensors):
+        hwmon(tmp_path, 0, "k10temp",
+              temp3_input=48000, temp3_label="Tccd1",
+              temp1_input=52500, temp1_label="Tctl")
+        assert open_sensors(tmp_path).read()["cpu_temp"] == 52.5
+
+    def test_unrelated_hwmon_ignored(self, tmp_path, open_sensors):
+        hwmon(tmp_path, 0, "acpitz", temp1_input=27800)
+        assert open_sensors(tmp_path).read()["cpu_temp"] is None
+
+    def test_thermal_zone_fallback(self, tmp_path, open_sensors):
+        write(tmp_path, "sys/class/thermal/thermal_zone0/type", "acpitz")
+        write(tmp_path, "sys/class/thermal/thermal_zone0/temp", 27800)
+        write(tmp_path, "sys/class/thermal/thermal_zone1/type", "x86_pkg_temp")
+        write(tmp_path, "sys/class/thermal/thermal_zone1/temp", 47000)
+        write(tmp_path, "sys/class/thermal/cooling_device0/type", "Processor")
+        assert open_sensors(tmp_path).read()["cpu_temp"] == 47.0
+
+    def test_value_reread_each_tick(self, tmp_path, open_sensors):
+        base = hwmon(tmp_path, 0, "coretemp", temp1_input=50000, temp1_label="Package id 0")
+        sensors = open_sensors(tmp_path)
+        assert sensors.read()["cpu_temp"] == 50.0
+        # Meme descripteur, relu par pread
+        with open(os.path.join(base, "temp1_input"), "w") as f:
+            f.write("63000\n")
+        assert sensors.read()["cpu_temp"] == 63.0
+
+
+class TestDisksAndFans:
+
+    def test_nvme_named_by_model(self, tmp_path, open_sensors):
+        base = hwmon(tmp_path, 1, "nvme", temp1_input=38850, temp2_input=41000)
+        write(tmp_path, "devices/nvme0/model", "Samsung SSD 980 PRO 1TB")
+        os.symlink(tmp_path / "devices/nvme0", os.path.join(base, "device"))
+        assert open_sensors(tmp_path).read()["disk_temps"] == [{"name": "Samsung SSD 980 PRO 1TB", "temp": 38.9}]
+
+    def test_drivetemp_without_model_uses_device_name(self, tmp_path, open_sensors):
+        base = hwmon(tmp_path, 2, "drivetemp", temp1_input=33000)
+        (tmp_path / "devices/0:0:0:0").mkdir(parents=True)
+        os.symlink(tmp_path / "devices/0:0:0:0", os.path.join(base, "device"))
+        assert open_sensors(tmp_path).read()["disk_temps"] == [{"name": "0:0:0:0", "temp": 33.0}]
+
+    def test_stopped_fan_skipped(self, tmp_path, open_sensors):
+        hwmon(tmp_path, 3, "nct6798", fan1_input=0, fan2_input=1150)
+        assert open_sensors(tmp_path).read()["cpu_fan"] == 1150
+
+    def test_pump_preferred(self, tmp_path, open_sensors):
+        hwmon(tmp_path, 3, "nct6798", fan1_input=900, fan2_input=2700, fan2_label="AIO Pump")
+        assert open_sensors(tmp_path).read()["cpu_fan"] == 2700
+
+    def test_no_fan_spinning(self, tmp_path, open_sensors):
+        hwmon(tmp_path, 3, "nct6798", fan1_input=0)
+        assert open_sensors(tmp_path).read()["cpu_fan"] is None
+
+
+class TestRapl:
+
+    def rapl(self, tmp_path, energy: int) -> str:
+        return write(tmp_path, "sys/class/powercap/intel-rapl:0/energy_uj", energy)
+
+    def test_power_from_energy_delta(self, tmp_path, open_sensors, monkeypatch):
+        path = self.rapl(tmp_path, 1_000_000)
+        clock = iter([100.0, 102.0, 104.0])
+        monkeypatch.setattr(sensors_linux.time, "monotonic", lambda: next(clock))
+        sensors = open_sensors(tmp_path)
+
+        assert sensors.read()["cpu_power"] is None  # Premier point
+        with open(path, "w") as f:
+            f.write("91000000\n")  # 90 J en 2 s
+        assert sensors.read()["cpu_power"] == 45.0
+
+        with open(path, "w") as f:
+            f.write("5000000\n")  # Compteur reboucle
+        assert sensors.read()["cpu_power"] is None
+
+    def test_unreadable_rapl_ignored(self, tmp_path, open_sensors):
+        self.rapl(tmp_path, "")
+        sensors = open_sensors(tmp_path)
+        assert sensors._rapl is None
+        assert sensors.read()["cpu_power"] is None
+
+
+class TestInventory:
+
+    def test_cpu_model_name(self, tmp_path):
+        write(tmp_path, "proc/cpuinfo", "processor\t: 0\nvendor_id\t: AuthenticAMD\n"
+                                        "model name\t: AMD Ryzen 7 5800X 8-Core Processor\n")
+        assert cpu_model_name(str(tmp_path)) == "AMD Ryzen 7 5800X 8-Core Processor"
+
+    def test_cpu_model_name_arm(self, tmp_path):
+        write(tmp_path, "proc/cpuinfo", "processor\t: 0\nModel\t\t: Raspberry Pi 4 Model B Rev 1.4\n")
+        assert cpu_model_name(str(tmp_path)) == "Raspberry Pi 4 Model B Rev 1.4"
+
+    def test_cpu_model_name_missing(self, tmp_path):
+        assert cpu_model_name(str(tmp_path)) is None
+
+    def test_os_pretty_name(self, tmp_path):
+        write(tmp_path, "etc/os-release", 'NAME="Debian GNU/Linux"\nPRETTY_NAME="Debian GNU/Linux 12 (bookworm)"\n')
+        assert os_pretty_name(str(tmp_path)) == "Debian GNU/Linux 12 (bookworm)"
+
+    def test_block_device_partitions(self, tmp_path):
+        write(tmp_path, "sys/block/sda/device/model", "Samsung SSD 870")
+        (tmp_path / "sys/block/sda/sda1").mkdir()
+        (tmp_path / "sys/block/sda/sda2").mkdir()
+        (tmp_path / "sys/block/sda/queue").mkdir()
+        write(tmp_path, "sys/block/nvme0n1/device/model", "WD Black SN850")
+        (tmp_path / "sys/block/nvme0n1/nvme0n1p1").mkdir()
+        (tmp_path / "sys/block/loop0").mkdir(parents=True)  # Sans modele : ignore
+
+        assert block_device_models(str(tmp_path)) == {
+            "/dev/nvme0n1": "WD Black SN850",
+            "/dev/nvme0n1p1": "WD Black SN850",
+            "/dev/sda": "Samsung SSD 870",
+            "/dev/sda1": "Samsung SSD 870",
+            "/dev/sda2": "Samsung SSD 870",
+        }